@@ -1,26 +1,53 @@
 import os
+import csv
+import time
+import hashlib
 import sqlite3
+from datetime import datetime, timezone
 import bcrypt
 import logging
-from flask import Flask, render_template, request, redirect, flash, session, url_for, abort
+from flask import Flask, Blueprint, render_template, request, redirect, flash, session, url_for, abort, jsonify, g, Response, current_app
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from flask_wtf.csrf import  CSRFProtect 
+from flask_wtf.csrf import  CSRFProtect, generate_csrf
+from markupsafe import Markup
+from jinja2 import FileSystemBytecodeCache
 from functools import wraps
 from dotenv import load_dotenv
+import connection
 from connection import get_db_connection, get_sqlserver_connection
-from auth import User, permission_required, admin_required, editor_required, Role
+from auth import User, permission_required, admin_required, editor_required, metrics_access_required, Role
+from pagination import keyset_page, page_args, GAME_SORT_KEYS, CONSOLE_SORT_KEYS
+from search import get_search_index, fetch_games, SearchResults
+import autocomplete
+import facets
+import lookups
+import stats
+from dialect import insert_returning, delete_returning, update_returning_previous, is_unique_violation
+import counters
+import versions
+import batch
+import events
+import migrations
+from importer import import_records, read_records, detect_format, text_stream, ImportFormatError, IMPORT_CHUNK_SIZE
+from export import stream_export, parse_updated_since, InvalidExportFilter, EXPORTS, FORMATS
+from user_cache import user_cache
+from passwords import password_verifier, VerifierBusy
+from page_cache import page_cache, CSRF_PLACEHOLDER
+from query_stats import query_stats
+from metrics import render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+import rate_limit_storage  # Registra el esquema sqlite:// de storage_uri
+import assets
 
 # Load environment variables
 load_dotenv()
-app = Flask(__name__)
-app.secret_key = os.getenv('SECRET_KEY', 'default_secretpass')  # Fallback for development
-app.config['SECRET_KEY'] = app.secret_key
+
+# Las extensiones se crean sin app y se enlazan en create_app()
 
 # Configuration CSRF Protection
 
-csrf = CSRFProtect(app)
+csrf = CSRFProtect()
 
 # Configuration Rate Limiting
 
@@ -29,18 +56,16 @@ def get_limiter_key():
     """Usa sesión en lugar de IP para rate limiting"""
     return session.get('_id', request.remote_addr)
 
+# Storage y estrategia salen de app.config (RATELIMIT_STORAGE_URI, RATELIMIT_STRATEGY)
 limiter = Limiter(
-    app=app,
     key_func=get_limiter_key,  # ← CAMBIADO
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
 )
 
 # Configuration Flask-Login
 
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'main.login'
 login_manager.login_message = 'Debes de iniciar sesion para acceder a esta pagina'
 login_manager.login_message_category = 'error'
 
@@ -48,25 +73,56 @@ login_manager.login_message_category = 'error'
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Rutas de la aplicación; create_app() registra el blueprint
+main = Blueprint('main', __name__)
+
 @login_manager.user_loader
 def load_user(user_id):
-    """Carga usuario desde la base de datos"""
+    """Carga usuario desde la caché o, si no está, desde la base de datos"""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
     conn = get_sqlserver_connection()
     try:
         user_data = conn.execute('SELECT id, username, password_hash, role FROM users WHERE id = ?', (user_id,)).fetchone()
         if user_data:
-            return User (
+            user = User (
                 id = user_data['id'],
                 username = user_data['username'],
                 password_hash = user_data['password_hash'],
                 role = user_data.get('role', 'viewer')  
             )
+            user_cache.put(user)
+            return user
     except Exception as e:
         logger.error(f"Error loading user: {e}")
     finally:
         conn.close()
     return None
 
+@main.before_app_request
+def start_query_stats():
+    """Acumula las sentencias SQL de esta petición para sumarlas a su endpoint"""
+    g.query_stats_token = query_stats.start_request(request.endpoint)
+
+@main.after_app_request
+def finish_query_stats(response):
+    token = g.pop('query_stats_token', None)
+    if token is not None:
+        summary = query_stats.finish_request(token)
+        response.headers['Server-Timing'] = (
+            f'db;dur={summary["time"] * 1000:.1f};desc="{summary["queries"]} queries"'
+        )
+    return response
+
+@main.teardown_app_request
+def discard_query_stats(exc):
+    # Si la vista lanzó una excepción after_request no se ejecuta
+    token = g.pop('query_stats_token', None)
+    if token is not None:
+        query_stats.finish_request(token)
+
 #@app.before_request
 #def apply_rate_limiting():
 #    """Aplica rate limiting solo a POST /login"""
@@ -77,11 +133,11 @@ def load_user(user_id):
 #        except:
 #            pass  # Se maneja en la función login()
 
-@app.route('/login', methods=['GET', 'POST'])
+@main.route('/login', methods=['GET', 'POST'])
 def login():
     # Si ya está autenticado, redirigir a index
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     if request.method == 'POST':
         # Rate limiting solo para POST (intentos de login)
@@ -106,128 +162,441 @@ def login():
 
         if user_data and user_data['password_hash']:
             password_hash = user_data['password_hash']
-            if isinstance(password_hash, str):
-                password_hash = password_hash.encode('utf-8')
-            
-            if bcrypt.checkpw(password.encode('utf-8'), password_hash):
+
+            # bcrypt corre en el pool de verificación; si está lleno se rechaza de inmediato
+            try:
+                valid, new_hash = password_verifier.verify(password, password_hash)
+            except VerifierBusy as e:
+                logger.warning(f"Login rechazado para {username}: {e}")
+                return render_template('429.html'), 429, {'Retry-After': '1'}
+
+            if valid:
+                if new_hash is not None:
+                    password_hash = _rehash_password(user_data['id'], password_hash, new_hash)
                 user = User(
                     id=user_data['id'],
                     username=user_data['username'],
-                    password_hash=user_data['password_hash'],
+                    password_hash=password_hash,
                     role=user_data.get('role', 'viewer')
                 )
                 login_user(user)
+                user_cache.put(user)
                 logger.info(f"Usuario {username} inició sesión con rol {user.role}")
                 flash(f'Bienvenido {username}!', 'success')
                 
                 # Redirigir a página solicitada o index
                 next_page = request.args.get('next')
-                return redirect(next_page) if next_page else redirect(url_for('index'))
+                return redirect(next_page) if next_page else redirect(url_for('main.index'))
         
         flash('Usuario o contraseña incorrectos.', 'error')
         logger.warning(f"Intento de login fallido para usuario: {username}")
     
     return render_template('login.html')
 
-@app.route('/logout')
+def _rehash_password(user_id, old_hash, new_hash):
+    """Guarda el hash recalculado con el coste actual de BCRYPT_ROUNDS"""
+    if isinstance(old_hash, str):
+        new_hash = new_hash.decode('utf-8')
+    conn = get_sqlserver_connection()
+    try:
+        conn.execute('UPDATE users SET password_hash = ? WHERE id = ?', (new_hash, user_id))
+        conn.commit()
+        logger.info(f"Hash de contraseña actualizado al coste actual para usuario ID: {user_id}")
+        return new_hash
+    except Exception as e:
+        logger.error(f"Error rehashing password: {e}")
+        return old_hash
+    finally:
+        conn.close()
+
+@main.route('/logout')
 @login_required
 def logout():
     username = current_user.username
     logout_user()
     flash(f'Sesion cerrada. Hasta Pronto {username}!', 'info')
     logger.info(f"Usuario {username} cerro la sesion")
-    return redirect(url_for('login'))
-
-@app.route('/')
+    return redirect(url_for('main.login'))
+
+@main.app_template_global()
+def page_url(**overrides):
+    """URL de la vista actual cambiando algunos parámetros (None elimina el parámetro)"""
+    # Conserva los parámetros repetidos (filtros de facetas con varios valores)
+    args = request.args.to_dict(flat=False)
+    args.update(overrides)
+    args = {key: value for key, value in args.items() if value is not None}
+    return url_for(request.endpoint, **dict(request.view_args or {}, **args))
+
+@main.app_template_global()
+def sidebar_entries(kind):
+    """Plataformas (games) o modelos (consoles) del menú lateral, por familia"""
+    return lookups.sidebar(kind)
+
+@main.route('/')
 @login_required
 def index():
-    conn = get_sqlserver_connection()
     search_query = request.args.get('q', '')
+    # Las búsquedas salen del índice de cada worker, no de las tablas: sin ETag
+    etag = None if search_query else _listing_etag(_listing_versions(('games', versions.ALL), ('consoles', versions.ALL)))
+    return _conditional(etag, lambda: _render_index(search_query))
 
-
+def _render_index(search_query):
+    search_ready = None
+    conn = get_sqlserver_connection()
     try:
         if search_query:
-            games = conn.execute(
-                '''
-                SELECT * FROM games
-                WHERE LOWER(title) LIKE ? OR LOWER(genre) LIKE ? OR LOWER(platform) LIKE ?
-                ''',
-                tuple(['%' + search_query.lower() + '%'] * 3)
-            ).fetchall()
+            # Resultados por relevancia desde el índice; el cursor es el número de página
+            games_args = page_args(request.args)
+            page = request.args.get('cursor', 1, type=int)
+            index = _search_index(conn)
+            search_ready = index is not None
+            if search_ready:
+                games_page = index.search(search_query, page=page, per_page=games_args['per_page'])
+            else:
+                games_page = SearchResults([], 0, max(1, page), games_args['per_page'])
+            games = fetch_games(conn, games_page.ids)
         else:
-            games = conn.execute('SELECT * FROM games').fetchall()
+            games_page = keyset_page(conn, 'games', GAME_SORT_KEYS, **page_args(request.args))
+            games = games_page.items
 
-        consoles = conn.execute('SELECT * FROM consoles').fetchall()
+        consoles_page = keyset_page(conn, 'consoles', CONSOLE_SORT_KEYS,
+                                    **page_args(request.args, prefix='console_'))
     finally:
         conn.close()
 
-    return render_template('index.html', games=games, consoles=consoles, query=search_query)
+    return render_template('index.html', games=games, consoles=consoles_page.items,
+                           games_page=games_page, consoles_page=consoles_page, query=search_query,
+                           search_ready=search_ready)
+
+def _search_index(conn):
+    """
+    Índice de búsqueda comprobado contra la versión de games en la base (el de
+    memoria es de este worker y otro puede haber escrito); None mientras se construye
+    """
+    table_key = ('games', versions.ALL)
+    return get_search_index(version=versions.current(conn, [table_key])[table_key])
+
+def _json_row(row):
+    """Convierte una fila en dict serializable (fechas en ISO 8601)"""
+    return {key: value.isoformat() if hasattr(value, 'isoformat') else value
+            for key, value in dict(row).items()}
 
-@app.route('/games/<platform>')
+@main.route('/api/search')
 @login_required
-def games_by_platform(platform):
-    conn = get_sqlserver_connection()
-    page = request.args.get('page', 1, type=int)
-    per_page = 50
-    offset = (page - 1) * per_page
-    normalized_platform = platform.replace(' ', '').lower()
+def api_search():
+    """Búsqueda paginada: /api/search?q=zelda&page=1&per_page=20"""
+    search_query = request.args.get('q', '')
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
 
+    conn = get_sqlserver_connection()
     try:
-        games = conn.execute(
-            '''
-            SELECT * FROM games
-            WHERE platform_normalized = ?
-            ORDER BY  id
-            OFFSET ? ROWS
-            FETCH NEXT ? ROWS ONLY
-            ''',
-            (normalized_platform, offset, per_page)
-        ).fetchall()
-
-        total = conn.execute(
-            'SELECT COUNT(*) as count FROM games WHERE platform_normalized = ?',
-            (normalized_platform,)
-        ).fetchone()['count']
+        index = _search_index(conn)
+        if index is None:
+            return jsonify({'query': search_query, 'ready': False})  # El índice se está construyendo
+        results = index.search(search_query, page=page, per_page=per_page)
+        games = fetch_games(conn, results.ids)
+    finally:
+        conn.close()
+
+    return jsonify({
+        'ready': True,
+        'query': search_query,
+        'page': results.page,
+        'per_page': results.per_page,
+        'total': results.total,
+        'results': [_json_row(game) for game in games],
+    })
 
+@main.route('/api/suggest')
+@login_required
+@limiter.limit("10 per second;3000 per hour")  # Una petición por pulsación (con debounce en el cliente)
+def api_suggest():
+    """Autocompletado: /api/suggest?q=zel&limit=8&rank=inventory|score"""
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', autocomplete.DEFAULT_LIMIT, type=int), autocomplete.MAX_LIMIT))
+    rank = request.args.get('rank', 'inventory')
+    if rank not in autocomplete.RANKS:
+        return jsonify({'error': f"rank debe ser uno de: {', '.join(autocomplete.RANKS)}"}), 400
+
+    # Versión de la tabla: el índice es de este worker y otro puede haber escrito
+    table_key = ('games', versions.ALL)
+    suggestions = autocomplete.suggest(query, limit=limit, rank=rank, version=_listing_versions(table_key)[table_key])
+    return jsonify({
+        'query': query,
+        'ready': suggestions is not None,  # False mientras se construye el índice
+        'suggestions': [suggestion.to_dict() for suggestion in suggestions or []],
+    })
+
+@main.route('/api/facets/<kind>')
+@login_required
+def api_facets(kind):
+    """Recuentos por faceta: /api/facets/games?group=PlayStation 2&genre=RPG&score_min=7"""
+    if kind not in facets.FACETS:
+        abort(404)
+    try:
+        filters = facets.parse_filters(kind, request.args)
+    except facets.InvalidFacetFilter as e:
+        return jsonify({'error': str(e)}), 400
+    group = request.args.get('group')
+    entry = lookups.find(kind, group) if group else None
+    result = facets.search(kind, filters, entry[1] if entry else lookups.normalize(group) or None)
+    if result is None:
+        return jsonify({'ready': False})  # El índice se está construyendo
+    return jsonify(dict(result.to_dict(), ready=True))
+
+def _stats_summaries():
+    """
+    {tipo: resumen} de stats para juegos y consolas; None mientras alguna
+    instantánea se construye por primera vez. Las versiones de tabla se leen
+    aquí para que una instantánea que no refleja la base se reconstruya.
+    """
+    keys = [(kind, versions.ALL) for kind in stats.COLUMNS]
+    conn = get_sqlserver_connection()
+    try:
+        current = versions.current(conn, keys)
     finally:
         conn.close()
+    summaries = {kind: stats.summary(kind, current[(kind, group)]) for kind, group in keys}
+    return None if None in summaries.values() else summaries
 
-    return render_template('index.html', games=games, consoles=[], query='', platform=platform,
-                           page=page, per_page=per_page, total=total)
+@main.route('/stats')
+@login_required
+def stats_dashboard():
+    return render_template('stats.html', summaries=_stats_summaries())
 
-@app.route('/consoles/<model>')
+@main.route('/api/stats')
 @login_required
-def console_by_model(model):
+def api_stats():
+    """Resumen de la colección: totales, por plataforma/modelo, puntuaciones, años, géneros y condición"""
+    summaries = _stats_summaries()
+    if summaries is None:
+        return jsonify({'ready': False})  # La instantánea se está construyendo
+    return jsonify(dict(summaries, ready=True))
+
+def _export_response(kind):
+    """
+    Exportación completa en streaming: ?format=ndjson|csv&platform=|model=&updated_since=
+    La respuesta se genera por lotes de fetchmany; la memoria no crece con la colección.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'error': f"format debe ser uno de: {', '.join(FORMATS)}"}), 400
+    group_param = EXPORTS[kind][2][0]
+    try:
+        updated_since = parse_updated_since(request.args.get('updated_since'))
+    except InvalidExportFilter as e:
+        return jsonify({'error': str(e)}), 400
+
+    group = request.args.get(group_param)
+    entry = lookups.find(kind, group) if group else None
+    if group and entry is None:
+        return jsonify({'error': f"{group_param} desconocido: {group}"}), 404
+
     conn = get_sqlserver_connection()
-    page = request.args.get('page', 1, type=int)
-    per_page = 50
-    offset = (page - 1) * per_page
-    normalized_model = model.replace(' ', '').lower()
+    try:
+        content = stream_export(conn, kind, fmt, group_id=entry[0] if entry else None,
+                                updated_since=updated_since)
+    except Exception as e:
+        conn.close()
+        logger.error(f"Error exporting {kind}: {e}")
+        return jsonify({'error': 'No se pudo generar la exportación'}), 500
+
+    response = Response(content, content_type=FORMATS[fmt])
+    response.call_on_close(conn.close)
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename={kind}-{datetime.now(timezone.utc):%Y%m%d}.{fmt}'
+    )
+    return response
+
+@main.route('/api/games')
+@login_required
+def api_games():
+    """/api/games?format=csv&platform=playstation2&updated_since=2024-01-01"""
+    return _export_response('games')
+
+@main.route('/api/consoles')
+@login_required
+def api_consoles():
+    """/api/consoles?format=ndjson&model=wii&updated_since=2024-01-01T00:00:00"""
+    return _export_response('consoles')
 
+@main.route('/api/import/<kind>', methods=['POST'])
+@login_required
+@permission_required('create') # Solo admin y editor
+def api_import(kind):
+    """
+    Importación masiva de un archivo CSV/NDJSON (campo 'file'): valida todas las filas
+    con las reglas de add_game/add_console y carga las válidas por lotes.
+    Parámetros: format=csv|ndjson, strict=1 (nada si hay errores), dry_run=1 (sólo validar)
+    """
+    if kind not in ('games', 'consoles'):
+        abort(404)
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': "Falta el archivo (campo 'file')"}), 400
+
+    strict = request.values.get('strict') in ('1', 'true', 'on')
+    dry_run = request.values.get('dry_run') in ('1', 'true', 'on')
+    conn = get_sqlserver_connection()
     try:
-        consoles = conn.execute(
-            '''
-            SELECT * FROM consoles
-            WHERE model_normalized = ?
-            ORDER BY id
-            OFFSET ? ROWS
-            FETCH NEXT ? ROWS ONLY
-            ''',
-            (normalized_model, offset, per_page)
-        ).fetchall()
-
-        total = conn.execute(
-            'SELECT COUNT(*) as count FROM consoles WHERE model_normalized = ?',
-            (normalized_model,)
-        ).fetchone()['count']
+        fmt = detect_format(upload.filename, request.values.get('format'))
+        records = read_records(text_stream(upload.stream), fmt)
+        report = import_records(conn, kind, records, chunk_size=IMPORT_CHUNK_SIZE,
+                                strict=strict, dry_run=dry_run)
+    except (ImportFormatError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': f"Archivo inválido: {e}"}), 400
+    except Exception as e:
+        logger.error(f"Error importing {kind}: {e}")
+        return jsonify({'error': f"Error al importar: {e}"}), 500
+    finally:
+        conn.close()
+
+    logger.info(f"Usuario {current_user.username} importó {report.imported} registros en {kind}")
+    return jsonify(report.to_dict()), 422 if report.aborted else 200
 
+def _listing_versions(*keys):
+    """
+    {(tipo, grupo): versión} de `keys` en collection_versions. Se leen antes que
+    los datos: una escritura en medio sólo puede hacer la ETag y la clave de la
+    caché más viejas.
+    """
+    conn = get_sqlserver_connection()
+    try:
+        return versions.current(conn, keys)
     finally:
         conn.close()
 
-    return render_template('index.html', games=[], consoles=consoles, query='', model=model,
-                           page=page, per_page=per_page, total=total)
+def _cached_listing(kind, group, version, render_listing):
+    """
+    Fragmento listing.html desde la caché (por grupo y su `version`, rol y
+    parámetros de la URL) o recién renderizado. El token CSRF se inserta por petición.
+    """
+    key = page_cache.key(kind, group, version, current_user.role, request.args.items(multi=True))
+    fragment = page_cache.get(key)
+    if fragment is None:
+        fragment = render_listing()
+        page_cache.set(key, fragment)
+    return Markup(fragment.replace(CSRF_PLACEHOLDER, generate_csrf()))
+
+def _listing_etag(current, facet_kind=None):
+    """
+    ETag de una página de listado a partir de las versiones `current` (ver
+    _listing_versions), el usuario y su rol (la página los muestra) y el token CSRF
+    de los formularios. None si la página no debe responderse con 304: hay mensajes
+    flash pendientes o el índice de facetas de `facet_kind` aún no refleja la
+    versión de la tabla, que en ese caso debe venir en `current` como (facet_kind, ALL).
+    """
+    if session.get('_flashes'):
+        return None
+    current = dict(current)
+    if facet_kind and not facets.is_current(facet_kind, current.pop((facet_kind, versions.ALL))):
+        return None
+
+    # El token firmado caduca (WTF_CSRF_TIME_LIMIT): pasada media vida la página se vuelve a generar
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    csrf_period = int(time.time() // (time_limit / 2)) if time_limit else 0
+    parts = [f'{kind}:{group}:{version}' for (kind, group), version in current.items()]
+    parts += [current_user.get_id(), current_user.role, session.get('csrf_token', ''), csrf_period,
+              current_app.extensions['listing_etag_salt']]
+    return hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()
+
+def _conditional(etag, render):
+    """304 si el navegador ya tiene la versión `etag`; si no, la respuesta de render() con la ETag"""
+    if etag is not None and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = current_app.make_response(render())
+        if etag is None:
+            return response
+    response.set_etag(etag, weak=True)
+    # Páginas con datos del usuario: sólo caché del navegador, siempre revalidada
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def _facet_filters(kind):
+    """Filtros por facetas de request.args; un filtro inválido responde 400"""
+    try:
+        return facets.parse_filters(kind, request.args)
+    except facets.InvalidFacetFilter as e:
+        abort(400, description=str(e))
 
-@app.route('/add', methods=['GET', 'POST'])
+@main.route('/games/<platform>')
+@login_required
+def games_by_platform(platform):
+    # Cualquier alias ("PS2", "PlayStation 2") lleva a la misma plataforma y a la misma caché
+    entry = lookups.find('games', platform)
+    platform_id, normalized_platform, platform = entry or (None, lookups.normalize(platform), platform)
+    filters = _facet_filters('games')
+    group_key = ('games', normalized_platform)
+    current = _listing_versions(group_key, ('games', versions.ALL))
+
+    def render_listing():
+        where, params = facets.where_clause('games', filters, facets.get_index('games'))
+        conn = get_sqlserver_connection()
+        try:
+            # El total de la plataforma viene en las mismas filas de la página
+            games_page = keyset_page(conn, 'games', GAME_SORT_KEYS,
+                                     where=' AND '.join(filter(None, ['platform_id = ?', where])),
+                                     params=(platform_id,) + params,
+                                     columns=counters.group_columns('games'),
+                                     **page_args(request.args))
+            total, inventory = counters.group_totals(conn, 'games', normalized_platform, games_page.items)
+        finally:
+            conn.close()
+
+        return render_template('listing.html', games=games_page.items, consoles=[], platform=platform,
+                               games_page=games_page, total=total, inventory=inventory,
+                               row_csrf_token=CSRF_PLACEHOLDER)
+
+    def render_page():
+        listing = _cached_listing('games', normalized_platform, current[group_key], render_listing)
+        # Los recuentos salen del índice en memoria en cada petición (no se cachean)
+        return render_template('index.html', listing=listing, query='', platform=platform,
+                               facets=facets.search('games', filters, normalized_platform))
+
+    return _conditional(_listing_etag(current, facet_kind='games'), render_page)
+
+@main.route('/consoles/<model>')
+@login_required
+def console_by_model(model):
+    entry = lookups.find('consoles', model)
+    model_id, normalized_model, model = entry or (None, lookups.normalize(model), model)
+    filters = _facet_filters('consoles')
+    group_key = ('consoles', normalized_model)
+    current = _listing_versions(group_key, ('consoles', versions.ALL))
+
+    def render_listing():
+        where, params = facets.where_clause('consoles', filters, facets.get_index('consoles'))
+        conn = get_sqlserver_connection()
+        try:
+            # El total del modelo viene en las mismas filas de la página
+            consoles_page = keyset_page(conn, 'consoles', CONSOLE_SORT_KEYS,
+                                        where=' AND '.join(filter(None, ['model_id = ?', where])),
+                                        params=(model_id,) + params,
+                                        columns=counters.group_columns('consoles'),
+                                        **page_args(request.args, prefix='console_'))
+            total, inventory = counters.group_totals(conn, 'consoles', normalized_model, consoles_page.items)
+        finally:
+            conn.close()
+
+        return render_template('listing.html', games=[], consoles=consoles_page.items, model=model,
+                               consoles_page=consoles_page, total=total, inventory=inventory,
+                               row_csrf_token=CSRF_PLACEHOLDER)
+
+    def render_page():
+        listing = _cached_listing('consoles', normalized_model, current[group_key], render_listing)
+        return render_template('index.html', listing=listing, query='', model=model,
+                               facets=facets.search('consoles', filters, normalized_model))
+
+    return _conditional(_listing_etag(current, facet_kind='consoles'), render_page)
+
+def _utc_now():
+    """Marca de tiempo para updated_at, mismo formato que CURRENT_TIMESTAMP de SQLite"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+@main.route('/add', methods=['GET', 'POST'])
 @login_required
 @permission_required('create') # solo admin y editor
 def add_game():
@@ -247,7 +616,7 @@ def add_game():
         # Validation
         if not all([title, release_date, manufacturer, genre, platform, score, condition, inventory]):
             flash('All fields are required.', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
 
         try:
             score = int(score)
@@ -258,20 +627,24 @@ def add_game():
                 raise ValueError("Inventory cannot be negative.")
         except ValueError as e:
             flash(str(e), 'error')
-            return redirect(url_for('index'))
-
-        platform_normalized = platform.replace(' ', '').lower()
+            return redirect(url_for('main.index'))
+
+        game = {
+            'title': title, 'release_date': release_date, 'manufacturer': manufacturer,
+            'description': description, 'genre': genre, 'platform': platform, 'score': score,
+            'complete_in_box': complete_in_box, 'condition': condition,
+            'inventory': inventory, 'sealed': sealed, 'updated_at': _utc_now(),
+        }
         conn = get_sqlserver_connection()
         try:
-            conn.execute('''
-                INSERT INTO games (
-                    title, release_date, manufacturer, description, genre,
-                    platform, platform_normalized, score, complete_in_box,
-                    condition, inventory, sealed
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (title, release_date, manufacturer, description, genre, platform, platform_normalized,
-                  score, complete_in_box, condition, inventory, sealed))
+            game['platform_id'], game['platform_normalized'] = lookups.resolve(conn, 'games', platform)
+            game['id'] = conn.execute(
+                insert_returning(conn.dialect, 'games', list(game)),
+                tuple(game.values())
+            ).fetchone()['id']
+            counters.record_change(conn, 'games', new=game)
             conn.commit()
+            events.game_saved.send(current_app._get_current_object(), game=game, previous=None)
             flash('Juego añadido exitosamente!', 'success')
             logger.info(f"Usuario {current_user.username} agrego juego: {title}")
         except Exception as e:
@@ -281,11 +654,11 @@ def add_game():
         finally:
             conn.close()
 
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
-    return redirect(url_for('index'))  # Redirect to index where modal forms reside
+    return redirect(url_for('main.index'))  # Redirect to index where modal forms reside
 
-@app.route('/add_console', methods=['GET', 'POST'])
+@main.route('/add_console', methods=['GET', 'POST'])
 @login_required
 @permission_required('create') # Solo admin y editor
 def add_console():
@@ -304,7 +677,7 @@ def add_console():
         # Validation
         if not all([name, model, release_date, manufacturer, serial_number_box, serial_number_console, condition, inventory]):
             flash('All fields are required.', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
 
         try:
             inventory = int(inventory)
@@ -312,43 +685,57 @@ def add_console():
                 raise ValueError("Inventory cannot be negative.")
         except ValueError as e:
             flash(str(e), 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
 
-        model_normalized = model.replace(' ', '').lower()
         conn = get_sqlserver_connection()
         try:
-            existing = conn.execute(
-                'SELECT id FROM consoles WHERE serial_number_console = ?',
-                (serial_number_console,)
-            ).fetchone()
-
-            if existing:
-                flash(f'Error: Ya existe una consola con el número de serie "{serial_number_console}".', 'error')
-                return redirect(url_for('index'))
-
-            conn.execute('''
-                INSERT INTO consoles (
-                    name, release_date, manufacturer, serial_number_box,
-                    serial_number_console, complete_in_box, condition,
-                    inventory, sealed, model, model_normalized
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (name, release_date, manufacturer, serial_number_box, serial_number_console,
-                  complete_in_box, condition, inventory, sealed, model, model_normalized))
+            model_id, model_normalized = lookups.resolve(conn, 'consoles', model)
+            console = {
+                'name': name, 'release_date': release_date, 'manufacturer': manufacturer,
+                'serial_number_box': serial_number_box, 'serial_number_console': serial_number_console,
+                'complete_in_box': complete_in_box, 'condition': condition,
+                'inventory': inventory, 'sealed': sealed, 'model': model, 'model_id': model_id,
+                'model_normalized': model_normalized, 'updated_at': _utc_now(),
+            }
+            console['id'] = conn.execute(
+                insert_returning(conn.dialect, 'consoles', list(console)),
+                tuple(console.values())
+            ).fetchone()['id']
+            counters.record_change(conn, 'consoles', new=console)
             conn.commit()
+            events.console_saved.send(current_app._get_current_object(), console=console, previous=None)
             flash('Consola añadida exitosamente!', 'success')
             logger.info(f"Usuario {current_user.username} agrego consola: {name} - {model}")
         except Exception as e:
+            conn.rollback()
+            # El índice único hace la comprobación del serial en el propio INSERT
+            if is_unique_violation(e, 'serial_number_console'):
+                flash(f'Error: Ya existe una consola con el número de serie "{serial_number_console}".', 'error')
+                return redirect(url_for('main.index'))
             logger.error(f"Error adding console: {e}")
             flash(f'Error al añadir consola: {e}', 'error')
         
         finally:
             conn.close()
 
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
+
+    return redirect(url_for('main.index'))  # Redirect to index where modal forms reside
 
-    return redirect(url_for('index'))  # Redirect to index where modal forms reside
+def _resolve_for_row(conn, kind, text, row_id):
+    """
+    (id, slug) de la plataforma/modelo `text` para editar la fila `row_id` de
+    `kind`; None si la fila no existe. Una entrada ya conocida sale de la caché
+    de lookups; una nueva sólo se crea después de comprobar que la fila existe.
+    """
+    entry = lookups.find(kind, text, conn)
+    if entry is not None:
+        return entry[0], entry[1]
+    if conn.execute(f'SELECT 1 FROM {kind} WHERE id = ?', (row_id,)).fetchone() is None:
+        return None
+    return lookups.resolve(conn, kind, text)
 
-@app.route('/edit/<int:game_id>', methods=['GET', 'POST'])
+@main.route('/edit/<int:game_id>', methods=['GET', 'POST'])
 @login_required
 @permission_required('edit')
 def edit_game(game_id):
@@ -370,7 +757,7 @@ def edit_game(game_id):
         if not all ([title, release_date, manufacturer, description, genre, platform, score, complete_in_box, condition, inventory, ]):
             flash('Every field is required', 'error')
             conn.close()
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         
         try:
             score = int(score)
@@ -382,21 +769,42 @@ def edit_game(game_id):
         except ValueError as e:
             flash(str(e), 'error')
             conn.close()
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         
-        platform_normalized = platform.replace(' ', '').lower()
-
         try:
-            conn.execute('''
-                UPDATE games SET
-                    title = ?, release_date = ?, manufacturer = ?, description = ?,
-                    genre = ?, platform = ?, platform_normalized = ?, score = ?,
-                    complete_in_box = ?, condition = ?, inventory = ?, sealed = ?
-                WHERE id = ?
-            ''', (title, release_date, manufacturer, description, genre, platform,
-                  platform_normalized, score, complete_in_box, condition, inventory,
-                  sealed, game_id))
+            resolved = _resolve_for_row(conn, 'games', platform, game_id)
+            if resolved is None:
+                flash('Juego no encontrado', 'error')
+                return redirect(url_for('main.index'))
+            platform_id, platform_normalized = resolved
+            # Plataforma anterior: si cambia hay que invalidar también sus páginas
+            previous = update_returning_previous(
+                conn, 'games',
+                ['title', 'release_date', 'manufacturer', 'description', 'genre', 'platform',
+                 'platform_id', 'platform_normalized', 'score', 'complete_in_box', 'condition',
+                 'inventory', 'sealed', 'updated_at'],
+                'id = ?',
+                (title, release_date, manufacturer, description, genre, platform,
+                 platform_id, platform_normalized, score, complete_in_box, condition,
+                 inventory, sealed, _utc_now(), game_id),
+                previous=('platform_normalized', 'inventory'),
+            )
+            if previous is None:
+                # Ninguna fila con ese id: sin cambios ni evento (los índices no deben ver un juego falso)
+                conn.rollback()
+                flash('Juego no encontrado', 'error')
+                return redirect(url_for('main.index'))
+            game = {
+                'id': game_id, 'title': title, 'release_date': release_date,
+                'manufacturer': manufacturer, 'description': description, 'genre': genre,
+                'platform': platform, 'platform_id': platform_id,
+                'platform_normalized': platform_normalized, 'score': score,
+                'complete_in_box': complete_in_box, 'condition': condition,
+                'inventory': inventory, 'sealed': sealed,
+            }
+            counters.record_change(conn, 'games', old=previous, new=game)
             conn.commit()
+            events.game_saved.send(current_app._get_current_object(), game=game, previous=previous)
             flash('✅ ¡Juego actualizado exitosamente!', 'success')
             logger.info(f"Usuario {current_user.username} edito juego ID: {game_id}")
         except Exception as e:
@@ -405,20 +813,20 @@ def edit_game(game_id):
         finally:
             conn.close()
 
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     try: 
-        game = conn.execute('SELECT * FROM games WHERE id = ?', (game_id)).fetchone()
+        game = conn.execute('SELECT * FROM games WHERE id = ?', (game_id,)).fetchone()
     finally:
         conn.close()
 
     if not game:
         flash('Juego no encontrado', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     return render_template('edit_game.html', game=game)
 
-@app.route('/edit_console/<int:console_id>', methods=['GET', 'POST'])
+@main.route('/edit_console/<int:console_id>', methods=['GET', 'POST'])
 @login_required
 @permission_required('edit')
 def edit_console(console_id):
@@ -440,7 +848,7 @@ def edit_console(console_id):
         if not all([name, model, release_date, manufacturer, serial_number_box, serial_number_console, condition, inventory]):
             flash('Todos los campos son requeridos.', 'error')
             conn.close()
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
 
         try:
             inventory = int(inventory)
@@ -449,41 +857,55 @@ def edit_console(console_id):
         except ValueError as e:
             flash(str(e), 'error')
             conn.close()
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
 
-        model_normalized = model.replace(' ', '').lower()
-        
         try:
-            # Verificar que el serial no esté en uso por otra consola
-            existing = conn.execute(
-                'SELECT id FROM consoles WHERE serial_number_console = ? AND id != ?',
-                (serial_number_console, console_id)
-            ).fetchone()
-
-            if existing:
-                flash(f'❌ Error: Ya existe otra consola con el número de serie "{serial_number_console}".', 'error')
-                conn.close()
-                return redirect(url_for('index'))
-
-            conn.execute('''
-                UPDATE consoles SET
-                    name = ?, model = ?, model_normalized = ?, release_date = ?,
-                    manufacturer = ?, serial_number_box = ?, serial_number_console = ?,
-                    complete_in_box = ?, condition = ?, inventory = ?, sealed = ?
-                WHERE id = ?
-            ''', (name, model, model_normalized, release_date, manufacturer,
-                  serial_number_box, serial_number_console, complete_in_box,
-                  condition, inventory, sealed, console_id))
+            resolved = _resolve_for_row(conn, 'consoles', model, console_id)
+            if resolved is None:
+                flash('❌ Consola no encontrada.', 'error')
+                return redirect(url_for('main.index'))
+            model_id, model_normalized = resolved
+            # Modelo anterior: si cambia hay que invalidar también sus páginas
+            previous = update_returning_previous(
+                conn, 'consoles',
+                ['name', 'model', 'model_id', 'model_normalized', 'release_date', 'manufacturer',
+                 'serial_number_box', 'serial_number_console', 'complete_in_box',
+                 'condition', 'inventory', 'sealed', 'updated_at'],
+                'id = ?',
+                (name, model, model_id, model_normalized, release_date, manufacturer,
+                 serial_number_box, serial_number_console, complete_in_box,
+                 condition, inventory, sealed, _utc_now(), console_id),
+                previous=('model_normalized', 'inventory'),
+            )
+            if previous is None:
+                conn.rollback()
+                flash('❌ Consola no encontrada.', 'error')
+                return redirect(url_for('main.index'))
+            console = {
+                'id': console_id, 'name': name, 'model': model, 'model_id': model_id,
+                'model_normalized': model_normalized,
+                'release_date': release_date, 'manufacturer': manufacturer,
+                'serial_number_box': serial_number_box, 'serial_number_console': serial_number_console,
+                'complete_in_box': complete_in_box, 'condition': condition,
+                'inventory': inventory, 'sealed': sealed,
+            }
+            counters.record_change(conn, 'consoles', old=previous, new=console)
             conn.commit()
+            events.console_saved.send(current_app._get_current_object(), console=console, previous=previous)
             flash('✅ ¡Consola actualizada exitosamente!', 'success')
             logger.info(f"Usuario {current_user.username} editó consola ID: {console_id}")
         except Exception as e:
+            conn.rollback()
+            # El índice único hace la comprobación del serial en el propio UPDATE
+            if is_unique_violation(e, 'serial_number_console'):
+                flash(f'❌ Error: Ya existe otra consola con el número de serie "{serial_number_console}".', 'error')
+                return redirect(url_for('main.index'))
             logger.error(f"Error updating console: {e}")
             flash(f'❌ Error al actualizar consola: {e}', 'error')
         finally:
             conn.close()
         
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     # GET: Obtener datos de la consola
     try:
@@ -493,23 +915,26 @@ def edit_console(console_id):
     
     if not console:
         flash('❌ Consola no encontrada.', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     return render_template('edit_console.html', console=console)
 
 
-@app.route('/delete/<int:game_id>', methods=['POST'])
+@main.route('/delete/<int:game_id>', methods=['POST'])
 @login_required
 @permission_required('delete') # Solo admin puede eliminar
 def delete_game(game_id):
     conn = get_sqlserver_connection()
     try:
-
-        # Obtener info del juego antes de eliminar
-        game = conn.execute('SELECT title FROM games WHERE id = ?', (game_id,)).fetchone()
-
-        conn.execute('DELETE FROM games WHERE id = ?', (game_id,))
+        # Info del juego eliminado en la misma sentencia (OUTPUT deleted.* / RETURNING)
+        game = conn.execute(
+            delete_returning(conn.dialect, 'games', 'id = ?', ('title', 'platform_normalized', 'inventory')),
+            (game_id,)
+        ).fetchone()
+        if game:
+            counters.record_change(conn, 'games', old=game)
         conn.commit()
+        events.game_deleted.send(current_app._get_current_object(), game_id=game_id, game=game)
         flash('Juego eliminado exitosamente!', 'success')
 
         if game:
@@ -520,20 +945,23 @@ def delete_game(game_id):
         flash(f'Error al eliminar juego: {e}', 'error')
     finally:
         conn.close()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/delete_console/<int:console_id>', methods=['POST'])
+@main.route('/delete_console/<int:console_id>', methods=['POST'])
 @login_required
 @permission_required('delete') # Solo admin puede eliminar
 def delete_console(console_id):
     conn = get_sqlserver_connection()
     try:
-
-        # Obtener info de la consola antes de eliminar 
-        console = conn.execute('SELECT name, model FROM consoles WHERE id = ?', (console_id,)).fetchone()
-
-        conn.execute('DELETE FROM consoles WHERE id = ?', (console_id,))
+        # Info de la consola eliminada en la misma sentencia (OUTPUT deleted.* / RETURNING)
+        console = conn.execute(
+            delete_returning(conn.dialect, 'consoles', 'id = ?', ('name', 'model', 'model_normalized', 'inventory')),
+            (console_id,)
+        ).fetchone()
+        if console:
+            counters.record_change(conn, 'consoles', old=console)
         conn.commit()
+        events.console_deleted.send(current_app._get_current_object(), console_id=console_id, console=console)
         flash('Consola eliminada exitosamente!', 'success')
 
         if console:
@@ -544,22 +972,165 @@ def delete_console(console_id):
         flash(f'Error al eliminar consola: {e}', 'error')
     finally:
         conn.close()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
+
+_BATCH_LABELS = {'games': 'juegos', 'consoles': 'consolas'}
+
+@main.route('/batch/<kind>/delete', methods=['POST'])
+@login_required
+@permission_required('delete') # Solo admin puede eliminar; se comprueba una vez por lote
+def batch_delete(kind):
+    """Elimina las filas seleccionadas (campo 'ids') en una sola transacción"""
+    if kind not in batch.KINDS:
+        abort(404)
+    conn = get_sqlserver_connection()
+    try:
+        ids = batch.parse_ids(request.form.getlist('ids'))
+        deleted = batch.delete_rows(conn, kind, ids)
+        flash(f'{deleted} {_BATCH_LABELS[kind]} eliminados exitosamente!', 'success')
+        logger.info(f"Usuario {current_user.username} elimino {deleted} {kind} por lote")
+    except batch.BatchError as e:
+        flash(f'Error: {e}', 'error')
+    except Exception as e:
+        logger.error(f"Error deleting {kind} batch: {e}")
+        flash(f'Error al eliminar {_BATCH_LABELS[kind]}: {e}', 'error')
+    finally:
+        conn.close()
+    return redirect(url_for('main.index'))
+
+@main.route('/batch/<kind>/update', methods=['POST'])
+@login_required
+@permission_required('edit') # Se comprueba una vez por lote
+def batch_update(kind):
+    """
+    Aplica a las filas seleccionadas (campo 'ids') los campos no vacíos del formulario:
+    inventory, condition, sealed y platform (juegos) o model (consolas).
+    """
+    if kind not in batch.KINDS:
+        abort(404)
+    conn = get_sqlserver_connection()
+    try:
+        ids = batch.parse_ids(request.form.getlist('ids'))
+        changes = batch.parse_changes(kind, request.form)
+        updated = batch.update_rows(conn, kind, ids, changes)
+        flash(f'✅ {updated} {_BATCH_LABELS[kind]} actualizados exitosamente!', 'success')
+        logger.info(f"Usuario {current_user.username} actualizo {updated} {kind} por lote: {', '.join(changes)}")
+    except batch.BatchError as e:
+        flash(f'Error: {e}', 'error')
+    except Exception as e:
+        logger.error(f"Error updating {kind} batch: {e}")
+        flash(f'Error al actualizar {_BATCH_LABELS[kind]}: {e}', 'error')
+    finally:
+        conn.close()
+    return redirect(url_for('main.index'))
+
+@main.route('/metrics')
+@limiter.exempt  # Lo consulta un scraper cada pocos segundos
+@metrics_access_required
+def metrics():
+    """
+    Estadísticas de SQL, pool, cachés y login en formato de texto de Prometheus.
+    Sin sesión: token o dirección permitida (ver auth.metrics_access_required)
+    """
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
 
 # Manejador de errores 403 (Forbidden)
-@app.errorhandler(403)
+@main.app_errorhandler(403)
 def not_found(e):
     return render_template('403.html'), 403
 
 # Manejador de errores 404 (Not Found)
-@app.errorhandler(404)
+@main.app_errorhandler(404)
 def not_found(e):
     return render_template('404.html'), 404
 
 #Manejador de errores 429 (Too Many Requests)
-@app.errorhandler(429)
+@main.app_errorhandler(429)
 def ratelimit_handler(e):
     return render_template('429.html', retry_after=e.description), 429
 
+def create_app(config=None):
+    """
+    Crea y configura la aplicación. `config` sobrescribe valores de app.config
+    (p. ej. WTF_CSRF_ENABLED o RATELIMIT_ENABLED en pruebas y benchmarks).
+    No abre conexiones: el pool y el driver se cargan con la primera petición.
+    """
+    app = Flask(__name__)
+    app.secret_key = os.getenv('SECRET_KEY', 'default_secretpass')  # Fallback for development
+    app.config['SECRET_KEY'] = app.secret_key
+    # sqlite:///db/ratelimit.db comparte los contadores entre workers (ver rate_limit_storage.py)
+    app.config['RATELIMIT_STORAGE_URI'] = os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
+    app.config['RATELIMIT_STRATEGY'] = 'sliding-window-counter'
+    app.config['JINJA_CACHE_DIR'] = os.getenv('JINJA_CACHE_DIR')
+    if config:
+        app.config.update(config)
+
+    csrf.init_app(app)
+    limiter.init_app(app)
+    login_manager.init_app(app)
+    app.register_blueprint(main)
+    assets.init_app(app)
+    # Los estáticos no cuentan para el rate limiting (como /static/)
+    limiter.exempt(assets.blueprint)
+    _configure_jinja(app)
+    # Parte de las ETag de los listados: un despliegue con otras plantillas o estáticos las invalida
+    app.extensions['listing_etag_salt'] = _deploy_token(app)
+    return app
+
+def _configure_jinja(app):
+    """
+    Caché de bytecode de Jinja en disco (JINJA_CACHE_DIR; por defecto un directorio
+    temporal del usuario, 'none' la desactiva): un worker nuevo carga las plantillas
+    ya compiladas en lugar de volver a compilarlas.
+    """
+    cache_dir = app.config.get('JINJA_CACHE_DIR')
+    if cache_dir == 'none':
+        return
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir or None)
+
+def _deploy_token(app):
+    """Hash del código fuente de las plantillas y del manifiesto de estáticos"""
+    digest = hashlib.sha1()
+    for name in sorted(app.jinja_env.list_templates()):
+        source, _, _ = app.jinja_env.loader.get_source(app.jinja_env, name)
+        digest.update(name.encode() + b'\0' + source.encode())
+    digest.update(repr(sorted(app.extensions['assets'].items())).encode())
+    return digest.hexdigest()[:12]
+
+def check_schema():
+    """
+    Falla al arrancar (migrations.SchemaOutdated) si la base no está migrada. Usa
+    una conexión del pool y lo cierra después: con preload_app se llama en el
+    maestro y los workers no deben heredar conexiones abiertas.
+    """
+    conn = get_sqlserver_connection()
+    try:
+        migrations.check_current(conn)
+    finally:
+        conn.close()
+        connection.close_pool()
+
+def precompile_templates(app):
+    """Compila todas las plantillas (quedan en la caché de Jinja); retorna cuántas"""
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+def warm_up(app):
+    """
+    Compila las plantillas y sirve un GET /login (sin base de datos ni rate limiting):
+    deja hechas las inicializaciones perezosas de Flask y Werkzeug. Con preload_app
+    se llama en el maestro y los workers ya nacen con la primera petición resuelta.
+    """
+    precompile_templates(app)
+    enabled, limiter.enabled = limiter.enabled, False
+    try:
+        app.test_client().get('/login')
+    finally:
+        limiter.enabled = enabled
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
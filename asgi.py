@@ -0,0 +1,218 @@
+"""
+Entrada ASGI de la app Flask:
+
+    uvicorn asgi:application --workers 2
+
+Cada petición se ejecuta en un pool de hilos acotado (ASGI_THREADS), así que un
+worker mantiene muchas peticiones en curso mientras esperan a Azure SQL: el
+event loop sigue aceptando conexiones aunque la base responda lento. Por encima
+de ASGI_MAX_PENDING peticiones (en curso + en cola) se responde 503 en lugar de
+encolar sin límite. Las rutas y plantillas son las mismas que con WSGI.
+
+asgiref.wsgi.WsgiToAsgi no sirve aquí: ejecuta todas las peticiones en un único
+hilo compartido.
+"""
+import os
+import sys
+import asyncio
+import logging
+import threading
+from tempfile import SpooledTemporaryFile
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Cuerpos de petición mayores se pasan a disco (importaciones CSV)
+_BODY_MEMORY_LIMIT = 1024 * 1024
+
+
+class AsgiAdapter:
+    """
+    Sirve una aplicación WSGI como ASGI con un pool de hilos propio.
+
+    Args:
+        wsgi_app: Aplicación WSGI (app de Flask)
+        threads: Peticiones ejecutándose a la vez; conviene que no supere
+            DB_POOL_MAX_SIZE, o los hilos sobrantes esperan conexión
+        max_pending: Peticiones admitidas a la vez (en curso + en cola)
+        on_shutdown: Callable opcional para el evento lifespan.shutdown
+    """
+
+    def __init__(self, wsgi_app, threads=32, max_pending=256, on_shutdown=None):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.max_pending = max(max_pending, threads)
+        self.on_shutdown = on_shutdown
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {'requests': 0, 'rejections': 0, 'max_pending': 0}
+
+    @classmethod
+    def from_env(cls, wsgi_app, **kwargs):
+        threads = int(os.getenv('ASGI_THREADS', os.getenv('DB_POOL_MAX_SIZE', 32)))
+        return cls(wsgi_app, threads=threads,
+                   max_pending=int(os.getenv('ASGI_MAX_PENDING', threads * 8)), **kwargs)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='asgi')
+        return self._executor
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=self._pending, threads=self.threads)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Tipo de conexión ASGI no soportado: {scope['type']}")
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats['rejections'] += 1
+                busy = True
+            else:
+                busy = False
+                self._pending += 1
+                self._stats['requests'] += 1
+                self._stats['max_pending'] = max(self._stats['max_pending'], self._pending)
+        if busy:
+            await self._send_busy(send)
+            return
+
+        body = SpooledTemporaryFile(max_size=_BODY_MEMORY_LIMIT)
+        submitted = False
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+            loop = asyncio.get_running_loop()
+            future = self._get_executor().submit(self._run_wsgi, loop, build_environ(scope, body), send)
+            # Si la corrutina se cancela (el cliente se va) el hilo sigue con la petición:
+            # la plaza y el cuerpo se liberan cuando termina el hilo, no la corrutina
+            future.add_done_callback(lambda _: self._finish(body))
+            submitted = True
+            await asyncio.wrap_future(future)
+        finally:
+            if not submitted:
+                self._finish(body)
+
+    def _finish(self, body):
+        """Libera la plaza de una petición (y su cuerpo) cuando ya no la ocupa ningún hilo"""
+        body.close()
+        with self._lock:
+            self._pending -= 1
+
+    def _run_wsgi(self, loop, environ, send):
+        """En un hilo del pool: ejecuta la app y envía cabeceras y cuerpo por el event loop"""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+            }
+
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        iterable = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in iterable:
+                if not chunk:
+                    continue
+                if not response.get('sent'):
+                    emit(response['start'])
+                    response['sent'] = True
+                emit({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not response.get('sent'):
+                emit(response['start'])
+            emit({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            # Respuestas en streaming (exportaciones) liberan aquí su conexión
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+    async def _send_busy(self, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8'), (b'retry-after', b'1')],
+        })
+        await send({'type': 'http.response.body', 'body': 'Servidor ocupado, inténtalo de nuevo'.encode('utf-8')})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._executor is not None:
+                    await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+                if self.on_shutdown:
+                    self.on_shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def build_environ(scope, body):
+    """Entorno WSGI (PEP 3333) a partir del scope HTTP de ASGI"""
+    script_name = scope.get('root_path', '')
+    path = scope['path']
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name.encode('utf-8').decode('latin1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin1')
+        if key in environ:
+            value = f"{environ[key]}{'; ' if key == 'HTTP_COOKIE' else ','}{value}"
+        environ[key] = value
+    return environ
+
+
+def create_application():
+    from app import create_app, check_schema
+    import connection
+    check_schema()
+    return AsgiAdapter.from_env(create_app(), on_shutdown=connection.close_pool)
+
+
+application = create_application()
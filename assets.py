@@ -0,0 +1,128 @@
+"""
+Archivos estáticos con huella de contenido y copias gzip precomprimidas.
+
+    python tools/build_assets.py
+
+copia cada archivo de static/ a static/dist/ con el hash de su contenido en el
+nombre (css/style.3f2a9c1b0d4e.css), deja al lado un .gz comprimido al máximo
+y escribe static/dist/manifest.json. Las plantillas usan asset_url() igual que
+url_for: si el archivo está en el manifiesto se enlaza la versión con huella,
+servida desde /assets/ con Cache-Control de un año e immutable (si el contenido
+cambia, cambia la URL); si no hay manifiesto (desarrollo) se usa /static/.
+"""
+import os
+import json
+import gzip
+import shutil
+import hashlib
+import logging
+import mimetypes
+from flask import Blueprint, current_app, request, send_from_directory, url_for, abort
+from werkzeug.security import safe_join
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+HASH_LENGTH = 12
+MAX_AGE = 365 * 24 * 3600
+# Formatos de texto: los binarios (png, woff2...) ya vienen comprimidos
+COMPRESSIBLE = {'.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml'}
+
+blueprint = Blueprint('assets', __name__)
+
+
+def build(static_folder, clean=True):
+    """
+    Genera static/dist y su manifiesto a partir de los archivos de `static_folder`.
+    Retorna [(archivo, archivo con huella, bytes, bytes gzip o None)].
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    if clean and os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifest = {}
+    built = []
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.') and os.path.join(root, d) != dist)
+        for name in sorted(files):
+            if name.startswith('.'):
+                continue
+            source = os.path.join(root, name)
+            filename = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+
+            stem, extension = os.path.splitext(filename)
+            hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{extension}'
+            target = os.path.join(dist, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+
+            compressed_size = None
+            if extension.lower() in COMPRESSIBLE:
+                # mtime=0: el mismo contenido produce siempre el mismo .gz
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(compressed) < len(data):
+                    with open(target + '.gz', 'wb') as f:
+                        f.write(compressed)
+                    compressed_size = len(compressed)
+
+            manifest[filename] = hashed
+            built.append((filename, hashed, len(data), compressed_size))
+
+    os.makedirs(dist, exist_ok=True)
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return built
+
+
+def load_manifest(static_folder):
+    """{archivo: archivo con huella}; vacío si todavía no se ha ejecutado build()"""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def init_app(app):
+    """Carga el manifiesto, registra /assets/ y la función asset_url() de las plantillas"""
+    manifest = load_manifest(app.static_folder)
+    if not manifest:
+        logger.info("Sin static/dist/manifest.json: los estáticos se sirven desde /static/ sin huella")
+    app.extensions['assets'] = manifest
+    app.register_blueprint(blueprint)
+    app.add_template_global(asset_url)
+
+
+def asset_url(endpoint, **values):
+    """Como url_for; con 'static' enlaza la versión con huella si está en el manifiesto"""
+    if endpoint == 'static':
+        hashed = current_app.extensions.get('assets', {}).get(values.get('filename'))
+        if hashed:
+            return url_for('assets.serve', **dict(values, filename=hashed))
+    return url_for(endpoint, **values)
+
+
+@blueprint.route('/assets/<path:filename>')
+def serve(filename):
+    """Archivo con huella: cacheable un año; el .gz si el cliente acepta gzip"""
+    if filename == MANIFEST or filename.endswith('.gz'):
+        abort(404)
+    dist = os.path.join(current_app.static_folder, DIST_DIR)
+    compressed = safe_join(dist, filename + '.gz')
+    use_gzip = request.accept_encodings['gzip'] > 0 and compressed is not None and os.path.isfile(compressed)
+
+    response = send_from_directory(
+        dist, filename + '.gz' if use_gzip else filename,
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        max_age=MAX_AGE,
+    )
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -1,6 +1,9 @@
+import os
+import hmac
+import ipaddress
 from flask_login import UserMixin
-from functools import wraps
-from flask import flash, redirect, url_for, abort
+from functools import wraps, lru_cache
+from flask import flash, redirect, url_for, abort, request
 from flask_login import current_user
 
 class Role:
@@ -56,7 +59,7 @@ def permission_required(permission):
         def decorated_function(*args, **kwargs):
             if not current_user.is_authenticated:
                 flash('Debes iniciar sesión', 'error')
-                return redirect(url_for('login'))
+                return redirect(url_for('main.login'))
 
             if not current_user.has_permission(permission):
                 flash('No tienes permisos para realizar esta acción', 'error')
@@ -73,7 +76,7 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated:
             flash('Debes iniciar sesión', 'error')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
 
         if not current_user.is_admin():
             flash('Solo administradores pueden acceder a esta página', 'error')
@@ -89,7 +92,7 @@ def editor_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_authenticated:
             flash('Debes iniciar sesión', 'error')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
 
         if not current_user.is_editor():
             flash('No tienes permisos para realizar esta acción', 'error')
@@ -97,3 +100,38 @@ def editor_required(f):
 
         return f(*args, **kwargs)
     return decorated_function
+
+@lru_cache(maxsize=8)
+def _networks(allowed):
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in allowed.split(',') if item.strip())
+
+def _metrics_token_valid():
+    token = os.getenv('METRICS_TOKEN')
+    scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(value.strip().encode(), token.encode())
+
+def _metrics_address_allowed():
+    allowed = os.getenv('METRICS_ALLOW_IPS', '')
+    # Tras un proxy inverso remote_addr es el del proxy (127.0.0.1): ahí sólo vale el token
+    if not allowed or 'X-Forwarded-For' in request.headers or 'Forwarded' in request.headers:
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in network for network in _networks(allowed))
+
+def metrics_access_required(f):
+    """
+    Decorador para /metrics, que lee un scraper sin sesión: pasa con
+    Authorization: Bearer <METRICS_TOKEN> o desde una dirección de
+    METRICS_ALLOW_IPS (separadas por comas, admite redes; vacía por defecto)
+    si la petición no llega por un proxy (X-Forwarded-For / Forwarded)
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not (_metrics_token_valid() or _metrics_address_allowed()):
+            abort(403)
+        return f(*args, **kwargs)
+    return decorated_function
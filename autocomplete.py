@@ -0,0 +1,280 @@
+"""
+Autocompletado de títulos, plataformas, géneros y fabricantes mientras se escribe.
+
+Cada valor distinto (p. ej. el género "Action RPG") es una sugerencia con el
+número de juegos, el inventario total y la puntuación media de los juegos que
+lo tienen. Se busca por prefijo de cualquiera de sus palabras: en una lista
+ordenada de sufijos por palabra ("action rpg", "rpg") el prefijo escrito es un
+rango contiguo que se localiza con bisect. Los rangos largos (prefijos de pocas
+letras) tienen su top-N calculado al construir el índice; un cambio descarta
+sólo los de los prefijos de la sugerencia afectada.
+
+El índice se construye en segundo plano (al arrancar cada worker o con la
+primera petición), las rutas de escritura lo mantienen por eventos y se
+reconstruye cuando la base tiene una versión de tabla más nueva, p. ej. por
+escrituras de otro worker (ver background_index.py).
+"""
+import time
+import heapq
+import logging
+import threading
+from bisect import bisect_left, insort
+from functools import lru_cache
+from background_index import BackgroundIndex
+from search import tokenize
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('title', 'platform', 'genre', 'manufacturer')
+INDEXED_COLUMNS = ', '.join(('id',) + FIELDS + ('inventory', 'score'))
+
+# Orden de las sugerencias: inventario total o puntuación media
+RANKS = ('inventory', 'score')
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Prefijos con más entradas que esto guardan su top-N en lugar de recorrerse en cada tecla
+HOT_RANGE = 200
+
+_END = chr(0x10FFFF)
+
+
+class Suggestion:
+    __slots__ = ('field', 'text', 'normalized', 'items', 'inventory', 'score_total', 'scored')
+
+    def __init__(self, field, text, normalized):
+        self.field = field
+        self.text = text
+        self.normalized = normalized
+        self.items = 0
+        self.inventory = 0
+        self.score_total = 0
+        self.scored = 0
+
+    @property
+    def score(self):
+        return round(self.score_total / self.scored, 1) if self.scored else None
+
+    def suffixes(self):
+        """El valor normalizado desde cada palabra: "legend of zelda", "of zelda", "zelda" """
+        words = self.normalized.split(' ')
+        return [' '.join(words[i:]) for i in range(len(words))]
+
+    def to_dict(self):
+        return {'text': self.text, 'field': self.field, 'items': self.items,
+                'inventory': self.inventory, 'score': self.score}
+
+
+def _by_inventory(s):
+    # Sin puntuación va detrás de cualquier puntuación (0..10)
+    return -s.inventory, -s.score_total / s.scored if s.scored else 1, s.normalized
+
+
+def _by_score(s):
+    return -s.score_total / s.scored if s.scored else 1, -s.inventory, s.normalized
+
+
+_RANK_KEYS = {'inventory': _by_inventory, 'score': _by_score}
+
+
+@lru_cache(maxsize=4096)
+def _normalize(text):
+    # Plataformas, géneros y fabricantes se repiten en casi todas las filas
+    return ' '.join(tokenize(text))
+
+
+def normalize_query(query):
+    """Mismas reglas que los valores indexados; un espacio final pide la palabra siguiente"""
+    prefix = ' '.join(tokenize(query))
+    if prefix and query[-1:].isspace():
+        prefix += ' '
+    return prefix
+
+
+class SuggestionIndex:
+    """
+    Sufijos ordenados [(sufijo, sid)] en una lista por primera letra (un alta sólo
+    desplaza su lista) más los agregados de cada sugerencia. Los prefijos con más
+    de HOT_RANGE entradas guardan su top-N, calculado a partir del de sus hijos.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = {}            # primera letra -> [(sufijo, sid)] ordenada
+        self._ids = {}             # (campo, normalizado) -> sid
+        self._suggestions = {}     # sid -> Suggestion
+        self._docs = {}            # game_id -> (inventario, puntuación, sids)
+        self._top = {}             # (prefijo, rank) -> [Suggestion] de los prefijos largos
+        self._next_id = 0
+        # Versión de tabla (versions.ALL) que refleja el índice
+        self.version = None
+
+    def __len__(self):
+        return len(self._suggestions)
+
+    def add(self, game):
+        """Indexa (o reindexa) un juego; `game` es un dict/fila con id, FIELDS, inventory y score"""
+        with self._lock:
+            previous = self._docs.get(game['id'])
+            # Primero se suma lo nuevo: un valor que no cambia no se borra y se vuelve a insertar
+            self._add(game, bulk=False)
+            if previous is not None:
+                self._release(previous)
+
+    update = add
+
+    def remove(self, game_id):
+        with self._lock:
+            doc = self._docs.pop(game_id, None)
+            if doc is not None:
+                self._release(doc)
+
+    def _add(self, game, bulk):
+        inventory = int(game['inventory'] or 0)
+        score = game['score']
+        sids = []
+        for field in FIELDS:
+            text = game[field]
+            normalized = _normalize(text)
+            if not normalized:
+                continue
+            sid = self._ids.get((field, normalized))
+            if sid is None:
+                sid = self._next_id
+                self._next_id += 1
+                self._ids[(field, normalized)] = sid
+                suggestion = self._suggestions[sid] = Suggestion(field, str(text).strip(), normalized)
+                for suffix in suggestion.suffixes():
+                    keys = self._keys.setdefault(suffix[0], [])
+                    if bulk:
+                        keys.append((suffix, sid))
+                    else:
+                        insort(keys, (suffix, sid))
+            suggestion = self._suggestions[sid]
+            suggestion.items += 1
+            suggestion.inventory += inventory
+            if score is not None:
+                suggestion.score_total += score
+                suggestion.scored += 1
+            if not bulk:
+                self._invalidate(suggestion)
+            sids.append(sid)
+        self._docs[game['id']] = (inventory, score, tuple(sids))
+
+    def _release(self, doc):
+        """Resta un juego de sus sugerencias y borra las que se quedan sin juegos"""
+        inventory, score, sids = doc
+        for sid in sids:
+            suggestion = self._suggestions[sid]
+            suggestion.items -= 1
+            suggestion.inventory -= inventory
+            if score is not None:
+                suggestion.score_total -= score
+                suggestion.scored -= 1
+            self._invalidate(suggestion)
+            if suggestion.items == 0:
+                for suffix in suggestion.suffixes():
+                    keys = self._keys[suffix[0]]
+                    i = bisect_left(keys, (suffix, sid))
+                    if i < len(keys) and keys[i] == (suffix, sid):
+                        del keys[i]
+                    if not keys:
+                        del self._keys[suffix[0]]
+                del self._ids[(suggestion.field, suggestion.normalized)]
+                del self._suggestions[sid]
+
+    def _invalidate(self, suggestion):
+        """Descarta los top-N guardados de los prefijos que incluyen a `suggestion`"""
+        if not self._top:
+            return
+        for suffix in suggestion.suffixes():
+            for end in range(1, len(suffix) + 1):
+                for rank in RANKS:
+                    self._top.pop((suffix[:end], rank), None)
+
+    def suggest(self, query, limit=DEFAULT_LIMIT, rank='inventory'):
+        """Las `limit` sugerencias con alguna palabra que empieza por `query`"""
+        prefix = normalize_query(query)
+        if not prefix:
+            return []
+        with self._lock:
+            keys = self._keys.get(prefix[0])
+            if not keys:
+                return []
+            start = bisect_left(keys, (prefix,))
+            end = bisect_left(keys, (prefix + _END,), start)
+            return self._top_n(keys, prefix, start, end, rank)[:min(limit, MAX_LIMIT)]
+
+    def _top_n(self, keys, prefix, start, end, rank):
+        """Top MAX_LIMIT del rango keys[start:end], que es el de `prefix`"""
+        if end - start <= HOT_RANGE:
+            # Un valor puede aparecer varias veces en el rango ("mario & sonic ... mario")
+            candidates = {self._suggestions[sid] for _, sid in keys[start:end]}
+            return heapq.nsmallest(MAX_LIMIT, candidates, key=_RANK_KEYS[rank])
+
+        top = self._top.get((prefix, rank))
+        if top is None:
+            # El top de un prefijo está en la unión del de sus hijos (prefijo + una letra)
+            candidates = set()
+            position = start
+            length = len(prefix)
+            while position < end and len(keys[position][0]) == length:
+                candidates.add(self._suggestions[keys[position][1]])
+                position += 1
+            while position < end:
+                child = prefix + keys[position][0][length]
+                child_end = bisect_left(keys, (child + _END,), position, end)
+                candidates.update(self._top_n(keys, child, position, child_end, rank))
+                position = child_end
+            top = self._top[(prefix, rank)] = heapq.nsmallest(MAX_LIMIT, candidates, key=_RANK_KEYS[rank])
+        return top
+
+    def build(self, conn, version=None):
+        """Indexa todos los juegos de la conexión dada y calcula los top-N de los prefijos largos"""
+        started = time.perf_counter()
+        with self._lock:
+            for row in conn.execute(f'SELECT {INDEXED_COLUMNS} FROM games'):
+                previous = self._docs.get(row['id'])
+                self._add(row, bulk=True)
+                if previous is not None:
+                    self._release(previous)
+            self._top.clear()
+            for first, keys in self._keys.items():
+                keys.sort()
+                for rank in RANKS:
+                    self._top_n(keys, first, 0, len(keys), rank)
+            self.version = version
+        logger.info(f"Índice de autocompletado construido: {len(self)} sugerencias de {len(self._docs)} juegos "
+                    f"en {time.perf_counter() - started:.1f}s")
+        return self
+
+
+# ---- Índice global ----
+
+_index = BackgroundIndex('games', lambda conn, version: SuggestionIndex().build(conn, version),
+                         'índice de autocompletado')
+
+
+def start_build():
+    """Construye el índice en segundo plano (al arrancar cada worker)"""
+    _index.start_build()
+
+
+def suggest(query, limit=DEFAULT_LIMIT, rank='inventory', version=None):
+    """
+    Sugerencias del índice global; None mientras se construye por primera vez.
+    Con `version` (la versión ALL de games en la base) se reconstruye en segundo
+    plano si el índice es más viejo.
+    """
+    index = _index.get(version)
+    if index is None:
+        return None
+    return index.suggest(query, limit=limit, rank=rank)
+
+
+# ---- Mantenimiento incremental desde las rutas de escritura ----
+
+_index.subscribe(
+    update=SuggestionIndex.update,
+    remove=lambda index, ids: [index.remove(game_id) for game_id in ids],
+    columns=FIELDS + ('inventory', 'score'),
+)
@@ -0,0 +1,198 @@
+"""
+Índices en memoria de un tipo (juegos o consolas) construidos en segundo plano y
+sincronizados con la base por la versión de tabla (versions.ALL).
+
+Cada worker tiene su propio índice. Las escrituras del propio worker se aplican
+al momento desde los eventos (subscribe/apply) y suben la versión que el índice dice
+reflejar; las de otros workers o herramientas sólo se ven en la base, así que
+quien lee compara esa versión con la de collection_versions (get) y, si no
+coincide, se reconstruye en un hilo mientras el índice anterior sigue respondiendo.
+"""
+import time
+import logging
+import threading
+import events
+import versions
+from connection import get_sqlserver_connection
+
+logger = logging.getLogger(__name__)
+
+# kind -> (señal de alta/edición, señal de borrado, nombre de la fila en sus kwargs)
+_SIGNALS = {
+    'games': (events.game_saved, events.game_deleted, 'game'),
+    'consoles': (events.console_saved, events.console_deleted, 'console'),
+}
+
+
+class BackgroundIndex:
+    """
+    Args:
+        kind: 'games' o 'consoles' (su versión ALL es la del índice)
+        build: Función (conn, version) que construye el índice; el objeto que
+            devuelve debe guardar `version` en su atributo version
+        description: Nombre para los logs ("índice de facetas de games")
+        max_age: Segundos tras los que se reconstruye aunque la versión coincida
+            (cambios hechos sin pasar por versions); None no caduca
+    """
+
+    def __init__(self, kind, build, description, max_age=None):
+        self.kind = kind
+        self.description = description
+        self.max_age = max_age
+        self._build_index = build
+        self._lock = threading.Lock()
+        self._index = None
+        self._built_at = None
+        self._building = False
+        # Otra reconstrucción pedida durante la actual: la que está en marcha puede haber leído ya las filas
+        self._again = False
+        # Cambios recibidos mientras se construye; se aplican al índice nuevo antes de publicarlo
+        self._pending = []
+
+    @property
+    def index(self):
+        """Índice publicado (None si aún no hay ninguno), sin comprobar versión"""
+        return self._index
+
+    @property
+    def building(self):
+        return self._building
+
+    def get(self, version=None):
+        """
+        Índice publicado; None mientras se construye por primera vez. Con
+        `version` (la versión ALL actual de la base) se reconstruye en segundo
+        plano si el índice es más viejo, y también si ha superado max_age.
+        """
+        index = self._index
+        if (index is None or (version is not None and index.version != version)
+                or (self.max_age is not None and time.time() - self._built_at > self.max_age)):
+            self.start_build()
+        return index
+
+    def is_current(self, version):
+        """True si hay índice y refleja `version`; si no, lanza la reconstrucción"""
+        index = self.get(version)
+        return index is not None and index.version == version
+
+    def start_build(self):
+        """Construye en un hilo si no hay ya una construcción en marcha"""
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._run, name=f'build-{self.description}', daemon=True).start()
+
+    def rebuild(self):
+        """
+        Reconstrucción por un cambio sin filas en el evento (importación, lote):
+        si hay una en marcha se repite al terminar. Sin índice ni construcción no
+        hace nada; el primer get lo construirá.
+        """
+        with self._lock:
+            if self._building:
+                self._again = True
+                return
+            if self._index is None:
+                return
+            self._building = True
+        threading.Thread(target=self._run, name=f'build-{self.description}', daemon=True).start()
+
+    def apply(self, change, writes=1):
+        """Aplica `change` al índice y cuenta las `writes` escrituras (cada una sube versions.ALL en 1)"""
+        with self._lock:
+            index = self._index
+            if index is not None:
+                change(index)
+                if index.version is not None:
+                    index.version += writes
+            if self._building:
+                self._pending.append(change)
+
+    def subscribe(self, update, remove, update_columns=None, columns=None, prepare=None):
+        """
+        Mantiene el índice con los eventos de escritura de self.kind (ver events.py).
+
+        Args:
+            update: (índice, fila[, preparado]) para un alta o edición
+            remove: (índice, ids) para un borrado
+            update_columns: (índice, ids, cambios[, preparado]) para un cambio por
+                lotes; sin él, un lote que toca `columns` reconstruye el índice
+            columns: Columnas que refleja el índice (None = todas); un lote que no
+                toca ninguna sólo cuenta la escritura
+            prepare: (fila o cambios) -> dato que se calcula una vez, fuera del
+                lock, y se pasa como último argumento a update y update_columns
+
+        Los eventos sin fila (guardar o borrar una que no existe) no cambian la base
+        ni su versión, así que se ignoran.
+        """
+        saved, deleted, name = _SIGNALS[self.kind]
+        watched = None if columns is None else set(columns)
+
+        def on_saved(sender, **kwargs):
+            row = kwargs.get(name)
+            if row is None or row.get('id') is None:
+                return
+            extra = (prepare(row),) if prepare else ()
+            self.apply(lambda index: update(index, row, *extra))
+
+        def on_deleted(sender, **kwargs):
+            if kwargs.get(name) is None:
+                return
+            ids = [kwargs[f'{name}_id']]
+            self.apply(lambda index: remove(index, ids))
+
+        def on_imported(sender, kind, **kwargs):
+            # El evento no trae las filas
+            if kind == self.kind:
+                self.rebuild()
+
+        def on_batch(sender, kind, action, ids, columns=(), changes=None, **kwargs):
+            if kind != self.kind:
+                return
+            if action == 'delete':
+                self.apply(lambda index: remove(index, ids))
+            elif watched is not None and not watched & set(columns):
+                # Ningún campo indexado cambia, pero el lote sube la versión de la tabla
+                self.apply(lambda index: None)
+            elif update_columns is None:
+                # Sin las filas completas: se reconstruye como tras importar
+                self.rebuild()
+            else:
+                changes = changes or {}
+                extra = (prepare(changes),) if prepare else ()
+                self.apply(lambda index: update_columns(index, ids, changes, *extra))
+
+        # Funciones locales: blinker guardaría sólo una referencia débil
+        saved.connect(on_saved, weak=False)
+        deleted.connect(on_deleted, weak=False)
+        events.collection_imported.connect(on_imported, weak=False)
+        events.collection_batch.connect(on_batch, weak=False)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                # Lo confirmado antes de leer las filas ya estará en ellas
+                self._pending.clear()
+                self._again = False
+            index = None
+            try:
+                conn = get_sqlserver_connection()
+                try:
+                    # La versión se lee antes que las filas: si cambian en medio, el índice sólo parece más viejo
+                    version = versions.current(conn, [(self.kind, versions.ALL)])[(self.kind, versions.ALL)]
+                    index = self._build_index(conn, version)
+                finally:
+                    conn.close()
+            except Exception as e:
+                logger.error(f"No se pudo construir el {self.description}: {e}")
+            with self._lock:
+                if index is not None:
+                    for change in self._pending:
+                        change(index)
+                    self._index = index
+                    self._built_at = time.time()
+                self._pending.clear()
+                if not self._again:
+                    self._building = False
+                    return
@@ -0,0 +1,174 @@
+"""
+Cambios por lotes sobre las filas seleccionadas en las tablas de index.html:
+borrar, cambiar inventario/condición/sellado o mover a otra plataforma/modelo.
+
+Cada lote es una sola transacción con sentencias por conjuntos (WHERE id IN (...)),
+no una petición, conexión y commit por fila. Los contadores se ajustan en la
+misma transacción y las cachés se avisan con una única señal al final.
+"""
+from datetime import datetime, timezone
+import counters
+import events
+import lookups
+from dialect import delete_returning, update_returning_previous
+
+# Filas seleccionadas como máximo en un lote
+MAX_BATCH_SIZE = 1000
+# Ids por sentencia (SQL Server admite 2100 parámetros)
+_ID_BATCH = 500
+
+TRUE_VALUES = {'1', 'true', 'on', 'yes', 'y', 'si', 'sí'}
+FALSE_VALUES = {'0', 'false', 'off', 'no', 'n'}
+
+# kind -> (tabla, columna de agrupación, columna de la que se normaliza)
+KINDS = {
+    'games': ('games', 'platform_normalized', 'platform'),
+    'consoles': ('consoles', 'model_normalized', 'model'),
+}
+
+
+class BatchError(ValueError):
+    """Selección o cambios inválidos (la ruta lo muestra como error)"""
+
+
+def parse_ids(values):
+    """Ids únicos y en orden a partir de los valores del formulario (ids=1&ids=2 o "1,2")"""
+    ids = []
+    seen = set()
+    for value in values:
+        for part in str(value).split(','):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                row_id = int(part)
+            except ValueError:
+                raise BatchError(f'Id inválido: "{part}"')
+            if row_id not in seen:
+                seen.add(row_id)
+                ids.append(row_id)
+    if not ids:
+        raise BatchError('No hay filas seleccionadas.')
+    if len(ids) > MAX_BATCH_SIZE:
+        raise BatchError(f'Como máximo {MAX_BATCH_SIZE} filas por lote ({len(ids)} seleccionadas).')
+    return ids
+
+
+def parse_changes(kind, form):
+    """
+    Columnas a cambiar según el formulario. Los campos vacíos no se tocan:
+    inventory, condition, sealed (1/0) y platform (juegos) o model (consolas).
+    """
+    _, _, source_column = KINDS[kind]
+    changes = {}
+
+    inventory = (form.get('inventory') or '').strip()
+    if inventory:
+        try:
+            changes['inventory'] = int(inventory)
+        except ValueError:
+            raise BatchError('El inventario debe ser un número entero.')
+        if changes['inventory'] < 0:
+            raise BatchError('El inventario no puede ser negativo.')
+
+    condition = (form.get('condition') or '').strip()
+    if condition:
+        changes['condition'] = condition
+
+    sealed = (form.get('sealed') or '').strip().lower()
+    if sealed in TRUE_VALUES:
+        changes['sealed'] = True
+    elif sealed in FALSE_VALUES:
+        changes['sealed'] = False
+    elif sealed:
+        raise BatchError(f'Valor de sealed inválido: "{sealed}"')
+
+    target = (form.get(source_column) or '').strip()
+    if target:
+        # platform_id/model_id y el slug se resuelven en update_rows, dentro de la transacción
+        changes[source_column] = target
+
+    if not changes:
+        raise BatchError('No hay cambios que aplicar.')
+    return changes
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), _ID_BATCH):
+        yield ids[start:start + _ID_BATCH]
+
+
+def _in_clause(ids):
+    return f"id IN ({', '.join('?' for _ in ids)})"
+
+
+def delete_rows(conn, kind, ids):
+    """
+    Borra `ids` en una transacción; retorna cuántas filas existían.
+    Cada DELETE devuelve el grupo e inventario de lo borrado (OUTPUT/RETURNING)
+    para los contadores, sin SELECT previo.
+    """
+    table, group_column, _ = KINDS[kind]
+    deleted = []
+    try:
+        for chunk in _chunks(ids):
+            deleted.extend(conn.execute(
+                delete_returning(conn.dialect, table, _in_clause(chunk), ('id', group_column, 'inventory')),
+                tuple(chunk)
+            ).fetchall())
+        counters.record_changes(conn, kind, [(row, None) for row in deleted])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if deleted:
+        events.collection_batch.send(
+            __name__, kind=kind, action='delete', ids=[row['id'] for row in deleted],
+            groups={row[group_column] for row in deleted if row[group_column] is not None}, columns=(), changes={},
+        )
+    return len(deleted)
+
+
+def update_rows(conn, kind, ids, changes):
+    """
+    Aplica `changes` ({columna: valor}, ver parse_changes) a `ids` en una
+    transacción; retorna cuántas filas se actualizaron.
+    """
+    table, group_column, source_column = KINDS[kind]
+    changes = dict(changes, updated_at=datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+
+    # Grupo e inventario anteriores (OUTPUT deleted.*) para contadores y cachés
+    previous_rows = []
+    try:
+        if source_column in changes:
+            id_column = lookups.KINDS[kind][2]
+            changes[id_column], changes[group_column] = lookups.resolve(conn, kind, changes[source_column])
+        columns = list(changes)
+        values = tuple(changes.values())
+        for chunk in _chunks(ids):
+            previous_rows.extend(update_returning_previous(
+                conn, table, columns, _in_clause(chunk), values + tuple(chunk),
+                previous=('id', group_column, 'inventory'), many=True,
+            ))
+        counters.record_changes(conn, kind, [
+            (row, {
+                group_column: changes.get(group_column, row[group_column]),
+                'inventory': changes.get('inventory', row['inventory']),
+            })
+            for row in previous_rows
+        ])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if previous_rows:
+        groups = {row[group_column] for row in previous_rows if row[group_column] is not None}
+        if group_column in changes:
+            groups.add(changes[group_column])
+        events.collection_batch.send(
+            __name__, kind=kind, action='update', ids=[row['id'] for row in previous_rows],
+            groups=groups, columns=tuple(columns), changes=changes,
+        )
+    return len(previous_rows)
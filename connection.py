@@ -1,10 +1,72 @@
 import os
 import sqlite3
-import pyodbc
+import operator
+import threading
+import time
 from dotenv import load_dotenv
+from pool import ConnectionPool
+from dialect import SQLITE, SQLSERVER
+from query_stats import query_stats
 
 load_dotenv()
 
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor SQLite que registra tiempo y filas de cada sentencia en query_stats"""
+    _fingerprint = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except Exception:
+            query_stats.record(sql, parameters, time.perf_counter() - start, error=True)
+            raise
+        self._fingerprint = query_stats.record(sql, parameters, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        except Exception:
+            query_stats.record(sql, None, time.perf_counter() - start, error=True)
+            raise
+        self._fingerprint = query_stats.record(sql, None, time.perf_counter() - start)
+        return self
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            query_stats.add_rows(self._fingerprint, 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        query_stats.add_rows(self._fingerprint, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        query_stats.add_rows(self._fingerprint, len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        query_stats.add_rows(self._fingerprint, 1)
+        return row
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Conexión SQLite cuyos cursores (incluido conn.execute) pasan por InstrumentedCursor"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
 def get_db_connection():
     """
     Establece conexión con la base de datos SQLite.
@@ -13,46 +75,135 @@ def get_db_connection():
     database_path = os.getenv('DATABASE_PATH', 'db/videogames.db')
 
     try:
-        connection = sqlite3.connect(database_path, check_same_thread=False)
+        connection = sqlite3.connect(database_path, check_same_thread=False, factory=InstrumentedConnection)
         connection.row_factory = sqlite3.Row  # Permite acceder a columnas por nombre
         return connection
     except sqlite3.Error as e:
         print(f"Error connecting to the SQLite database: {e}")
         raise
 
+class Row(tuple):
+    """
+    Fila compacta respaldada por una tupla.
+    Permite row['title'], row.title, row[0] y row.get('role', 'viewer').
+    """
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return list(self._fields)
+
+    def values(self):
+        return list(self)
+
+    def items(self):
+        return list(zip(self._fields, self))
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={value!r}' for name, value in zip(self._fields, self))
+        return f'Row({fields})'
+
+    def __reduce__(self):
+        return (_make_row, (self._fields, tuple(self)))
+
+_ROW_API = {'get', 'keys', 'values', 'items'}
+_row_classes = {}
+
+def row_class(columns):
+    """Clase Row para un conjunto de columnas; se crea una sola vez por forma de resultado"""
+    columns = tuple(columns)
+    cls = _row_classes.get(columns)
+    if cls is None:
+        namespace = {
+            '__slots__': (),
+            '_fields': columns,
+            '_index': {name: i for i, name in enumerate(columns)},
+        }
+        for i, name in enumerate(columns):
+            if name.isidentifier() and not name.startswith('_') and name not in _ROW_API:
+                namespace[name] = property(operator.itemgetter(i))
+        cls = _row_classes.setdefault(columns, type('Row', (Row,), namespace))
+    return cls
+
+def _make_row(columns, values):
+    return row_class(columns)(values)
+
 class DictCursor:
-    """Wrapper para pyodbc cursor que retorna diccionarios"""
+    """Wrapper para pyodbc cursor que retorna filas Row (acceso por nombre o atributo)"""
+    arraysize = 500
+
     def __init__(self, cursor):
         self.cursor = cursor
         self._last_description = None
+        self._row_class = None
+        self._fingerprint = None
 
     def execute(self, query, params=None):
         if params is None:
             params = ()
         # pyodbc acepta tuplas/listas; sqlite3 también en su API cursors
-        self.cursor.execute(query, params)
-        # Guardar descripción para fetch
+        start = time.perf_counter()
+        try:
+            self.cursor.execute(query, params)
+        except Exception:
+            query_stats.record(query, params, time.perf_counter() - start, error=True)
+            raise
+        self._fingerprint = query_stats.record(query, params, time.perf_counter() - start)
+        # Guardar descripción y la clase de fila para los fetch
         self._last_description = self.cursor.description
+        self._row_class = row_class(column[0] for column in self._last_description) \
+            if self._last_description else None
         return self  # permite chaining: conn.execute(...).fetchone()
 
     def fetchone(self):
         row = self.cursor.fetchone()
-        if row is None:
-            return None
-        if not self._last_description:
-            # si no hay descripción, devolver tuple
+        if row is not None:
+            query_stats.add_rows(self._fingerprint, 1)
+        if row is None or self._row_class is None:
+            # si no hay descripción, devolver la fila tal cual
             return row
-        columns = [column[0] for column in self._last_description]
-        return dict(zip(columns, row))
+        return self._row_class(row)
+
+    def fetchmany(self, size=None):
+        rows = self.cursor.fetchmany(size or self.arraysize)
+        query_stats.add_rows(self._fingerprint, len(rows))
+        if self._row_class is None:
+            return rows
+        cls = self._row_class
+        return [cls(row) for row in rows]
 
     def fetchall(self):
-        rows = self.cursor.fetchall()
-        if not rows:
-            return []
-        if not self._last_description:
+        if self._row_class is None:
+            rows = self.cursor.fetchall() or []
+            query_stats.add_rows(self._fingerprint, len(rows))
             return rows
-        columns = [column[0] for column in self._last_description]
-        return [dict(zip(columns, row)) for row in rows]
+        # Convertir por lotes para no tener a la vez todas las filas del driver y las Row
+        rows = []
+        for batch in self.iter_batches():
+            rows.extend(batch)
+        return rows
+
+    def iter_batches(self, size=None):
+        """Recorre el resultado en lotes de `size` filas sin cargarlo entero en memoria"""
+        while True:
+            batch = self.fetchmany(size)
+            if not batch:
+                return
+            yield batch
+
+    def __iter__(self):
+        for batch in self.iter_batches():
+            yield from batch
 
     def close(self):
         try:
@@ -60,21 +211,59 @@ class DictCursor:
         except Exception:
             pass
 
+def is_disconnect(error):
+    """
+    True si `error` indica que la conexión física se perdió: SQLSTATE de clase 08
+    (pyodbc: ('08S01', 'Communication link failure')) o conexión sqlite3 cerrada
+    """
+    state = error.args[0] if error.args else None
+    if isinstance(state, str) and state.startswith('08'):
+        return True
+    return isinstance(error, sqlite3.ProgrammingError) and 'closed' in str(error)
+
 class DictConnection:
-    """Wrapper para pyodbc connection que usa DictCursor"""
-    def __init__(self, connection):
+    """Wrapper para pyodbc connection que usa DictCursor.
+
+    Si la conexión viene de un ConnectionPool, close() la devuelve al pool
+    en lugar de cerrarla; si una sentencia falló porque la conexión se perdió
+    (el pool no valida las usadas hace poco), se descarta.
+    """
+    def __init__(self, connection, pool=None):
         self.connection = connection
+        self.pool = pool
+        self.dialect = SQLITE if isinstance(connection, sqlite3.Connection) else SQLSERVER
         self._cursor = None
+        self._broken = False
 
     def execute(self, query, params=None):
         # Crear un cursor nuevo y ejecutar; almacenar como _cursor para close()
-        cur = self.connection.cursor()
-        dict_cur = DictCursor(cur)
-        dict_cur.execute(query, params)
+        try:
+            cur = self.connection.cursor()
+            dict_cur = DictCursor(cur)
+            dict_cur.execute(query, params)
+        except Exception as e:
+            self._broken = self._broken or is_disconnect(e)
+            raise
         # almacenar el cursor activo (para close() posterior)
         self._cursor = dict_cur
         return dict_cur
 
+    def executemany(self, query, seq_of_params):
+        """Ejecuta `query` para cada tupla de parámetros en un solo envío (fast_executemany en pyodbc)"""
+        cur = self.connection.cursor()
+        if hasattr(cur, 'fast_executemany'):
+            cur.fast_executemany = True
+        start = time.perf_counter()
+        try:
+            cur.executemany(query, seq_of_params)
+        except Exception as e:
+            self._broken = self._broken or is_disconnect(e)
+            query_stats.record(query, None, time.perf_counter() - start, error=True)
+            raise
+        finally:
+            cur.close()
+        query_stats.record(query, None, time.perf_counter() - start)
+
     def cursor(self):
         return DictCursor(self.connection.cursor())
 
@@ -91,13 +280,35 @@ class DictConnection:
             pass
 
     def close(self):
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
         try:
             if self._cursor:
                 self._cursor.close()
-            self.connection.close()
+                self._cursor = None
         except Exception:
             pass
 
+        if self.pool is None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+            return
+
+        if self._broken:
+            self.pool.release(connection, discard=True)
+            return
+
+        # Deshacer cualquier transacción abierta antes de reutilizar la conexión
+        try:
+            connection.rollback()
+        except Exception:
+            self.pool.release(connection, discard=True)
+        else:
+            self.pool.release(connection)
+
     # Soporte para uso con "with"
     def __enter__(self):
         return self
@@ -108,10 +319,10 @@ class DictConnection:
         finally:
             self.close()
 
-def get_sqlserver_connection():
-    """
-    Conexión a Azure SQL Server con soporte para acceso por nombre de columna.
-    """
+_pool = None
+_pool_lock = threading.Lock()
+
+def _sqlserver_connection_string():
     server = os.getenv('AZURE_SQL_SERVER')
     database = os.getenv('AZURE_SQL_DATABASE')
     username = os.getenv('AZURE_SQL_USER')
@@ -121,18 +332,97 @@ def get_sqlserver_connection():
     if not all([server, database, username, password]):
         raise ValueError("Azure SQL Server credentials are not configuradas en .env")
 
-    conn_str = (
+    return (
         f'DRIVER={driver};SERVER={server};DATABASE={database};'
         f'UID={username};PWD={password};Encrypt=yes;TrustServerCertificate=yes;Connection Timeout=30'
     )
 
+def _connect_sqlserver():
+    """
+    Abre una conexión física a Azure SQL (la usa el pool). pyodbc se importa aquí:
+    sin el driver ODBC instalado la app se puede importar y usar con SQLite.
+    """
+    import pyodbc
     try:
-        connection = pyodbc.connect(conn_str, autocommit=False)
-        return DictConnection(connection)
+        return pyodbc.connect(_sqlserver_connection_string(), autocommit=False)
     except pyodbc.Error as e:
         print(f"Error connecting to Azure SQL Server: {e}")
         raise
 
+def sqlite_creator(database_path):
+    """
+    Creator para ConnectionPool que abre conexiones SQLite.
+    Sirve como sustituto local del driver de SQL Server en pruebas y benchmarks.
+    """
+    def connect():
+        return sqlite3.connect(database_path, check_same_thread=False)
+    return connect
+
+def _pool_options_from_env():
+    return {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+        'idle_timeout': float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+        'pre_ping': os.getenv('DB_POOL_PRE_PING', '1') not in ('0', 'false', 'False'),
+        'ping_after': float(os.getenv('DB_POOL_PING_AFTER', 30)),
+    }
+
+def configure_pool(creator=None, **options):
+    """
+    Reemplaza el pool global usado por get_sqlserver_connection().
+
+    Args:
+        creator: Callable que abre una conexión física (default: según DB_BACKEND)
+        **options: Sobrescriben las opciones DB_POOL_* del entorno
+    """
+    global _pool
+    settings = _pool_options_from_env()
+    settings.update(options)
+    new_pool = ConnectionPool(creator or _creator_from_env(), **settings)
+    with _pool_lock:
+        old_pool, _pool = _pool, new_pool
+    if old_pool is not None:
+        old_pool.dispose()
+    return new_pool
+
+def _creator_from_env():
+    """DB_BACKEND=mssql (Azure SQL, default) o sqlite (archivo DATABASE_PATH, sin driver ODBC)"""
+    if os.getenv('DB_BACKEND', SQLSERVER).lower() == SQLITE:
+        return sqlite_creator(os.getenv('DATABASE_PATH', 'db/videogames.db'))
+    return _connect_sqlserver
+
+def get_pool():
+    """Devuelve el pool global, creándolo con la configuración del entorno si no existe"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_creator_from_env(), **_pool_options_from_env())
+    return _pool
+
+def close_pool():
+    """Cierra las conexiones del pool global (apagado del servidor ASGI)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.dispose()
+
+def pool_stats():
+    """Estadísticas del pool global, o None si todavía no se ha creado (no conecta)"""
+    pool = _pool
+    return pool.stats() if pool is not None else None
+
+def get_sqlserver_connection():
+    """
+    Conexión a Azure SQL Server con soporte para acceso por nombre de columna.
+    La conexión sale del pool global; close() la devuelve al pool.
+    """
+    pool = get_pool()
+    return DictConnection(pool.acquire(), pool=pool)
+
 if __name__ == "__main__":
     conn = get_db_connection()
     print("SQLite connection successful!")
@@ -0,0 +1,171 @@
+import logging
+from dialect import dialect_of, SQLITE
+import versions
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'collection_counters'
+
+# kind -> (tabla, columna de agrupación)
+KINDS = {
+    'games': ('games', 'platform_normalized'),
+    'consoles': ('consoles', 'model_normalized'),
+}
+
+_CREATE_TABLE = f'''
+    CREATE TABLE {TABLE} (
+        kind NVARCHAR(16) NOT NULL,
+        grp NVARCHAR(255) NOT NULL,
+        items INT NOT NULL DEFAULT 0,
+        inventory INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (kind, grp)
+    )
+'''
+
+
+# Grupos por sentencia de apply_deltas (4 parámetros por grupo, SQL Server admite 2100)
+_DELTA_BATCH = 500
+
+
+def _increment_sql(dialect, groups=1):
+    """Suma atómica a `groups` contadores en una sola sentencia, creándolos si no existen"""
+    values = ', '.join(['(?, ?, ?, ?)'] * groups)
+    if dialect == SQLITE:
+        return f'''
+            INSERT INTO {TABLE} (kind, grp, items, inventory) VALUES {values}
+            ON CONFLICT(kind, grp) DO UPDATE SET
+                items = items + excluded.items,
+                inventory = inventory + excluded.inventory
+        '''
+    return f'''
+        MERGE {TABLE} WITH (HOLDLOCK) AS t
+        USING (VALUES {values}) AS s (kind, grp, items, inventory)
+        ON t.kind = s.kind AND t.grp = s.grp
+        WHEN MATCHED THEN UPDATE SET items = t.items + s.items, inventory = t.inventory + s.inventory
+        WHEN NOT MATCHED THEN INSERT (kind, grp, items, inventory) VALUES (s.kind, s.grp, s.items, s.inventory);
+    '''
+
+
+def table_exists(conn):
+    if dialect_of(conn) == SQLITE:
+        query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?"
+    else:
+        query = "SELECT name FROM sys.tables WHERE name = ?"
+    return conn.execute(query, (TABLE,)).fetchone() is not None
+
+
+def ensure_table(conn):
+    """
+    Crea y rellena la tabla de contadores si todavía no existe (migración 4 y
+    herramientas; las peticiones cuentan con que ya existe). Retorna True si la
+    acaba de crear; el llamador hace commit.
+    """
+    if table_exists(conn):
+        return False
+    logger.info(f"Creando {TABLE} a partir de las tablas actuales")
+    conn.execute(_CREATE_TABLE)
+    rebuild(conn)
+    return True
+
+
+def rebuild(conn, kinds=None):
+    """Recalcula los contadores desde cero (dentro de la transacción actual)"""
+    for kind in kinds or KINDS:
+        table, column = KINDS[kind]
+        conn.execute(f'DELETE FROM {TABLE} WHERE kind = ?', (kind,))
+        conn.execute(f'''
+            INSERT INTO {TABLE} (kind, grp, items, inventory)
+            SELECT ?, {column}, COUNT(*), COALESCE(SUM(inventory), 0)
+            FROM {table}
+            WHERE {column} IS NOT NULL
+            GROUP BY {column}
+        ''', (kind,))
+
+
+def drift(conn, kind):
+    """Grupos cuyo contador no coincide con la tabla: [(grupo, (items, inventario) guardado, real)]"""
+    table, column = KINDS[kind]
+    stored = {
+        row[0]: (row[1], row[2])
+        for row in conn.execute(f'SELECT grp, items, inventory FROM {TABLE} WHERE kind = ?', (kind,)).fetchall()
+    }
+    actual = {
+        row[0]: (row[1], row[2])
+        for row in conn.execute(f'''
+            SELECT {column}, COUNT(*), COALESCE(SUM(inventory), 0)
+            FROM {table} WHERE {column} IS NOT NULL GROUP BY {column}
+        ''').fetchall()
+    }
+    return [
+        (group, stored.get(group, (0, 0)), actual.get(group, (0, 0)))
+        for group in sorted(set(stored) | set(actual))
+        if stored.get(group, (0, 0)) != actual.get(group, (0, 0))
+    ]
+
+
+def record_change(conn, kind, old=None, new=None):
+    """
+    Ajusta los contadores por una fila insertada (old=None), borrada (new=None)
+    o editada. `old` y `new` tienen la columna de agrupación e 'inventory'.
+    Se ejecuta en la misma transacción que la escritura, antes del commit.
+    """
+    record_changes(conn, kind, [(old, new)])
+
+
+def record_changes(conn, kind, changes):
+    """Como record_change para varias filas a la vez: `changes` es [(old, new)]"""
+    _, column = KINDS[kind]
+    deltas = {}
+    for old, new in changes:
+        for row, sign in ((old, -1), (new, 1)):
+            if row is None or row[column] is None:
+                continue
+            items, inventory = deltas.get(row[column], (0, 0))
+            deltas[row[column]] = (items + sign, inventory + sign * int(row['inventory'] or 0))
+    apply_deltas(conn, kind, deltas)
+
+
+def apply_deltas(conn, kind, deltas):
+    """
+    Suma {grupo: (items, inventario)} a los contadores (p. ej. un lote de importación).
+    Todos los grupos van en la misma sentencia: una edición que cambia de grupo es un round trip.
+    Sube también la versión de cada grupo (versions.bump), aunque su delta sea cero.
+    """
+    versions.bump(conn, kind, deltas)
+    rows = [(kind, group, items, inventory) for group, (items, inventory) in deltas.items() if items or inventory]
+    dialect = dialect_of(conn)
+    for i in range(0, len(rows), _DELTA_BATCH):
+        batch = rows[i:i + _DELTA_BATCH]
+        conn.execute(_increment_sql(dialect, len(batch)), tuple(value for row in batch for value in row))
+
+
+def group_columns(kind):
+    """
+    Columnas extra para el SELECT de un listado por grupo: el total y el inventario
+    del grupo salen en la misma consulta que la página (_group_items, _group_inventory).
+    """
+    table, column = KINDS[kind]
+    lookup = f"FROM {TABLE} c WHERE c.kind = '{kind}' AND c.grp = {table}.{column}"
+    return (f'{table}.*, (SELECT c.items {lookup}) AS _group_items, '
+            f'(SELECT c.inventory {lookup}) AS _group_inventory')
+
+
+def group_totals(conn, kind, group, rows=None):
+    """
+    (items, inventario) de un grupo. Si `rows` viene de un SELECT con group_columns()
+    se lee de la primera fila sin otra consulta.
+    """
+    if rows:
+        return rows[0]['_group_items'] or 0, rows[0]['_group_inventory'] or 0
+    row = conn.execute(
+        f'SELECT items, inventory FROM {TABLE} WHERE kind = ? AND grp = ?', (kind, group)
+    ).fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def collection_totals(conn, kind):
+    """(items, inventario) de toda la colección de un tipo"""
+    row = conn.execute(
+        f'SELECT COALESCE(SUM(items), 0), COALESCE(SUM(inventory), 0) FROM {TABLE} WHERE kind = ?', (kind,)
+    ).fetchone()
+    return row[0], row[1]
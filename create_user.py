@@ -1,6 +1,7 @@
-import bcrypt
 from connection import get_sqlserver_connection
 from auth import Role
+from user_cache import invalidate_user
+from passwords import hash_password
 
 def create_user(username, password, role='viewer'):
     """
@@ -26,7 +27,7 @@ def create_user(username, password, role='viewer'):
             return False
         
         # Crear hash de la contraseña
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        password_hash = hash_password(password)
         
         # Insertar usuario con rol
         conn.execute(
@@ -42,6 +43,43 @@ def create_user(username, password, role='viewer'):
     finally:
         conn.close()
 
+def update_user(username, password=None, role=None):
+    """
+    Cambia la contraseña y/o el rol de un usuario existente.
+    Invalida la caché de usuarios para que la app no siga usando los datos viejos.
+    
+    Args:
+        username: Nombre de usuario
+        password: Nueva contraseña en texto plano (None = no cambiar)
+        role: Nuevo rol 'admin', 'editor' o 'viewer' (None = no cambiar)
+    """
+    valid_roles = [Role.ADMIN, Role.EDITOR, Role.VIEWER]
+    if role is not None and role not in valid_roles:
+        print(f"❌ Error: Rol '{role}' no válido. Debe ser: {', '.join(valid_roles)}")
+        return False
+    
+    conn = get_sqlserver_connection()
+    try:
+        existing = conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()
+        if not existing:
+            print(f"❌ Error: El usuario '{username}' no existe.")
+            return False
+        
+        if password is not None:
+            password_hash = hash_password(password)
+            conn.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, existing['id']))
+        if role is not None:
+            conn.execute('UPDATE users SET role = ? WHERE id = ?', (role, existing['id']))
+        conn.commit()
+        invalidate_user(existing['id'])
+        print(f"✅ Usuario '{username}' actualizado.")
+        return True
+    except Exception as e:
+        print(f"❌ Error actualizando usuario: {e}")
+        return False
+    finally:
+        conn.close()
+
 def list_users():
     """Lista todos los usuarios y sus roles"""
     conn = get_sqlserver_connection()
@@ -94,5 +132,9 @@ if __name__ == "__main__":
     # Crear viewer
     # create_user("viewer", "viewer123", "viewer")
     
+    # Cambiar rol o contraseña de un usuario existente
+    # update_user("editor", role="admin")
+    # update_user("editor", password="nueva123")
+    
     print("\n💡 Para crear usuarios, descomenta las líneas en create_user.py")
     print("   o modifica el script según tus necesidades.\n")
\ No newline at end of file
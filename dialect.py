@@ -0,0 +1,100 @@
+import sqlite3
+
+SQLSERVER = 'mssql'
+SQLITE = 'sqlite'
+
+
+def dialect_of(conn):
+    """
+    Devuelve el dialecto SQL de una conexión: 'mssql' o 'sqlite'.
+    Acepta DictConnection o una conexión sqlite3 de get_db_connection().
+    """
+    dialect = getattr(conn, 'dialect', None)
+    if dialect:
+        return dialect
+    raw = getattr(conn, 'connection', conn)
+    return SQLITE if isinstance(raw, sqlite3.Connection) else SQLSERVER
+
+
+def select_limited(dialect, table, where, order_by, columns='*'):
+    """
+    SELECT con límite de filas parametrizado (el último parámetro es el límite).
+
+    SQL Server usa TOP (?) y SQLite LIMIT ?.
+    """
+    where_sql = f' WHERE {where}' if where else ''
+    if dialect == SQLITE:
+        return f'SELECT {columns} FROM {table}{where_sql} ORDER BY {order_by} LIMIT ?'
+    return f'SELECT TOP (?) {columns} FROM {table}{where_sql} ORDER BY {order_by}'
+
+
+def limit_first(dialect):
+    """True si el parámetro del límite va antes que los del WHERE (TOP en SQL Server)"""
+    return dialect != SQLITE
+
+
+def insert_returning(dialect, table, columns, returning=('id',)):
+    """
+    INSERT que devuelve columnas de la fila insertada en el mismo round trip.
+
+    SQL Server usa OUTPUT inserted.<col> y SQLite RETURNING <col>.
+    """
+    column_list = ', '.join(columns)
+    placeholders = ', '.join('?' for _ in columns)
+    if dialect == SQLITE:
+        return (f'INSERT INTO {table} ({column_list}) VALUES ({placeholders}) '
+                f'RETURNING {", ".join(returning)}')
+    output = ', '.join(f'inserted.{column}' for column in returning)
+    return f'INSERT INTO {table} ({column_list}) OUTPUT {output} VALUES ({placeholders})'
+
+
+def delete_returning(dialect, table, where, returning):
+    """
+    DELETE que devuelve columnas de las filas borradas en el mismo round trip.
+
+    SQL Server usa OUTPUT deleted.<col> y SQLite RETURNING <col>.
+    """
+    if dialect == SQLITE:
+        return f'DELETE FROM {table} WHERE {where} RETURNING {", ".join(returning)}'
+    output = ', '.join(f'deleted.{column}' for column in returning)
+    return f'DELETE FROM {table} OUTPUT {output} WHERE {where}'
+
+
+def update_returning_previous(conn, table, columns, where, params, previous, many=False):
+    """
+    Ejecuta UPDATE {table} SET <columns> WHERE {where} y devuelve la fila con los
+    valores anteriores de `previous` (None si ninguna fila coincide; con many=True,
+    la lista de todas las filas actualizadas).
+
+    `params` son los valores de `columns` seguidos de los del WHERE. En SQL Server
+    es una sola sentencia (OUTPUT deleted.<col>). RETURNING de SQLite sólo ve los
+    valores nuevos, así que allí se leen antes en la misma conexión (local, sin red).
+    """
+    assignments = ', '.join(f'{column} = ?' for column in columns)
+    if dialect_of(conn) != SQLITE:
+        output = ', '.join(f'deleted.{column}' for column in previous)
+        cursor = conn.execute(f'UPDATE {table} SET {assignments} OUTPUT {output} WHERE {where}', params)
+        return cursor.fetchall() if many else cursor.fetchone()
+
+    where_params = tuple(params[len(columns):])
+    cursor = conn.execute(f'SELECT {", ".join(previous)} FROM {table} WHERE {where}', where_params)
+    rows = cursor.fetchall() if many else cursor.fetchone()
+    if rows:
+        conn.execute(f'UPDATE {table} SET {assignments} WHERE {where}', params)
+    return rows
+
+
+def is_unique_violation(error, column=None):
+    """
+    True si `error` es una violación de índice único (sqlite3 o pyodbc).
+    Con `column`, sólo si el mensaje nombra esa columna o un índice que la contiene.
+    """
+    if type(error).__name__ != 'IntegrityError':
+        return False
+    message = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        violated = 'UNIQUE constraint failed' in message
+    else:
+        # 2601: índice único, 2627: restricción UNIQUE/PRIMARY KEY
+        violated = '2601' in message or '2627' in message
+    return violated and (column is None or column in message)
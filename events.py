@@ -0,0 +1,27 @@
+from blinker import Namespace
+
+# Señales que emiten las rutas de escritura después de hacer commit.
+# Los índices y cachés en memoria se suscriben para mantenerse al día.
+_signals = Namespace()
+
+# kwargs: game (dict con todas las columnas, incluido id), previous (dict o None)
+game_saved = _signals.signal('game-saved')
+
+# kwargs: game_id, game (dict o None si no se conoce la fila borrada)
+game_deleted = _signals.signal('game-deleted')
+
+# kwargs: console (dict con todas las columnas, incluido id), previous (dict o None)
+console_saved = _signals.signal('console-saved')
+
+# kwargs: console_id, console (dict o None)
+console_deleted = _signals.signal('console-deleted')
+
+# Importación masiva (sin señal por fila). kwargs: kind ('games' o 'consoles'),
+# groups (platform_normalized / model_normalized afectados)
+collection_imported = _signals.signal('collection-imported')
+
+# Cambios por lotes desde la selección múltiple (sin señal por fila). kwargs: kind,
+# action ('delete' o 'update'), ids, groups (afectados, antes y después),
+# columns (columnas cambiadas; vacío al borrar), changes ({columna: valor nuevo};
+# vacío al borrar)
+collection_batch = _signals.signal('collection-batch')
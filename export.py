@@ -0,0 +1,121 @@
+import io
+import csv
+import json
+from datetime import datetime, timezone
+
+# Filas por fetchmany; la memoria del export depende de esto, no del tamaño de la colección
+EXPORT_BATCH_SIZE = 1000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# kind -> (tabla, columnas exportadas, (parámetro, columna con el id) del filtro por grupo)
+EXPORTS = {
+    'games': ('games', (
+        'id', 'title', 'release_date', 'manufacturer', 'description', 'genre', 'platform',
+        'platform_normalized', 'score', 'complete_in_box', 'condition', 'inventory', 'sealed',
+        'updated_at',
+    ), ('platform', 'platform_id')),
+    'consoles': ('consoles', (
+        'id', 'name', 'model', 'model_normalized', 'release_date', 'manufacturer',
+        'serial_number_box', 'serial_number_console', 'complete_in_box', 'condition',
+        'inventory', 'sealed', 'updated_at',
+    ), ('model', 'model_id')),
+}
+
+
+class InvalidExportFilter(ValueError):
+    """Parámetro de filtro con formato incorrecto (la ruta responde 400)"""
+
+
+def parse_updated_since(value):
+    """
+    '2024-05-01' o '2024-05-01T10:00:00' -> '2024-05-01 10:00:00' (formato de updated_at).
+    updated_at se guarda en UTC: una fecha con zona ('2024-05-01T12:00:00+02:00',
+    '...Z') se pasa a UTC; sin zona se toma como UTC.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError as e:
+        raise InvalidExportFilter(f"updated_since inválido: {value}") from e
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def export_query(kind, group_id=None, updated_since=None):
+    """
+    SELECT (y parámetros) de la exportación, ordenado por id para que sea estable.
+    `group_id` es el id de la plataforma/modelo (ver lookups.find).
+    """
+    table, columns, (_, group_column) = EXPORTS[kind]
+    conditions, params = [], []
+    if group_id is not None:
+        conditions.append(f'{group_column} = ?')
+        params.append(group_id)
+    if updated_since:
+        conditions.append('updated_at >= ?')
+        params.append(updated_since)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    return f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY id", tuple(params)
+
+
+def iter_batches(cursor, batch_size=EXPORT_BATCH_SIZE):
+    """Lotes de filas leídos con fetchmany (DictCursor o cursor sqlite3)"""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _json_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def ndjson_chunks(columns, batches):
+    """Un fragmento de texto por lote: una línea JSON por fila"""
+    encoder = json.JSONEncoder(ensure_ascii=False, default=_json_value, separators=(',', ':'))
+    for rows in batches:
+        yield ''.join(encoder.encode(dict(zip(columns, row))) + '\n' for row in rows)
+
+
+def csv_chunks(columns, batches):
+    """Cabecera y después un fragmento CSV por lote"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_export(conn, kind, fmt='ndjson', group_id=None, updated_since=None,
+                  batch_size=EXPORT_BATCH_SIZE):
+    """
+    Ejecuta la consulta ya (un error de SQL llega a la ruta antes de enviar cabeceras)
+    y retorna el generador con el contenido, que cierra `conn` al terminar. Si la
+    respuesta se descarta antes de empezar, la ruta la cierra con call_on_close.
+    """
+    _, columns, _ = EXPORTS[kind]
+    query, params = export_query(kind, group_id, updated_since)
+    to_chunks = csv_chunks if fmt == 'csv' else ndjson_chunks
+    cursor = conn.execute(query, params)
+
+    def generate():
+        try:
+            yield from to_chunks(columns, iter_batches(cursor, batch_size))
+        finally:
+            conn.close()
+
+    return generate()
@@ -0,0 +1,487 @@
+"""
+Filtros por facetas (género, condición, CIB, sellado, puntuación, año, fabricante)
+con recuentos en vivo, resueltos en memoria con mapas de bits.
+
+Por cada tipo (games/consoles) hay un índice columnar: para cada faceta, un
+array con el código de valor de cada fila (posición = id) y un mapa de bits por
+valor (un int de Python con el bit `id` activo). Cualquier combinación de
+filtros y los recuentos de todas las facetas salen de AND/OR y bit_count(), sin
+una consulta SQL por faceta. Las filas de la página siguen saliendo de SQL con
+los mismos filtros (where_clause), que respeta el orden y el cursor del listado.
+
+Las rutas de escritura lo mantienen por eventos y se reconstruye en segundo
+plano cuando la base tiene una versión de tabla más nueva (ver background_index.py).
+"""
+import time
+import logging
+import threading
+from array import array
+import counters
+from background_index import BackgroundIndex
+
+logger = logging.getLogger(__name__)
+
+# Valores seleccionables a la vez en una faceta: cada año añade una rama OR y dos
+# parámetros, y SQL Server admite 2100 parámetros por consulta
+MAX_SELECTED = 50
+
+
+class InvalidFacetFilter(ValueError):
+    """Filtro por facetas fuera de rango o con demasiados valores (la ruta responde 400)"""
+
+
+class KeyRange:
+    """Selección low..high (ambos incluidos) de una faceta de rango; no enumera los valores"""
+    __slots__ = ('low', 'high')
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def __contains__(self, key):
+        return isinstance(key, int) and not isinstance(key, bool) and self.low <= key <= self.high
+
+    def __eq__(self, other):
+        return isinstance(other, KeyRange) and (self.low, self.high) == (other.low, other.high)
+
+    def __repr__(self):
+        return f'KeyRange({self.low}, {self.high})'
+
+
+class Facet:
+    """
+    Args:
+        name: Parámetro de la URL
+        column: Columna de la tabla
+        label: Título en el panel
+        type: 'text', 'bool', 'int' o 'year' (año de una columna fecha)
+        bounds: (mínimo, máximo) de una faceta 'int' que se filtra por rango
+            (?score_min=&score_max=) en lugar de por valores sueltos
+    """
+
+    def __init__(self, name, column, label, type='text', bounds=None):
+        self.name = name
+        self.column = column
+        self.label = label
+        self.type = type
+        self.bounds = bounds
+
+    def key(self, raw):
+        """Valor indexado de una celda; None si no cuenta para la faceta"""
+        if raw is None:
+            return None
+        if self.type == 'text':
+            # SQL Server compara sin distinguir mayúsculas ni espacios finales
+            return str(raw).strip().lower() or None
+        if self.type == 'bool':
+            return bool(int(raw))
+        if self.type == 'year':
+            if hasattr(raw, 'year'):
+                return raw.year
+            text = str(raw)
+            return int(text[:4]) if text[:4].isdigit() else None
+        try:
+            return int(raw)
+        except (TypeError, ValueError):
+            return None
+
+    def parse(self, values):
+        """Claves seleccionadas a partir de los valores de request.args"""
+        keys = set()
+        for value in values:
+            value = value.strip()
+            if not value:
+                continue
+            if self.type == 'text':
+                keys.add(value.lower())
+            elif self.type == 'bool':
+                if value.lower() in ('1', 'true', 'yes', 'on'):
+                    keys.add(True)
+                elif value.lower() in ('0', 'false', 'no', 'off'):
+                    keys.add(False)
+            elif value.isdigit():
+                keys.add(int(value))
+        if len(keys) > MAX_SELECTED:
+            raise InvalidFacetFilter(f"{self.name}: como máximo {MAX_SELECTED} valores")
+        return keys
+
+    def parse_range(self, args):
+        """KeyRange de ?<name>_min=&<name>_max= acotado a bounds; None sin ninguno de los dos"""
+        low = args.get(f'{self.name}_min', type=int)
+        high = args.get(f'{self.name}_max', type=int)
+        if low is None and high is None:
+            return None
+        minimum, maximum = self.bounds
+        low = minimum if low is None else min(max(low, minimum), maximum)
+        high = maximum if high is None else min(max(high, minimum), maximum)
+        if low > high:
+            raise InvalidFacetFilter(f"{self.name}_min no puede ser mayor que {self.name}_max")
+        return KeyRange(low, high)
+
+    def sql(self, keys, variants=None):
+        """
+        (condición, parámetros) equivalentes a la selección `keys`. `variants`
+        ({clave: valores tal cual en la tabla}) sale del índice; sin él los textos
+        se comparan normalizados en SQL.
+        """
+        if isinstance(keys, KeyRange):
+            return f'{self.column} BETWEEN ? AND ?', [keys.low, keys.high]
+        if self.type == 'year':
+            ranges = [f'({self.column} >= ? AND {self.column} < ?)' for _ in keys]
+            params = [bound for year in sorted(keys) for bound in (f'{year:04d}-01-01', f'{year + 1:04d}-01-01')]
+            return f"({' OR '.join(ranges)})", params
+        if self.type == 'text' and variants is None:
+            params = sorted(keys)
+            return f"LOWER(TRIM({self.column})) IN ({', '.join('?' for _ in params)})", params
+        if self.type == 'text':
+            # Los valores tal cual están en la tabla (SQLite sí distingue mayúsculas)
+            params = sorted({raw for key in keys for raw in variants.get(key, (key,))})
+        elif self.type == 'bool':
+            params = [int(key) for key in sorted(keys)]
+        else:
+            params = sorted(keys)
+        return f"{self.column} IN ({', '.join('?' for _ in params)})", params
+
+
+FACETS = {
+    'games': [
+        Facet('genre', 'genre', 'Genre'),
+        Facet('manufacturer', 'manufacturer', 'Manufacturer'),
+        Facet('condition', 'condition', 'Condition'),
+        Facet('cib', 'complete_in_box', 'Complete in box', 'bool'),
+        Facet('sealed', 'sealed', 'Sealed', 'bool'),
+        Facet('score', 'score', 'Score', 'int', bounds=(0, 10)),
+        Facet('year', 'release_date', 'Release year', 'year'),
+    ],
+    'consoles': [
+        Facet('manufacturer', 'manufacturer', 'Manufacturer'),
+        Facet('condition', 'condition', 'Condition'),
+        Facet('cib', 'complete_in_box', 'Complete in box', 'bool'),
+        Facet('sealed', 'sealed', 'Sealed', 'bool'),
+        Facet('year', 'release_date', 'Release year', 'year'),
+    ],
+}
+
+def parse_filters(kind, args):
+    """
+    {faceta: claves (o KeyRange)} a partir de request.args; ?genre=RPG&genre=Action&score_min=7&cib=1.
+    Lanza InvalidFacetFilter con un rango invertido o demasiados valores.
+    """
+    filters = {}
+    for facet in FACETS[kind]:
+        if facet.bounds:
+            keys = facet.parse_range(args)
+        else:
+            keys = facet.parse(args.getlist(facet.name))
+        if keys:
+            filters[facet.name] = keys
+    return filters
+
+
+class FacetValue:
+    __slots__ = ('key', 'label', 'count', 'selected')
+
+    def __init__(self, key, label, count, selected):
+        self.key = key
+        self.label = label
+        self.count = count
+        self.selected = selected
+
+    @property
+    def param(self):
+        """El valor tal como va en la URL"""
+        if isinstance(self.key, bool):
+            return '1' if self.key else '0'
+        return str(self.label if isinstance(self.key, str) else self.key)
+
+    def to_dict(self):
+        return {'value': self.param, 'label': self.label, 'count': self.count, 'selected': self.selected}
+
+
+class FacetResult:
+    """Total filtrado, total del grupo sin filtros y [(Facet, [FacetValue])]"""
+
+    def __init__(self, total, unfiltered, facets, filters):
+        self.total = total
+        self.unfiltered = unfiltered
+        self.facets = facets
+        self.filters = filters
+
+    @property
+    def params(self):
+        """Parámetros de la URL que son filtros (el resto se conserva al filtrar)"""
+        names = set()
+        for facet, _ in self.facets:
+            names.update((f'{facet.name}_min', f'{facet.name}_max') if facet.bounds else (facet.name,))
+        return names
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'unfiltered': self.unfiltered,
+            'facets': {facet.name: [value.to_dict() for value in values] for facet, values in self.facets},
+        }
+
+
+def where_clause(kind, filters, index=None):
+    """(where, params) de SQL con los mismos filtros, para la consulta de la página"""
+    conditions, params = [], []
+    for facet in FACETS[kind]:
+        keys = filters.get(facet.name)
+        if keys:
+            variants = index.variants(facet, keys) if index is not None and facet.type == 'text' else None
+            condition, values = facet.sql(keys, variants)
+            conditions.append(condition)
+            params.extend(values)
+    return ' AND '.join(conditions), tuple(params)
+
+
+def _bits(ids):
+    """Mapa de bits con los bits `ids` activos, construido de una vez"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for row_id in ids:
+        buffer[row_id >> 3] |= 1 << (row_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class FacetIndex:
+    """
+    Índice de bits de un tipo. `group` (platform_normalized / model_normalized)
+    se indexa como una faceta más para acotar al listado actual.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        _, group_column = counters.KINDS[kind]
+        self.facets = FACETS[kind]
+        self._group = Facet('group', group_column, 'Group')
+        self._columns = [self._group] + self.facets
+        self._lock = threading.RLock()
+        self._all = 0
+        self._present = bytearray()                                   # 1 si el id está indexado
+        self._codes = {f.name: array('I') for f in self._columns}     # faceta -> código por id (0 = sin valor)
+        self._keys = {f.name: [None] for f in self._columns}          # faceta -> clave por código
+        self._code_of = {f.name: {} for f in self._columns}           # faceta -> {clave: código}
+        self._bitmaps = {f.name: [0] for f in self._columns}          # faceta -> mapa de bits por código
+        self._labels = {f.name: {} for f in self._columns}            # faceta -> {clave: texto mostrado}
+        self._variants = {f.name: {} for f in self._columns}          # faceta -> {clave: {valores en la tabla}}
+        # Versión de tabla (versions.ALL) que refleja el índice
+        self.version = None
+
+    def __len__(self):
+        return self._all.bit_count()
+
+    def _code(self, facet, raw):
+        key = facet.key(raw)
+        if key is None:
+            return 0
+        code = self._code_of[facet.name].get(key)
+        if code is None:
+            code = self._code_of[facet.name][key] = len(self._keys[facet.name])
+            self._keys[facet.name].append(key)
+            self._bitmaps[facet.name].append(0)
+            self._labels[facet.name][key] = str(raw).strip() if facet.type == 'text' else key
+        if facet.type == 'text':
+            self._variants[facet.name].setdefault(key, set()).add(raw)
+        return code
+
+    def _reserve(self, row_id):
+        if row_id >= len(self._present):
+            self._present.extend(bytes(max(row_id + 1, 2 * len(self._present)) - len(self._present)))
+        for codes in self._codes.values():
+            if row_id >= len(codes):
+                size = max(row_id + 1, 2 * len(codes))
+                codes.frombytes(bytes((size - len(codes)) * codes.itemsize))
+
+    def add(self, row):
+        """Indexa (o reindexa) una fila con id y las columnas de las facetas"""
+        row_id = row['id']
+        bit = 1 << row_id
+        with self._lock:
+            self._reserve(row_id)
+            for facet in self._columns:
+                codes = self._codes[facet.name]
+                bitmaps = self._bitmaps[facet.name]
+                old, new = codes[row_id], self._code(facet, row[facet.column])
+                if old != new:
+                    if old:
+                        bitmaps[old] &= ~bit
+                    if new:
+                        bitmaps[new] |= bit
+                    codes[row_id] = new
+            self._present[row_id] = 1
+            self._all |= bit
+
+    update = add
+
+    def _indexed(self, ids):
+        return [row_id for row_id in ids if row_id is not None and row_id < len(self._present)
+                and self._present[row_id]]
+
+    def remove(self, ids):
+        with self._lock:
+            ids = self._indexed(ids)
+            if not ids:
+                return
+            mask = _bits(ids)
+            for facet in self._columns:
+                codes = self._codes[facet.name]
+                for code in {codes[row_id] for row_id in ids} - {0}:
+                    self._bitmaps[facet.name][code] &= ~mask
+                for row_id in ids:
+                    codes[row_id] = 0
+            for row_id in ids:
+                self._present[row_id] = 0
+            self._all &= ~mask
+
+    def update_columns(self, ids, changes):
+        """Mismo valor nuevo en `changes` ({columna: valor}) para todas las filas `ids` (cambio por lotes)"""
+        with self._lock:
+            ids = self._indexed(ids)
+            if not ids:
+                return
+            mask = _bits(ids)
+            for facet in self._columns:
+                if facet.column not in changes:
+                    continue
+                codes = self._codes[facet.name]
+                bitmaps = self._bitmaps[facet.name]
+                new = self._code(facet, changes[facet.column])
+                for code in {codes[row_id] for row_id in ids} - {0, new}:
+                    bitmaps[code] &= ~mask
+                if new:
+                    bitmaps[new] |= mask
+                for row_id in ids:
+                    codes[row_id] = new
+
+    def search(self, filters, group=None):
+        """
+        Recuentos de todas las facetas con `filters` ({faceta: claves}) dentro de
+        `group`. Cada faceta cuenta con los filtros de las demás: muestra cuántas
+        filas habría al cambiar su selección.
+        """
+        with self._lock:
+            if group is None:
+                base = self._all
+            else:
+                code = self._code_of['group'].get(self._group.key(group))
+                base = self._bitmaps['group'][code] if code else 0
+
+            selected = {}
+            for facet in self.facets:
+                keys = filters.get(facet.name)
+                if keys:
+                    code_of = self._code_of[facet.name]
+                    if isinstance(keys, KeyRange):
+                        # Sólo las claves que existen en el índice, no todo el rango
+                        codes = [code for key, code in code_of.items() if key in keys]
+                    else:
+                        codes = [code_of.get(key) for key in keys]
+                    union = 0
+                    for code in codes:
+                        if code:
+                            union |= self._bitmaps[facet.name][code]
+                    selected[facet.name] = union
+
+            matched = base
+            for union in selected.values():
+                matched &= union
+
+            results = []
+            for facet in self.facets:
+                scope = base
+                for name, union in selected.items():
+                    if name != facet.name:
+                        scope &= union
+                chosen = filters.get(facet.name, ())
+                values = []
+                for code, bitmap in enumerate(self._bitmaps[facet.name]):
+                    if not code:
+                        continue
+                    key = self._keys[facet.name][code]
+                    count = (bitmap & scope).bit_count()
+                    if count or key in chosen:
+                        values.append(FacetValue(key, self._labels[facet.name][key], count, key in chosen))
+                if facet.type == 'text':
+                    values.sort(key=lambda v: (-v.count, v.label.casefold()))
+                else:
+                    values.sort(key=lambda v: v.key)
+                results.append((facet, values))
+
+            return FacetResult(matched.bit_count(), base.bit_count(), results, filters)
+
+    def variants(self, facet, keys):
+        """{clave: valores tal cual en la tabla} de `keys`"""
+        with self._lock:
+            known = self._variants[facet.name]
+            return {key: set(known[key]) for key in keys if key in known}
+
+    def build(self, conn, version=None):
+        """Indexa todas las filas de la conexión dada"""
+        started = time.perf_counter()
+        table, _ = counters.KINDS[self.kind]
+        columns = ', '.join(['id'] + [facet.column for facet in self._columns])
+        with self._lock:
+            members = {facet.name: {} for facet in self._columns}   # faceta -> {código: [ids]}
+            all_ids = []
+            for row in conn.execute(f'SELECT {columns} FROM {table}'):
+                row_id = row['id']
+                self._reserve(row_id)
+                self._present[row_id] = 1
+                all_ids.append(row_id)
+                for facet in self._columns:
+                    code = self._code(facet, row[facet.column])
+                    self._codes[facet.name][row_id] = code
+                    if code:
+                        members[facet.name].setdefault(code, []).append(row_id)
+            for name, by_code in members.items():
+                for code, ids in by_code.items():
+                    self._bitmaps[name][code] = _bits(ids)
+            self._all = _bits(all_ids)
+            self.version = version
+        logger.info(f"Índice de facetas de {table} construido: {len(all_ids)} filas "
+                    f"en {time.perf_counter() - started:.1f}s")
+        return self
+
+
+# ---- Índices globales (uno por tipo) ----
+
+_indexes = {
+    kind: BackgroundIndex(kind, lambda conn, version, kind=kind: FacetIndex(kind).build(conn, version),
+                          f'índice de facetas de {kind}')
+    for kind in FACETS
+}
+
+
+def start_build(kind):
+    """Construye el índice de `kind` en segundo plano (p. ej. al arrancar un worker)"""
+    _indexes[kind].start_build()
+
+
+def get_index(kind, version=None):
+    """
+    Índice de `kind`; None mientras se construye por primera vez. Con `version`
+    (la versión ALL actual de la base) se reconstruye si el índice es más viejo.
+    """
+    return _indexes[kind].get(version)
+
+
+def search(kind, filters, group=None):
+    """FacetIndex.search sobre el índice global; None mientras se construye por primera vez"""
+    index = get_index(kind)
+    return index.search(filters, group) if index is not None else None
+
+
+def is_current(kind, version):
+    """True si el índice existe y refleja `version`; si no, lanza la reconstrucción"""
+    return _indexes[kind].is_current(version)
+
+
+# ---- Mantenimiento incremental desde las rutas de escritura ----
+
+for _kind in FACETS:
+    _indexes[_kind].subscribe(update=FacetIndex.update, remove=FacetIndex.remove,
+                              update_columns=FacetIndex.update_columns)
@@ -0,0 +1,24 @@
+"""
+Configuración de gunicorn para producción (gunicorn -c gunicorn.conf.py).
+Variables de entorno: PORT, WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_TIMEOUT.
+"""
+import os
+import multiprocessing
+
+wsgi_app = 'wsgi:application'
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Hilos por worker: uno por conexión del pool (DB_POOL_MAX_SIZE)
+threads = int(os.getenv('GUNICORN_THREADS', os.getenv('DB_POOL_MAX_SIZE', 10)))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+# La app se carga en el maestro antes del fork (ver wsgi.py)
+preload_app = True
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    # Cada worker construye sus índices de autocompletado y búsqueda en segundo plano al arrancar
+    import autocomplete
+    import search
+    autocomplete.start_build()
+    search.get_search_index()
@@ -0,0 +1,332 @@
+import io
+import csv
+import json
+import time
+import logging
+from datetime import datetime, timezone
+import counters
+import events
+import lookups
+
+logger = logging.getLogger(__name__)
+
+# Filas por transacción al cargar
+IMPORT_CHUNK_SIZE = 5000
+# Parámetros por consulta al comprobar series existentes (SQL Server admite 2100)
+_LOOKUP_BATCH = 500
+
+TRUE_VALUES = {'1', 'true', 'on', 'yes', 'y', 'si', 'sí', 'x'}
+
+GAME_COLUMNS = (
+    'title', 'release_date', 'manufacturer', 'description', 'genre', 'platform',
+    'platform_id', 'platform_normalized', 'score', 'complete_in_box', 'condition', 'inventory', 'sealed',
+    'updated_at',
+)
+CONSOLE_COLUMNS = (
+    'name', 'model', 'model_id', 'model_normalized', 'release_date', 'manufacturer',
+    'serial_number_box', 'serial_number_console', 'complete_in_box', 'condition',
+    'inventory', 'sealed', 'updated_at',
+)
+
+GAME_REQUIRED = ('title', 'release_date', 'manufacturer', 'genre', 'platform', 'score', 'condition', 'inventory')
+CONSOLE_REQUIRED = ('name', 'model', 'release_date', 'manufacturer', 'serial_number_box',
+                    'serial_number_console', 'condition', 'inventory')
+
+
+class ImportFormatError(ValueError):
+    """El archivo no se puede leer como CSV/NDJSON (la ruta responde 400)"""
+
+
+def _text(record, field):
+    value = record.get(field)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _flag(record, field):
+    value = record.get(field)
+    if isinstance(value, bool):
+        return value
+    return _text(record, field).lower() in TRUE_VALUES
+
+
+def _integer(record, field, errors):
+    try:
+        return int(_text(record, field))
+    except ValueError:
+        errors.append(f"{field} debe ser un número entero")
+        return None
+
+
+def _missing(record, required):
+    return [field for field in required if not _text(record, field)]
+
+
+def validate_game(record):
+    """
+    Aplica las reglas de add_game a un registro (dict de texto).
+    Retorna (juego, errores); juego es None si hay errores.
+    """
+    missing = _missing(record, GAME_REQUIRED)
+    if missing:
+        return None, [f"Campos requeridos vacíos: {', '.join(missing)}"]
+
+    errors = []
+    score = _integer(record, 'score', errors)
+    inventory = _integer(record, 'inventory', errors)
+    if score is not None and not (0 <= score <= 10):
+        errors.append("Score must be between 0 and 10.")
+    if inventory is not None and inventory < 0:
+        errors.append("Inventory cannot be negative.")
+    if errors:
+        return None, errors
+
+    platform = _text(record, 'platform')
+    return {
+        'title': _text(record, 'title'),
+        'release_date': _text(record, 'release_date'),
+        'manufacturer': _text(record, 'manufacturer'),
+        'description': _text(record, 'description') or None,
+        'genre': _text(record, 'genre'),
+        'platform': platform,
+        'score': score,
+        'complete_in_box': _flag(record, 'complete_in_box'),
+        'condition': _text(record, 'condition'),
+        'inventory': inventory,
+        'sealed': _flag(record, 'sealed'),
+    }, []
+
+
+def validate_console(record):
+    """Reglas de add_console salvo la unicidad de serial_number_console, que se comprueba por lotes"""
+    missing = _missing(record, CONSOLE_REQUIRED)
+    if missing:
+        return None, [f"Campos requeridos vacíos: {', '.join(missing)}"]
+
+    errors = []
+    inventory = _integer(record, 'inventory', errors)
+    if inventory is not None and inventory < 0:
+        errors.append("Inventory cannot be negative.")
+    if errors:
+        return None, errors
+
+    model = _text(record, 'model')
+    return {
+        'name': _text(record, 'name'),
+        'model': model,
+        'release_date': _text(record, 'release_date'),
+        'manufacturer': _text(record, 'manufacturer'),
+        'serial_number_box': _text(record, 'serial_number_box'),
+        'serial_number_console': _text(record, 'serial_number_console'),
+        'complete_in_box': _flag(record, 'complete_in_box'),
+        'condition': _text(record, 'condition'),
+        'inventory': inventory,
+        'sealed': _flag(record, 'sealed'),
+    }, []
+
+
+# kind -> (tabla, columnas insertadas, validador, columna de agrupación)
+KINDS = {
+    'games': ('games', GAME_COLUMNS, validate_game, 'platform_normalized'),
+    'consoles': ('consoles', CONSOLE_COLUMNS, validate_console, 'model_normalized'),
+}
+
+
+def detect_format(filename, declared=None):
+    if declared:
+        if declared not in ('csv', 'ndjson'):
+            raise ImportFormatError(f"Formato no soportado: {declared}")
+        return declared
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return 'csv'
+
+
+def read_records(stream, fmt):
+    """
+    (línea, registro) de un archivo de texto CSV (con cabecera) o NDJSON.
+    La línea es la del archivo, para el reporte de errores.
+    """
+    if fmt == 'ndjson':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, {'__error__': f"JSON inválido: {e.msg}"}
+                continue
+            if not isinstance(record, dict):
+                record = {'__error__': "Cada línea debe ser un objeto JSON"}
+            yield line_number, record
+        return
+
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames:
+        raise ImportFormatError("El CSV está vacío o no tiene cabecera")
+    for record in reader:
+        yield reader.line_num, record
+
+
+def text_stream(binary, encoding='utf-8-sig'):
+    """Envuelve un archivo binario (p. ej. request.files[...]) para leerlo como texto"""
+    return io.TextIOWrapper(binary, encoding=encoding, newline='')
+
+
+class ImportReport:
+    """Resultado por fila de una importación"""
+
+    def __init__(self, kind, max_errors=1000):
+        self.kind = kind
+        self.max_errors = max_errors
+        self.total = 0
+        self.valid = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+        self.seconds = 0.0
+        self.dry_run = False
+        self.aborted = False
+
+    def add_error(self, line, messages):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': messages})
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'total': self.total,
+            'valid': self.valid,
+            'imported': self.imported,
+            'rejected': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+            'dry_run': self.dry_run,
+            'aborted': self.aborted,
+            'seconds': round(self.seconds, 3),
+        }
+
+
+def _existing_serials(conn, serials):
+    """Series de la lista que ya están en consoles"""
+    serials = list(serials)
+    existing = set()
+    for i in range(0, len(serials), _LOOKUP_BATCH):
+        batch = serials[i:i + _LOOKUP_BATCH]
+        placeholders = ', '.join('?' for _ in batch)
+        rows = conn.execute(
+            f'SELECT serial_number_console FROM consoles WHERE serial_number_console IN ({placeholders})',
+            tuple(batch)
+        ).fetchall()
+        existing.update(row[0] for row in rows)
+    return existing
+
+
+def validate_records(conn, kind, records, report):
+    """Primera pasada: valida todo el archivo y retorna [(línea, fila)] válidas"""
+    _, _, validate, _ = KINDS[kind]
+    valid = []
+    serial_lines = {}
+    for line, record in records:
+        report.total += 1
+        if '__error__' in record:
+            report.add_error(line, [record['__error__']])
+            continue
+        row, errors = validate(record)
+        if errors:
+            report.add_error(line, errors)
+            continue
+        if kind == 'consoles':
+            serial = row['serial_number_console']
+            if serial in serial_lines:
+                report.add_error(line, [f'serial_number_console "{serial}" repetido (línea {serial_lines[serial]})'])
+                continue
+            serial_lines[serial] = line
+        valid.append((line, row))
+
+    if kind == 'consoles' and valid:
+        taken = _existing_serials(conn, serial_lines)
+        if taken:
+            kept = []
+            for line, row in valid:
+                if row['serial_number_console'] in taken:
+                    report.add_error(line, [f'Ya existe una consola con el número de serie "{row["serial_number_console"]}"'])
+                else:
+                    kept.append((line, row))
+            valid = kept
+            report.errors.sort(key=lambda error: error['line'])
+
+    report.valid = len(valid)
+    return valid
+
+
+def load_rows(conn, kind, rows, report, groups, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Segunda pasada: inserta con executemany en transacciones de `chunk_size` filas.
+    Cada lote actualiza los contadores en su misma transacción; `groups` recibe
+    los grupos de los lotes confirmados.
+    """
+    table, columns, _, group_column = KINDS[kind]
+    _, _, id_column, source_column, _ = lookups.KINDS[kind]
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    updated_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            # Plataforma/modelo de cada valor distinto del lote, en su misma transacción
+            resolved = {}
+            params = []
+            deltas = {}
+            for _, row in chunk:
+                text = row[source_column]
+                if text not in resolved:
+                    resolved[text] = lookups.resolve(conn, kind, text)
+                row[id_column], row[group_column] = resolved[text]
+                row['updated_at'] = updated_at
+                params.append(tuple(row[column] for column in columns))
+                items, inventory = deltas.get(row[group_column], (0, 0))
+                deltas[row[group_column]] = (items + 1, inventory + row['inventory'])
+            conn.executemany(query, params)
+            counters.apply_deltas(conn, kind, deltas)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        report.imported += len(chunk)
+        groups.update(deltas)
+
+
+def import_records(conn, kind, records, chunk_size=IMPORT_CHUNK_SIZE, strict=False, dry_run=False,
+                   max_errors=1000):
+    """
+    Valida y carga `records` (iterable de (línea, dict)) en `kind` ('games' o 'consoles').
+
+    Args:
+        strict: Si hay cualquier fila inválida no se importa nada
+        dry_run: Sólo validar
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Tipo de importación desconocido: {kind}")
+    report = ImportReport(kind, max_errors=max_errors)
+    report.dry_run = dry_run
+    start = time.perf_counter()
+
+    valid = validate_records(conn, kind, records, report)
+    if dry_run or (strict and report.error_count):
+        report.aborted = strict and report.error_count > 0
+    elif valid:
+        groups = set()
+        try:
+            load_rows(conn, kind, valid, report, groups, chunk_size)
+        finally:
+            # Aunque un lote falle, los anteriores ya están confirmados: avisar a cachés e índices
+            if report.imported:
+                events.collection_imported.send(__name__, kind=kind, groups=groups)
+        logger.info(f"Importados {report.imported} registros en {kind} ({report.error_count} rechazados)")
+
+    report.seconds = time.perf_counter() - start
+    return report
@@ -0,0 +1,208 @@
+"""
+Tablas de referencia de plataformas (juegos) y modelos (consolas) con clave entera.
+
+platforms / console_models guardan el nombre canónico y su slug ("playstation2");
+platform_aliases / console_model_aliases llevan cada forma escrita, normalizada
+("ps2", "playstation2", "sonyplaystation2"), a su id. games.platform_id y
+consoles.model_id referencian esas tablas y los filtros de los listados comparan
+ese entero. platform_normalized / model_normalized se quedan como copia del slug
+canónico: es la clave de grupo de contadores, versiones, caché de páginas y URLs.
+
+Un valor que no tiene alias crea su propia entrada (nombre tal cual, slug = alias).
+"""
+import time
+import logging
+import threading
+import counters
+import versions
+from connection import get_sqlserver_connection
+from dialect import dialect_of, insert_returning, is_unique_violation
+
+logger = logging.getLogger(__name__)
+
+# kind -> (tabla, tabla de alias, columna con el id, columna con el texto, columna con el slug)
+KINDS = {
+    'games': ('platforms', 'platform_aliases', 'platform_id', 'platform', 'platform_normalized'),
+    'consoles': ('console_models', 'console_model_aliases', 'model_id', 'model', 'model_normalized'),
+}
+
+# (familia, nombre, slug, alias). Los slugs son los de las URLs que ya existían;
+# el slug y el nombre normalizado también son alias.
+CANONICAL = [
+    ('PlayStation', 'PlayStation 1', 'playstation1', ('ps1', 'psx', 'psone', 'playstation', 'sonyplaystation')),
+    ('PlayStation', 'PlayStation 2', 'playstation2', ('ps2', 'sonyplaystation2')),
+    ('PlayStation', 'PlayStation 3', 'playstation3', ('ps3', 'sonyplaystation3')),
+    ('PlayStation', 'PlayStation 4', 'playstation4', ('ps4', 'sonyplaystation4')),
+    ('PlayStation', 'PlayStation 5', 'playstation5', ('ps5', 'sonyplaystation5')),
+    ('Nintendo', 'Nintendo 64', 'nintendo64', ('n64',)),
+    ('Nintendo', 'GameCube', 'gamecube', ('gc', 'ngc', 'nintendogamecube')),
+    ('Nintendo', 'Wii', 'wii', ('nintendowii',)),
+    ('Nintendo', 'Wii U', 'wiiu', ('nintendowiiu',)),
+    ('Nintendo', 'Switch', 'switch', ('nintendoswitch', 'ns')),
+    ('Xbox', 'Xbox', 'xbox', ('microsoftxbox',)),
+    ('Xbox', 'Xbox 360', 'xbox360', ('x360', 'microsoftxbox360')),
+    ('Xbox', 'Xbox One', 'xboxone', ('xb1', 'microsoftxboxone')),
+]
+
+# Segundos que se reutiliza la lista del menú lateral (las entradas nuevas son raras)
+SIDEBAR_TTL = 60
+
+# alias -> (id, slug, nombre) de entradas confirmadas; nunca cambian, así que no caducan
+_found = {kind: {} for kind in KINDS}
+# kind -> (caduca, [(familia, [(nombre, slug)])])
+_sidebar = {}
+_sidebar_lock = threading.Lock()
+
+
+def normalize(text):
+    """Forma comparable de un nombre: sólo letras y números, en minúsculas ("PS-2" -> "ps2")"""
+    if text is None:
+        return ''
+    return ''.join(ch for ch in str(text).lower() if ch.isalnum())
+
+
+def seed(conn, kind):
+    """Añade las entradas de CANONICAL que falten y sus alias (en la transacción actual)"""
+    table, alias_table, id_column, _, _ = KINDS[kind]
+    existing = {row[0]: row[1] for row in conn.execute(f'SELECT slug, id FROM {table}').fetchall()}
+    known = {row[0] for row in conn.execute(f'SELECT alias FROM {alias_table}').fetchall()}
+    for position, (family, name, slug, aliases) in enumerate(CANONICAL, start=1):
+        entry_id = existing.get(slug)
+        if entry_id is None:
+            entry_id = conn.execute(
+                insert_returning(dialect_of(conn), table, ['name', 'slug', 'family', 'position']),
+                (name, slug, family, position)
+            ).fetchone()[0]
+        for alias in sorted({slug, normalize(name), *aliases} - known):
+            conn.execute(f'INSERT INTO {alias_table} (alias, {id_column}) VALUES (?, ?)', (alias, entry_id))
+            known.add(alias)
+
+
+def _select(conn, kind, alias):
+    table, alias_table, id_column, _, _ = KINDS[kind]
+    row = conn.execute(f'''
+        SELECT e.id, e.slug, e.name FROM {alias_table} a
+        JOIN {table} e ON e.id = a.{id_column}
+        WHERE a.alias = ?
+    ''', (alias,)).fetchone()
+    return (row[0], row[1], row[2]) if row else None
+
+
+def resolve(conn, kind, text):
+    """
+    (id, slug) del valor escrito `text`, creando la entrada si no tiene alias;
+    (None, None) si está vacío. Para las rutas de escritura: se llama dentro de su
+    transacción, así que una entrada nueva se deshace con ella (no se cachea).
+    """
+    alias = normalize(text)
+    if not alias:
+        return None, None
+    found = _select(conn, kind, alias)
+    if found is None:
+        table, alias_table, id_column, _, _ = KINDS[kind]
+        try:
+            entry_id = conn.execute(
+                insert_returning(dialect_of(conn), table, ['name', 'slug']), (str(text).strip(), alias)
+            ).fetchone()[0]
+            conn.execute(f'INSERT INTO {alias_table} (alias, {id_column}) VALUES (?, ?)', (alias, entry_id))
+        except Exception as e:
+            # Otro worker ha creado la misma entrada a la vez
+            if not is_unique_violation(e):
+                raise
+            found = _select(conn, kind, alias)
+            if found is None:
+                raise
+        else:
+            logger.info(f"Nueva entrada en {table}: {str(text).strip()} ({alias})")
+            with _sidebar_lock:
+                _sidebar.pop(kind, None)
+            return entry_id, alias
+    return found[0], found[1]
+
+
+def find(kind, text, conn=None):
+    """
+    (id, slug, nombre) de `text` para filtrar un listado; None si no existe.
+    Sólo lectura y cacheado por proceso; sin `conn` abre una conexión si no está en caché.
+    """
+    alias = normalize(text)
+    if not alias:
+        return None
+    found = _found[kind].get(alias)
+    if found is None:
+        if conn is None:
+            own = get_sqlserver_connection()
+            try:
+                found = _select(own, kind, alias)
+            finally:
+                own.close()
+        else:
+            found = _select(conn, kind, alias)
+        if found is not None:
+            _found[kind][alias] = found
+    return found
+
+
+def sidebar(kind):
+    """Entradas agrupadas por familia para el menú lateral: [(familia, [(nombre, slug)])]"""
+    now = time.monotonic()
+    with _sidebar_lock:
+        cached = _sidebar.get(kind)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+    table = KINDS[kind][0]
+    conn = get_sqlserver_connection()
+    try:
+        rows = conn.execute(f'SELECT name, slug, family, position FROM {table}').fetchall()
+    except Exception as e:
+        # Sin el menú la página sigue funcionando (p. ej. base sin migrar)
+        logger.error(f"No se pudo leer {table}: {e}")
+        rows = []
+    finally:
+        conn.close()
+    # Primero las de CANONICAL en su orden; después las creadas al escribir, por nombre
+    rows = sorted(((row[0], row[1], row[2], row[3]) for row in rows),
+                  key=lambda row: (row[3] is None, row[3] or 0, row[0].casefold()))
+    groups = []
+    for name, slug, family, _ in rows:
+        family = family or 'Other'
+        if not groups or groups[-1][0] != family:
+            groups.append((family, []))
+        groups[-1][1].append((name, slug))
+    with _sidebar_lock:
+        _sidebar[kind] = (now + SIDEBAR_TTL, groups)
+    return groups
+
+
+def backfill(conn, kinds=None):
+    """
+    Rellena platform_id/model_id de las filas que no lo tienen (tablas migradas o
+    filas insertadas por herramientas que no pasan por resolve) y cambia su
+    *_normalized por el slug canónico, en la transacción actual. Si algún slug
+    cambia se recalculan los contadores del tipo y suben las versiones de sus grupos.
+    Retorna {kind: grupos cuyo slug cambió}.
+    """
+    changed = {}
+    for kind in kinds or KINDS:
+        table, _ = counters.KINDS[kind]
+        _, _, id_column, text_column, slug_column = KINDS[kind]
+        pairs = conn.execute(f'''
+            SELECT DISTINCT {text_column}, {slug_column} FROM {table}
+            WHERE {id_column} IS NULL AND {text_column} IS NOT NULL
+        ''').fetchall()
+        groups = set()
+        for text, old_slug in ((row[0], row[1]) for row in pairs):
+            entry_id, slug = resolve(conn, kind, text)
+            if entry_id is None:
+                continue
+            conn.execute(f'''
+                UPDATE {table} SET {id_column} = ?, {slug_column} = ?
+                WHERE {id_column} IS NULL AND {text_column} = ?
+            ''', (entry_id, slug, text))
+            if old_slug != slug:
+                groups.update(group for group in (old_slug, slug) if group is not None)
+        if groups:
+            counters.rebuild(conn, [kind])
+            versions.bump(conn, kind, groups)
+            changed[kind] = groups
+    return changed
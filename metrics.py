@@ -0,0 +1,131 @@
+"""
+Exportación en formato de texto de Prometheus de las estadísticas de la app:
+sentencias SQL (query_stats), pool de conexiones, cachés y verificación de contraseñas.
+"""
+import connection
+from query_stats import query_stats, QUERY_BUCKETS
+from passwords import password_verifier, LATENCY_BUCKETS
+from user_cache import user_cache
+from page_cache import page_cache
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PREFIX = 'videogames'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+class MetricsWriter:
+    """Acumula familias de métricas y las serializa con sus líneas HELP/TYPE"""
+
+    def __init__(self):
+        self._lines = []
+
+    def family(self, name, kind, help_text):
+        self._lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+        self._lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+
+    def sample(self, name, value, **labels):
+        self._lines.append(f'{PREFIX}_{name}{_labels(labels)} {float(value):g}')
+
+    def histogram(self, name, bounds, counts, total, **labels):
+        """`counts` son conteos por intervalo (no acumulados), con el de +Inf al final"""
+        cumulative = 0
+        for bound, count in zip(list(bounds) + ['+Inf'], counts):
+            cumulative += count
+            self.sample(f'{name}_bucket', cumulative, le=bound, **labels)
+        self.sample(f'{name}_sum', total, **labels)
+        self.sample(f'{name}_count', cumulative, **labels)
+
+    def render(self):
+        return '\n'.join(self._lines) + '\n'
+
+
+def _write_queries(writer):
+    stats = query_stats.stats()
+
+    writer.family('query_duration_seconds', 'histogram', 'Tiempo de ejecución por huella de sentencia SQL')
+    for key, entry in stats['queries'].items():
+        writer.histogram('query_duration_seconds', QUERY_BUCKETS, entry['buckets'], entry['total'], query=key)
+
+    writer.family('query_duration_max_seconds', 'gauge', 'Ejecución más lenta por huella de sentencia')
+    for key, entry in stats['queries'].items():
+        writer.sample('query_duration_max_seconds', entry['max'], query=key)
+
+    writer.family('query_rows_total', 'counter', 'Filas leídas por huella de sentencia')
+    for key, entry in stats['queries'].items():
+        writer.sample('query_rows_total', entry['rows'], query=key)
+
+    writer.family('query_errors_total', 'counter', 'Ejecuciones fallidas por huella de sentencia')
+    for key, entry in stats['queries'].items():
+        writer.sample('query_errors_total', entry['errors'], query=key)
+
+    writer.family('slow_queries_total', 'counter', 'Sentencias por encima de SLOW_QUERY_MS')
+    writer.sample('slow_queries_total', stats['slow_queries'])
+
+    writer.family('endpoint_requests_total', 'counter', 'Peticiones atendidas por endpoint')
+    for endpoint, entry in stats['endpoints'].items():
+        writer.sample('endpoint_requests_total', entry['requests'], endpoint=endpoint)
+
+    writer.family('endpoint_queries_total', 'counter', 'Sentencias SQL ejecutadas por endpoint')
+    for endpoint, entry in stats['endpoints'].items():
+        writer.sample('endpoint_queries_total', entry['queries'], endpoint=endpoint)
+
+    writer.family('endpoint_query_seconds_total', 'counter', 'Tiempo en SQL acumulado por endpoint')
+    for endpoint, entry in stats['endpoints'].items():
+        writer.sample('endpoint_query_seconds_total', entry['time'], endpoint=endpoint)
+
+    writer.family('endpoint_queries_max', 'gauge', 'Máximo de sentencias en una sola petición')
+    for endpoint, entry in stats['endpoints'].items():
+        writer.sample('endpoint_queries_max', entry['max_queries'], endpoint=endpoint)
+
+
+def _write_counters(writer, name, help_text, stats, counters, gauges=()):
+    for key in counters:
+        writer.family(f'{name}_{key}_total', 'counter', f'{help_text}: {key}')
+        writer.sample(f'{name}_{key}_total', stats.get(key, 0))
+    for key in gauges:
+        writer.family(f'{name}_{key}', 'gauge', f'{help_text}: {key}')
+        writer.sample(f'{name}_{key}', stats.get(key, 0))
+
+
+def _write_pool(writer):
+    stats = connection.pool_stats()
+    if stats is None:
+        return
+    _write_counters(writer, 'db_pool', 'Pool de conexiones', stats,
+                    ('checkouts', 'waits', 'timeouts', 'creations', 'closed_idle',
+                     'recycled', 'pings', 'ping_failures', 'discarded'),
+                    ('size', 'idle', 'in_use', 'max_size'))
+
+
+def _write_caches(writer):
+    _write_counters(writer, 'user_cache', 'Caché de usuarios', user_cache.stats(),
+                    ('hits', 'misses', 'evictions', 'expirations', 'invalidations'), ('size',))
+    _write_counters(writer, 'page_cache', 'Caché de listados', page_cache.stats(), ('hits', 'misses'))
+
+
+def _write_passwords(writer):
+    stats = password_verifier.stats()
+    _write_counters(writer, 'password', 'Verificación de contraseñas', stats,
+                    ('verifications', 'failures', 'rejections', 'timeouts', 'rehashes'), ('pending',))
+    writer.family('password_verify_seconds', 'histogram', 'Tiempo de verificación bcrypt')
+    writer.histogram('password_verify_seconds', LATENCY_BUCKETS,
+                     list(stats['latency_buckets'].values()), stats['latency_total'])
+
+
+def render_metrics():
+    """Texto completo para el endpoint /metrics"""
+    writer = MetricsWriter()
+    _write_queries(writer)
+    _write_pool(writer)
+    _write_caches(writer)
+    _write_passwords(writer)
+    return writer.render()
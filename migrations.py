@@ -0,0 +1,416 @@
+"""
+Migraciones versionadas del esquema para SQLite y SQL Server.
+
+Cada migración tiene un número de versión y un paso por dialecto. Los pasos son
+idempotentes (IF NOT EXISTS / comprobaciones previas), así que una base creada
+antes de existir este módulo se pone al día sin errores. La versión aplicada se
+guarda en schema_migrations.
+"""
+import logging
+from datetime import datetime, timezone
+import counters
+import versions
+import lookups
+from dialect import dialect_of, SQLITE, SQLSERVER
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = 'schema_migrations'
+
+
+class Migration:
+    """
+    Args:
+        version: Número de versión, creciente
+        name: Descripción corta
+        upgrade: Función (conn, dialect) que aplica la migración
+    """
+
+    def __init__(self, version, name, upgrade):
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+
+
+# ---- Introspección ----
+
+def table_exists(conn, table):
+    if dialect_of(conn) == SQLITE:
+        query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?"
+    else:
+        query = "SELECT name FROM sys.tables WHERE name = ?"
+    return conn.execute(query, (table,)).fetchone() is not None
+
+
+def column_exists(conn, table, column):
+    if dialect_of(conn) == SQLITE:
+        return any(row[1] == column for row in conn.execute(f'PRAGMA table_info({table})').fetchall())
+    return conn.execute(
+        'SELECT 1 FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ? AND COLUMN_NAME = ?', (table, column)
+    ).fetchone() is not None
+
+
+def index_exists(conn, table, index):
+    if dialect_of(conn) == SQLITE:
+        query = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND name = ?"
+    else:
+        query = "SELECT name FROM sys.indexes WHERE object_id = OBJECT_ID(?) AND name = ?"
+    return conn.execute(query, (table, index)).fetchone() is not None
+
+
+def create_index(conn, table, index, columns, unique=False, where=None):
+    """`where` crea un índice filtrado/parcial (ambos dialectos lo soportan)"""
+    if not index_exists(conn, table, index):
+        conn.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {index} ON {table} ({', '.join(columns)})"
+                     + (f' WHERE {where}' if where else ''))
+
+
+def drop_index(conn, table, index):
+    if index_exists(conn, table, index):
+        if dialect_of(conn) == SQLITE:
+            conn.execute(f'DROP INDEX {index}')
+        else:
+            conn.execute(f'DROP INDEX {index} ON {table}')
+
+
+def add_column(conn, table, column, definition):
+    if not column_exists(conn, table, column):
+        conn.execute(f'ALTER TABLE {table} ADD {column} {definition}')
+        return True
+    return False
+
+
+# ---- Migraciones ----
+
+_TABLES = {
+    SQLITE: {
+        'users': '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL
+        ''',
+        'consoles': '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            model TEXT NOT NULL,
+            model_normalized TEXT,
+            release_date INTEGER,
+            manufacturer TEXT NOT NULL,
+            serial_number_box TEXT,
+            serial_number_console TEXT,
+            complete_in_box BOOLEAN,
+            condition TEXT,
+            inventory INTEGER,
+            sealed INTEGER
+        ''',
+        'games': '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            release_date INTEGER,
+            manufacturer TEXT NOT NULL,
+            description TEXT,
+            genre TEXT,
+            platform TEXT,
+            platform_normalized TEXT,
+            score INTEGER,
+            complete_in_box BOOLEAN,
+            condition TEXT,
+            inventory INTEGER,
+            sealed INTEGER
+        ''',
+    },
+    # release_date DATE: la app escribe 'YYYY-MM-DD' (la base existente se convirtió con
+    # tools/fix_date_columns_azure.py)
+    SQLSERVER: {
+        'users': '''
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            username NVARCHAR(100) NOT NULL UNIQUE,
+            password_hash NVARCHAR(255) NOT NULL
+        ''',
+        'consoles': '''
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            name NVARCHAR(255) NOT NULL,
+            model NVARCHAR(255) NOT NULL,
+            model_normalized NVARCHAR(255),
+            release_date DATE,
+            manufacturer NVARCHAR(255) NOT NULL,
+            serial_number_box NVARCHAR(255),
+            serial_number_console NVARCHAR(255),
+            complete_in_box BIT,
+            condition NVARCHAR(50),
+            inventory INT,
+            sealed BIT
+        ''',
+        'games': '''
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            title NVARCHAR(255) NOT NULL,
+            release_date DATE,
+            manufacturer NVARCHAR(255) NOT NULL,
+            description NVARCHAR(MAX),
+            genre NVARCHAR(100),
+            platform NVARCHAR(255),
+            platform_normalized NVARCHAR(255),
+            score INT,
+            complete_in_box BIT,
+            condition NVARCHAR(50),
+            inventory INT,
+            sealed BIT
+        ''',
+    },
+}
+
+
+def _baseline(conn, dialect):
+    """Tablas users, consoles y games tal como las creaba models.init_db"""
+    for table, columns in _TABLES[dialect].items():
+        if not table_exists(conn, table):
+            conn.execute(f'CREATE TABLE {table} ({columns})')
+
+
+def _user_roles(conn, dialect):
+    """users.role (lo mismo que tools/add_role_column.py)"""
+    definition = "TEXT NOT NULL DEFAULT 'viewer'" if dialect == SQLITE else "NVARCHAR(50) NOT NULL DEFAULT 'viewer'"
+    add_column(conn, 'users', 'role', definition)
+
+
+def _updated_at(conn, dialect):
+    """games/consoles.updated_at para el filtro updated_since de la exportación"""
+    definition = 'TEXT NULL' if dialect == SQLITE else 'DATETIME2 NULL'
+    for table in ('games', 'consoles'):
+        if add_column(conn, table, 'updated_at', definition):
+            # Filas existentes: fecha de la migración (se incluyen en la próxima exportación incremental)
+            conn.execute(f'UPDATE {table} SET updated_at = CURRENT_TIMESTAMP')
+        create_index(conn, table, f'idx_{table}_updated_at', ['updated_at'])
+
+
+def _collection_counters(conn, dialect):
+    counters.ensure_table(conn)
+
+
+def _query_indexes(conn, dialect):
+    """
+    Índices para las consultas reales: filtros por *_normalized y serial_number_console,
+    y orden por id o por las columnas de sort_link (con id como desempate).
+    Ambos motores añaden la clave primaria (id) al final de cada índice, así que
+    (platform_normalized) ya sirve para WHERE platform_normalized = ? ORDER BY id.
+    Los índices sobre platform/model no los usa ninguna consulta.
+    """
+    drop_index(conn, 'games', 'idx_games_platform')
+    drop_index(conn, 'consoles', 'idx_consoles_model')
+
+    create_index(conn, 'games', 'idx_games_platform_normalized', ['platform_normalized'])
+    for column in ('title', 'release_date', 'score'):
+        create_index(conn, 'games', f'idx_games_{column}', [column])
+        create_index(conn, 'games', f'idx_games_platform_{column}', ['platform_normalized', column])
+
+    create_index(conn, 'consoles', 'idx_consoles_model_normalized', ['model_normalized'])
+    for column in ('name', 'release_date'):
+        create_index(conn, 'consoles', f'idx_consoles_{column}', [column])
+        create_index(conn, 'consoles', f'idx_consoles_model_{column}', ['model_normalized', column])
+    # Cubre SELECT id FROM consoles WHERE serial_number_console = ? (alta y edición)
+    create_index(conn, 'consoles', 'idx_consoles_serial_number_console', ['serial_number_console'])
+
+
+def _unique_console_serial(conn, dialect):
+    """
+    serial_number_console único: el alta y la edición insertan directamente y
+    tratan la violación del índice en lugar de consultar antes si el serial existe.
+    """
+    duplicates = conn.execute('''
+        SELECT serial_number_console FROM consoles
+        WHERE serial_number_console IS NOT NULL
+        GROUP BY serial_number_console HAVING COUNT(*) > 1
+    ''').fetchall()
+    if duplicates:
+        serials = ', '.join(f'"{row[0]}"' for row in duplicates[:10])
+        raise ValueError(f"Hay {len(duplicates)} números de serie de consola repetidos ({serials}); "
+                         "corrígelos antes de aplicar esta migración")
+    drop_index(conn, 'consoles', 'idx_consoles_serial_number_console')
+    create_index(conn, 'consoles', 'idx_consoles_serial_number_console_unique', ['serial_number_console'],
+                 unique=True, where='serial_number_console IS NOT NULL')
+
+
+def _collection_versions(conn, dialect):
+    versions.ensure_table(conn)
+
+
+_LOOKUP_TABLES = {
+    SQLITE: {
+        'platforms': '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            slug TEXT NOT NULL UNIQUE,
+            family TEXT,
+            position INTEGER
+        ''',
+        'platform_aliases': '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alias TEXT NOT NULL UNIQUE,
+            platform_id INTEGER NOT NULL REFERENCES platforms(id)
+        ''',
+        'console_models': '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            slug TEXT NOT NULL UNIQUE,
+            family TEXT,
+            position INTEGER
+        ''',
+        'console_model_aliases': '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alias TEXT NOT NULL UNIQUE,
+            model_id INTEGER NOT NULL REFERENCES console_models(id)
+        ''',
+    },
+    SQLSERVER: {
+        'platforms': '''
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            name NVARCHAR(255) NOT NULL,
+            slug NVARCHAR(255) NOT NULL UNIQUE,
+            family NVARCHAR(100),
+            position INT
+        ''',
+        'platform_aliases': '''
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            alias NVARCHAR(255) NOT NULL UNIQUE,
+            platform_id INT NOT NULL REFERENCES platforms(id)
+        ''',
+        'console_models': '''
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            name NVARCHAR(255) NOT NULL,
+            slug NVARCHAR(255) NOT NULL UNIQUE,
+            family NVARCHAR(100),
+            position INT
+        ''',
+        'console_model_aliases': '''
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            alias NVARCHAR(255) NOT NULL UNIQUE,
+            model_id INT NOT NULL REFERENCES console_models(id)
+        ''',
+    },
+}
+
+
+def _lookup_tables(conn, dialect):
+    """
+    Plataformas y modelos con clave entera y alias (ver lookups.py), games.platform_id
+    y consoles.model_id. Las filas existentes se enlazan por su texto y su *_normalized
+    pasa a ser el slug canónico ("ps2" -> "playstation2"): los contadores de los tipos
+    afectados se recalculan. Los filtros pasan a los índices por id; los de *_normalized
+    ya no los usa ninguna consulta.
+    """
+    for table, columns in _LOOKUP_TABLES[dialect].items():
+        if not table_exists(conn, table):
+            conn.execute(f'CREATE TABLE {table} ({columns})')
+    for kind in lookups.KINDS:
+        lookups.seed(conn, kind)
+
+    integer = 'INTEGER' if dialect == SQLITE else 'INT'
+    add_column(conn, 'games', 'platform_id', f'{integer} NULL REFERENCES platforms(id)')
+    add_column(conn, 'consoles', 'model_id', f'{integer} NULL REFERENCES console_models(id)')
+    lookups.backfill(conn)
+
+    drop_index(conn, 'games', 'idx_games_platform_normalized')
+    create_index(conn, 'games', 'idx_games_platform_id', ['platform_id'])
+    for column in ('title', 'release_date', 'score'):
+        drop_index(conn, 'games', f'idx_games_platform_{column}')
+        create_index(conn, 'games', f'idx_games_platform_id_{column}', ['platform_id', column])
+
+    drop_index(conn, 'consoles', 'idx_consoles_model_normalized')
+    create_index(conn, 'consoles', 'idx_consoles_model_id', ['model_id'])
+    for column in ('name', 'release_date'):
+        drop_index(conn, 'consoles', f'idx_consoles_model_{column}')
+        create_index(conn, 'consoles', f'idx_consoles_model_id_{column}', ['model_id', column])
+
+
+MIGRATIONS = [
+    Migration(1, 'baseline users/consoles/games', _baseline),
+    Migration(2, 'users.role', _user_roles),
+    Migration(3, 'games/consoles.updated_at', _updated_at),
+    Migration(4, 'collection_counters', _collection_counters),
+    Migration(5, 'índices para filtros y orden de los listados', _query_indexes),
+    Migration(6, 'consoles.serial_number_console único', _unique_console_serial),
+    Migration(7, 'collection_versions', _collection_versions),
+    Migration(8, 'platforms/console_models con clave entera', _lookup_tables),
+]
+
+
+# ---- Runner ----
+
+def _ensure_version_table(conn, dialect):
+    if table_exists(conn, VERSION_TABLE):
+        return
+    if dialect == SQLITE:
+        conn.execute(f'''
+            CREATE TABLE {VERSION_TABLE} (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TEXT NOT NULL
+            )
+        ''')
+    else:
+        conn.execute(f'''
+            CREATE TABLE {VERSION_TABLE} (
+                version INT NOT NULL PRIMARY KEY,
+                name NVARCHAR(200) NOT NULL,
+                applied_at DATETIME2 NOT NULL
+            )
+        ''')
+    conn.commit()
+
+
+def applied_versions(conn):
+    if not table_exists(conn, VERSION_TABLE):
+        return set()
+    return {row[0] for row in conn.execute(f'SELECT version FROM {VERSION_TABLE}').fetchall()}
+
+
+def current_version(conn):
+    return max(applied_versions(conn), default=0)
+
+
+def pending(conn, target=None):
+    applied = applied_versions(conn)
+    return [
+        migration for migration in MIGRATIONS
+        if migration.version not in applied and (target is None or migration.version <= target)
+    ]
+
+
+class SchemaOutdated(RuntimeError):
+    """La base no tiene aplicadas todas las migraciones que necesita el código"""
+
+
+def check_current(conn):
+    """
+    Lanza SchemaOutdated si quedan migraciones pendientes. Las rutas cuentan con
+    las tablas de las migraciones (contadores, versiones...) y no las crean al vuelo.
+    """
+    missing = pending(conn)
+    if missing:
+        names = ', '.join(f'{migration.version:04d} {migration.name}' for migration in missing)
+        raise SchemaOutdated(f"Esquema en la versión {current_version(conn)}; faltan las migraciones: {names}. "
+                             "Aplícalas con python tools/migrate.py antes de arrancar la aplicación")
+
+
+def migrate(conn, target=None, log=logger.info):
+    """
+    Aplica las migraciones pendientes hasta `target` (todas por defecto), cada una
+    con su propio commit. Retorna las migraciones aplicadas.
+    """
+    dialect = dialect_of(conn)
+    _ensure_version_table(conn, dialect)
+    applied = []
+    for migration in pending(conn, target):
+        log(f"Aplicando migración {migration.version:04d}: {migration.name}")
+        try:
+            migration.upgrade(conn, dialect)
+            conn.execute(
+                f'INSERT INTO {VERSION_TABLE} (version, name, applied_at) VALUES (?, ?, ?)',
+                (migration.version, migration.name, datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration)
+    return applied
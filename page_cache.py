@@ -0,0 +1,182 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+# Marcador que sustituye al token CSRF dentro de los fragmentos cacheados;
+# cada respuesta lo reemplaza por el token de la sesión actual.
+CSRF_PLACEHOLDER = '__CACHED_CSRF_TOKEN__'
+
+
+class MemoryCacheBackend:
+    """Backend en memoria del proceso con expulsión LRU"""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    Backend compartido entre los workers de un mismo host en un archivo SQLite (WAL).
+    Mismo interfaz que MemoryCacheBackend; cualquier otro backend compartido
+    (Redis, memcached...) sólo necesita get/set/clear.
+    """
+
+    def __init__(self, path, maxsize=5000):
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS page_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_page_cache_accessed ON page_cache(accessed_at)')
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        # Una conexión SQLite no debe cruzar un fork (gunicorn con preload_app): se reabre
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute('SELECT value, expires_at FROM page_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and now >= row[1]:
+            conn.execute('DELETE FROM page_cache WHERE key = ?', (key,))
+            return None
+        conn.execute('UPDATE page_cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return row[0]
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO page_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, value, now + ttl if ttl else None, now)
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute('DELETE FROM page_cache WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))
+        conn.execute('''
+            DELETE FROM page_cache WHERE key IN (
+                SELECT key FROM page_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.maxsize,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM page_cache')
+
+
+class PageCache:
+    """
+    Caché de fragmentos renderizados agrupados por (tipo, grupo), p. ej.
+    ('games', 'playstation2'). La clave lleva la versión del grupo en
+    collection_versions (versions.py), que sube en la misma transacción que cada
+    escritura: tras una escritura en cualquier worker las entradas anteriores dejan
+    de encontrarse sin avisar a nadie, y acaban saliendo por TTL o LRU.
+    """
+
+    def __init__(self, backend, ttl=600):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind, group, version, role, args):
+        """
+        Clave de un fragmento. `version` se lee antes que las filas que se
+        renderizan y la misma clave se usa en get y set: si una escritura llega a
+        mitad del render, el fragmento queda guardado con la versión anterior.
+        `args` son los pares (clave, valor) de request.args que afectan al fragmento.
+        """
+        return f'{kind}:{group}:v{version}:{role}:{urlencode(sorted(args))}'
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Page cache get failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        try:
+            self.backend.set(key, value, ttl=self.ttl)
+        except Exception as e:
+            logger.warning(f"Page cache set failed: {e}")
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def _backend_from_env():
+    """PAGE_CACHE_BACKEND=memory (default) | sqlite:<ruta> | none"""
+    spec = os.getenv('PAGE_CACHE_BACKEND', 'memory')
+    maxsize = int(os.getenv('PAGE_CACHE_SIZE', 512))
+    if spec == 'none':
+        return MemoryCacheBackend(maxsize=0)
+    if spec.startswith('sqlite:'):
+        return SQLiteCacheBackend(spec[len('sqlite:'):], maxsize=maxsize)
+    return MemoryCacheBackend(maxsize=maxsize)
+
+
+page_cache = PageCache(_backend_from_env(), ttl=float(os.getenv('PAGE_CACHE_TTL', 600)))
+
@@ -0,0 +1,167 @@
+import json
+import base64
+import binascii
+from dialect import dialect_of, select_limited, limit_first
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+# Columnas por las que se puede ordenar; 'id' desempata para que el orden sea estable
+GAME_SORT_KEYS = ('id', 'title', 'release_date', 'score')
+CONSOLE_SORT_KEYS = ('id', 'name', 'release_date')
+
+
+class InvalidCursor(ValueError):
+    """El cursor de la URL no se puede decodificar"""
+
+
+class Page:
+    """Una página de resultados con los cursores para moverse a la siguiente/anterior"""
+
+    def __init__(self, items, sort, order, per_page, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.sort = sort
+        self.order = order
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    # date/datetime/Decimal de pyodbc: SQL Server convierte el texto ISO al comparar
+    return str(value)
+
+
+def encode_cursor(sort, value, row_id, backward=False):
+    """Codifica la posición (valor de orden, id) de una fila como token para la URL"""
+    payload = json.dumps([sort, _json_value(value), row_id, 'b' if backward else 'f'],
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverso de encode_cursor: retorna (sort, valor, id, backward)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort, value, row_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(row_id, int) or direction not in ('f', 'b'):
+            raise ValueError(token)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursor(f"Cursor inválido: {token}") from e
+    return sort, value, row_id, direction == 'b'
+
+
+def page_args(args, prefix=''):
+    """
+    Lee sort/order/cursor/per_page de request.args.
+
+    Args:
+        args: request.args
+        prefix: Prefijo de los parámetros cuando una página tiene varios listados
+    """
+    per_page = args.get(f'{prefix}per_page', DEFAULT_PER_PAGE, type=int) or DEFAULT_PER_PAGE
+    return {
+        'sort': args.get(f'{prefix}sort', 'id'),
+        'order': args.get(f'{prefix}order', 'asc'),
+        'cursor': args.get(f'{prefix}cursor') or None,
+        'per_page': max(1, min(per_page, MAX_PER_PAGE)),
+    }
+
+
+def _seek_condition(column, value, row_id, ascending):
+    """
+    Condición WHERE para continuar después de (value, row_id).
+
+    Tanto SQL Server como SQLite ordenan los NULL primero en ASC y al final en DESC.
+    """
+    if column == 'id':
+        return ('id > ?' if ascending else 'id < ?'), (row_id,)
+    if value is None:
+        if ascending:
+            return f'(({column} IS NULL AND id > ?) OR {column} IS NOT NULL)', (row_id,)
+        return f'({column} IS NULL AND id < ?)', (row_id,)
+    if ascending:
+        return f'({column} > ? OR ({column} = ? AND id > ?))', (value, value, row_id)
+    return f'({column} < ? OR ({column} = ? AND id < ?) OR {column} IS NULL)', (value, value, row_id)
+
+
+def keyset_page(conn, table, sort_keys, where='', params=(), sort='id', order='asc',
+                cursor=None, per_page=DEFAULT_PER_PAGE, columns='*'):
+    """
+    Pagina `table` por keyset (seek) en lugar de OFFSET: cada página cuesta lo mismo.
+
+    Args:
+        conn: DictConnection o conexión sqlite3
+        table: Tabla a consultar
+        sort_keys: Columnas permitidas para ordenar
+        where: Filtro SQL adicional con placeholders '?'
+        params: Parámetros de `where`
+        sort: Columna de orden (se ignora si no está en sort_keys)
+        order: 'asc' o 'desc'
+        cursor: Token de encode_cursor() o None para la primera página
+        per_page: Filas por página
+        columns: Lista del SELECT; debe incluir id y la columna de orden
+    """
+    if sort not in sort_keys:
+        sort = 'id'
+    if order not in ('asc', 'desc'):
+        order = 'asc'
+
+    backward = False
+    conditions = [f'({where})'] if where else []
+    params = tuple(params)
+
+    if cursor:
+        try:
+            cursor_sort, value, row_id, backward = decode_cursor(cursor)
+        except InvalidCursor:
+            cursor_sort = None
+        if cursor_sort == sort:
+            ascending = (order == 'asc') != backward
+            condition, seek_params = _seek_condition(sort, value, row_id, ascending)
+            conditions.append(condition)
+            params += seek_params
+        else:
+            # Cursor de otro orden (o corrupto): volver a la primera página
+            cursor, backward = None, False
+
+    ascending = (order == 'asc') != backward
+    direction = 'ASC' if ascending else 'DESC'
+    order_by = f'id {direction}' if sort == 'id' else f'{sort} {direction}, id {direction}'
+
+    dialect = dialect_of(conn)
+    query = select_limited(dialect, table, ' AND '.join(conditions), order_by, columns)
+    limit = per_page + 1  # una fila extra para saber si hay más
+    params = (limit,) + params if limit_first(dialect) else params + (limit,)
+
+    rows = list(conn.execute(query, params).fetchall())
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backward:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first, last = rows[0], rows[-1]
+        if has_more or backward:
+            next_cursor = encode_cursor(sort, last[sort], last['id'])
+        if (has_more and backward) or (cursor and not backward):
+            prev_cursor = encode_cursor(sort, first[sort], first['id'], backward=True)
+
+    return Page(rows, sort, order, per_page, next_cursor=next_cursor, prev_cursor=prev_cursor)
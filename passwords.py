@@ -0,0 +1,181 @@
+import os
+import time
+import bcrypt
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (segundos) del histograma de latencia de verificación
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class VerifierBusy(Exception):
+    """El pool de verificación está lleno; la petición debe rechazarse (429)"""
+
+
+def hash_rounds(password_hash):
+    """Coste (log2 de rondas) codificado en un hash bcrypt: b'$2b$12$...' -> 12"""
+    if isinstance(password_hash, str):
+        password_hash = password_hash.encode('utf-8')
+    try:
+        return int(password_hash.split(b'$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def hash_password(password, rounds=None):
+    """Hash bcrypt con el coste configurado (BCRYPT_ROUNDS)"""
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds or password_verifier.rounds))
+
+
+def _check_password(password, password_hash, rounds):
+    """
+    Se ejecuta en el worker. Retorna (válida, nuevo_hash); nuevo_hash sólo
+    cuando la contraseña es válida y el hash guardado tiene otro coste.
+    """
+    if not bcrypt.checkpw(password, password_hash):
+        return False, None
+    if hash_rounds(password_hash) != rounds:
+        return True, bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+    return True, None
+
+
+class PasswordVerifier:
+    """
+    Verifica contraseñas bcrypt en un pool acotado fuera del hilo de la petición.
+
+    Args:
+        workers: Hilos/procesos que calculan hashes en paralelo
+        max_pending: Verificaciones admitidas a la vez (en curso + en cola);
+            por encima se lanza VerifierBusy en lugar de encolar sin límite
+        rounds: Coste bcrypt deseado; los hashes con otro coste se recalculan al hacer login
+        timeout: Segundos máximos esperando el resultado
+        executor: 'thread' (bcrypt libera el GIL) o 'process'
+    """
+
+    def __init__(self, workers=2, max_pending=8, rounds=12, timeout=10.0, executor='thread'):
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self.rounds = rounds
+        self.timeout = timeout
+        self.executor_type = executor
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {
+            'verifications': 0,
+            'failures': 0,
+            'rejections': 0,
+            'timeouts': 0,
+            'rehashes': 0,
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+        }
+        self._buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    @classmethod
+    def from_env(cls):
+        workers = int(os.getenv('PASSWORD_WORKERS', 2))
+        return cls(
+            workers=workers,
+            max_pending=int(os.getenv('PASSWORD_MAX_PENDING', workers * 4)),
+            rounds=int(os.getenv('BCRYPT_ROUNDS', 12)),
+            timeout=float(os.getenv('PASSWORD_TIMEOUT', 10)),
+            executor=os.getenv('PASSWORD_EXECUTOR', 'thread'),
+        )
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_type == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                            thread_name_prefix='bcrypt')
+        return self._executor
+
+    def verify(self, password, password_hash):
+        """
+        Retorna (válida, nuevo_hash). nuevo_hash no es None cuando hay que
+        guardar el hash recalculado con el coste actual.
+
+        Raises:
+            VerifierBusy: Si ya hay max_pending verificaciones en curso
+        """
+        if isinstance(password, str):
+            password = password.encode('utf-8')
+        if isinstance(password_hash, str):
+            password_hash = password_hash.encode('utf-8')
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejections'] += 1
+            raise VerifierBusy(f"{self.max_pending} verificaciones en curso")
+
+        with self._lock:
+            self._pending += 1
+        start = time.perf_counter()
+        try:
+            future = self._get_executor().submit(_check_password, password, password_hash, self.rounds)
+        except Exception:
+            self._release_slot()
+            raise
+        # El hueco se libera cuando el worker termina, aunque la petición ya no espere
+        future.add_done_callback(lambda _: self._release_slot())
+
+        try:
+            valid, new_hash = future.result(timeout=self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise VerifierBusy(f"Verificación sin respuesta tras {self.timeout}s")
+
+        self._record(time.perf_counter() - start, valid, new_hash is not None)
+        return valid, new_hash
+
+    def _release_slot(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _record(self, elapsed, valid, rehashed):
+        with self._lock:
+            self._stats['verifications'] += 1
+            self._stats['latency_total'] += elapsed
+            self._stats['latency_max'] = max(self._stats['latency_max'], elapsed)
+            if not valid:
+                self._stats['failures'] += 1
+            if rehashed:
+                self._stats['rehashes'] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    self._buckets[i] += 1
+                    break
+            else:
+                self._buckets[-1] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = self._pending
+            stats['latency_avg'] = (stats['latency_total'] / stats['verifications']
+                                    if stats['verifications'] else 0.0)
+            stats['latency_buckets'] = dict(
+                zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], self._buckets)
+            )
+        stats.update(workers=self.workers, max_pending=self.max_pending, rounds=self.rounds)
+        return stats
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_verifier = PasswordVerifier.from_env()
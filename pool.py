@@ -0,0 +1,258 @@
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """No hay conexiones libres en el pool dentro del tiempo de espera"""
+
+
+class _PoolEntry:
+    """Conexión física del pool con sus marcas de tiempo"""
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones DB-API thread-safe.
+
+    Args:
+        creator: Callable sin argumentos que abre una conexión física nueva
+        min_size: Conexiones que se mantienen abiertas aunque estén ociosas
+        max_size: Máximo de conexiones abiertas (en uso + libres)
+        timeout: Segundos que espera acquire() antes de lanzar PoolTimeout
+        max_lifetime: Segundos tras los cuales una conexión se recicla (0 = nunca)
+        idle_timeout: Segundos ociosa tras los cuales se cierra (0 = nunca)
+        pre_ping: Valida con ping_query antes de entregarla una conexión ociosa
+            durante ping_after segundos o más (0 = todas). Las usadas hace menos se
+            entregan sin validar; si la red las cortó, la primera sentencia falla y
+            la conexión se descarta al devolverla (release(discard=True))
+    """
+
+    def __init__(self, creator, min_size=1, max_size=10, timeout=30.0,
+                 max_lifetime=1800.0, idle_timeout=300.0, pre_ping=True,
+                 ping_after=30.0, ping_query='SELECT 1'):
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size debe estar entre 0 y max_size")
+
+        self.creator = creator
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self.ping_after = ping_after
+        self.ping_query = ping_query
+
+        self._lock = threading.Condition()
+        self._idle = deque()      # derecha = usada más recientemente
+        self._in_use = {}         # id(raw) -> _PoolEntry
+        self._size = 0            # conexiones abiertas o en proceso de abrirse
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'creations': 0,
+            'closed_idle': 0,
+            'recycled': 0,
+            'pings': 0,
+            'ping_failures': 0,
+            'discarded': 0,
+        }
+
+        for _ in range(min_size):
+            self._reserve_slot()
+            entry = self._create()
+            with self._lock:
+                self._idle.append(entry)
+
+    # ---- API pública ----
+
+    def acquire(self):
+        """Entrega una conexión física validada; esperar como máximo self.timeout"""
+        deadline = time.monotonic() + self.timeout
+        waited = False
+
+        while True:
+            entry = None
+            create = False
+            evicted = []
+            try:
+                with self._lock:
+                    if self._closed:
+                        raise RuntimeError("El pool está cerrado")
+                    evicted = self._evict_idle()
+                    while not self._idle and self._size >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeout(
+                                f"Sin conexiones libres tras {self.timeout}s "
+                                f"(max_size={self.max_size})"
+                            )
+                        if not waited:
+                            waited = True
+                            self._stats['waits'] += 1
+                        self._lock.wait(remaining)
+                    if self._idle:
+                        entry = self._idle.pop()
+                    else:
+                        self._size += 1
+                        create = True
+            finally:
+                # Cerrar una conexión de red puede tardar: nunca con el lock tomado
+                for raw in evicted:
+                    self._close_raw(raw)
+
+            if create:
+                entry = self._create()
+            elif not self._is_usable(entry):
+                continue
+
+            with self._lock:
+                self._in_use[id(entry.raw)] = entry
+                self._stats['checkouts'] += 1
+            return entry.raw
+
+    def release(self, raw, discard=False):
+        """Devuelve una conexión al pool; con discard=True se cierra y se libera el hueco"""
+        with self._lock:
+            entry = self._in_use.pop(id(raw), None)
+            if entry is None:
+                # No pertenece a este pool (o ya fue devuelta)
+                discard = True
+            elif not discard and not self._closed and not self._expired(entry):
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                self._lock.notify()
+                return
+            if entry is not None:
+                if not discard and self._expired(entry):
+                    self._stats['recycled'] += 1
+                else:
+                    self._stats['discarded'] += 1
+                self._size -= 1
+                self._lock.notify()
+        self._close_raw(raw)
+
+    def stats(self):
+        """Contadores y ocupación actual del pool"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                min_size=self.min_size,
+                max_size=self.max_size,
+            )
+        return stats
+
+    def dispose(self):
+        """Cierra todas las conexiones libres; las que estén en uso se cierran al devolverse"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._lock.notify_all()
+        for entry in idle:
+            self._close_raw(entry.raw)
+
+    # ---- Internos ----
+
+    def _reserve_slot(self):
+        with self._lock:
+            self._size += 1
+
+    def _create(self):
+        """Abre una conexión física; el hueco ya debe estar reservado en self._size"""
+        try:
+            raw = self.creator()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._stats['creations'] += 1
+        return _PoolEntry(raw)
+
+    def _expired(self, entry):
+        return bool(self.max_lifetime) and time.monotonic() - entry.created_at >= self.max_lifetime
+
+    def _is_usable(self, entry):
+        """Recicla conexiones viejas y valida con pre-ping las que llevan rato ociosas; False si se descartó"""
+        reason = None
+        if self._expired(entry):
+            reason = 'recycled'
+        elif (self.pre_ping and time.monotonic() - entry.last_used >= self.ping_after
+              and not self._ping(entry.raw)):
+            reason = 'ping_failures'
+
+        if reason is None:
+            return True
+
+        self._close_raw(entry.raw)
+        with self._lock:
+            self._stats[reason] += 1
+            self._size -= 1
+            self._lock.notify()
+        return False
+
+    def _ping(self, raw):
+        with self._lock:
+            self._stats['pings'] += 1
+        cursor = None
+        try:
+            cursor = raw.cursor()
+            cursor.execute(self.ping_query)
+            cursor.fetchall()
+            return True
+        except Exception as e:
+            logger.warning(f"Conexión del pool no válida, se descarta: {e}")
+            return False
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    def _evict_idle(self):
+        """
+        Saca del pool las conexiones ociosas por encima de min_size (llamar con el
+        lock tomado) y las devuelve para cerrarlas después de soltarlo
+        """
+        evicted = []
+        if not self.idle_timeout:
+            return evicted
+        now = time.monotonic()
+        # La izquierda del deque es la conexión que lleva más tiempo sin usarse
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0].last_used >= self.idle_timeout):
+            entry = self._idle.popleft()
+            self._size -= 1
+            self._stats['closed_idle'] += 1
+            evicted.append(entry.raw)
+        return evicted
+
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
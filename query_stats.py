@@ -0,0 +1,177 @@
+import os
+import re
+import logging
+import threading
+import contextvars
+from functools import lru_cache
+
+slow_query_logger = logging.getLogger('slow_query')
+
+# Límites superiores (segundos) del histograma de tiempo por sentencia
+QUERY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_MULTI_ROW_VALUES = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query):
+    """
+    Forma normalizada de una sentencia para agrupar sus ejecuciones:
+    literales -> ?, listas IN (?, ?, ...) -> (...), espacios colapsados.
+    """
+    normalized = _STRING_LITERAL.sub('?', query)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PLACEHOLDER_LIST.sub('(...)', normalized)
+    normalized = _MULTI_ROW_VALUES.sub(r'\1', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+def redact_params(params):
+    """Tipos de los parámetros sin sus valores, para poder registrarlos sin filtrar datos"""
+    if not params:
+        return '()'
+    if isinstance(params, dict):
+        return '{' + ', '.join(f'{key}: {_redact(value)}' for key, value in params.items()) + '}'
+    return '(' + ', '.join(_redact(value) for value in params) + ')'
+
+
+def _redact(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (str, bytes)):
+        return f'<{type(value).__name__} len={len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+class QueryStats:
+    """
+    Agregados por huella de sentencia (ejecuciones, tiempo total y máximo,
+    filas devueltas, histograma) y por endpoint (peticiones, sentencias, tiempo).
+
+    Args:
+        slow_threshold: Segundos a partir de los cuales una sentencia va al slow-query log
+        max_fingerprints: Huellas distintas que se guardan; las demás se agrupan en 'other'
+    """
+
+    def __init__(self, slow_threshold=0.2, max_fingerprints=500):
+        self.slow_threshold = slow_threshold
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._queries = {}
+        self._endpoints = {}
+        self.slow_queries = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            slow_threshold=float(os.getenv('SLOW_QUERY_MS', 200)) / 1000,
+            max_fingerprints=int(os.getenv('QUERY_STATS_MAX_FINGERPRINTS', 500)),
+        )
+
+    def _entry(self, key):
+        entry = self._queries.get(key)
+        if entry is None:
+            if len(self._queries) >= self.max_fingerprints:
+                key = 'other'
+                entry = self._queries.get(key)
+            if entry is None:
+                entry = self._queries[key] = {
+                    'count': 0, 'total': 0.0, 'max': 0.0, 'rows': 0, 'errors': 0,
+                    'buckets': [0] * (len(QUERY_BUCKETS) + 1),
+                }
+        return entry
+
+    def record(self, query, params, elapsed, error=False):
+        """Registra una ejecución; retorna la huella para asociarle después las filas leídas"""
+        key = fingerprint(query)
+        with self._lock:
+            entry = self._entry(key)
+            entry['count'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            if error:
+                entry['errors'] += 1
+            for i, bound in enumerate(QUERY_BUCKETS):
+                if elapsed <= bound:
+                    entry['buckets'][i] += 1
+                    break
+            else:
+                entry['buckets'][-1] += 1
+
+        current = _current_request.get()
+        if current is not None:
+            current['queries'] += 1
+            current['time'] += elapsed
+
+        if elapsed >= self.slow_threshold:
+            with self._lock:
+                self.slow_queries += 1
+            slow_query_logger.warning(
+                f"{elapsed * 1000:.1f} ms | {key} | params={redact_params(params)}"
+                + (f" | endpoint={current['endpoint']}" if current else '')
+            )
+        return key
+
+    def add_rows(self, key, rows):
+        if not rows or key is None:
+            return
+        with self._lock:
+            entry = self._queries.get(key) or self._queries.get('other')
+            if entry is not None:
+                entry['rows'] += rows
+
+    # ---- Por petición ----
+
+    def start_request(self, endpoint):
+        """Empieza a acumular las sentencias del contexto actual (una petición)"""
+        return _current_request.set({'endpoint': endpoint or 'unknown', 'queries': 0, 'time': 0.0})
+
+    def finish_request(self, token=None):
+        """Cierra la petición actual, la suma a su endpoint y retorna {'queries', 'time'}"""
+        current = _current_request.get()
+        if token is not None:
+            _current_request.reset(token)
+        else:
+            _current_request.set(None)
+        if current is None:
+            return None
+        with self._lock:
+            entry = self._endpoints.setdefault(current['endpoint'], {
+                'requests': 0, 'queries': 0, 'time': 0.0, 'max_queries': 0,
+            })
+            entry['requests'] += 1
+            entry['queries'] += current['queries']
+            entry['time'] += current['time']
+            entry['max_queries'] = max(entry['max_queries'], current['queries'])
+        return current
+
+    # ---- Lectura ----
+
+    def stats(self):
+        with self._lock:
+            queries = {
+                key: dict(entry, buckets=list(entry['buckets']))
+                for key, entry in self._queries.items()
+            }
+            endpoints = {key: dict(entry) for key, entry in self._endpoints.items()}
+            return {'queries': queries, 'endpoints': endpoints, 'slow_queries': self.slow_queries}
+
+    def top(self, n=10, by='total'):
+        """Las n huellas con más tiempo total (o 'count', 'max', 'rows')"""
+        queries = self.stats()['queries']
+        return sorted(queries.items(), key=lambda item: item[1][by], reverse=True)[:n]
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._endpoints.clear()
+            self.slow_queries = 0
+
+
+_current_request = contextvars.ContextVar('query_stats_request', default=None)
+
+query_stats = QueryStats.from_env()
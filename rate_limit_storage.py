@@ -0,0 +1,218 @@
+"""
+Almacenamiento de Flask-Limiter compartido entre procesos del mismo host, sobre
+un archivo SQLite en modo WAL (storage_uri="sqlite:///ruta/ratelimit.db").
+
+Con memory:// cada worker lleva sus propios contadores, así que el límite real
+se multiplica por el número de workers. Aquí todos escriben en el mismo archivo.
+
+Implementa la estrategia sliding-window-counter: por cada clave se guarda el
+contador de la ventana actual y el de la anterior, y el peso de la anterior
+decrece con el tiempo. Cada comprobación es una sola sentencia (un UPSERT
+condicional), es decir, una escritura local. Un hilo en segundo plano borra
+las ventanas caducadas para que la tabla no crezca con claves inactivas.
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+import urllib.parse
+from limits.storage import Storage, SlidingWindowCounterSupport
+
+logger = logging.getLogger(__name__)
+
+CLEANUP_INTERVAL = float(os.getenv('RATELIMIT_CLEANUP_INTERVAL', 60))
+BUSY_TIMEOUT_MS = 5000
+
+# Ventana fija (incr/get de la estrategia fixed-window): se guarda con window = -1
+_FIXED_WINDOW = -1
+
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        key TEXT NOT NULL,
+        window INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (key, window)
+    ) WITHOUT ROWID
+'''
+_EXPIRES_INDEX = 'CREATE INDEX IF NOT EXISTS idx_rate_limits_expires_at ON rate_limits (expires_at)'
+
+# Suma `amount` a la ventana actual sólo si el total ponderado no supera el límite.
+# Sin fila en RETURNING = rechazada. Es atómico: SQLite serializa las escrituras.
+_ACQUIRE_SQL = '''
+    INSERT INTO rate_limits (key, window, count, expires_at)
+    SELECT :key, :window, :amount, :expires_at
+    WHERE CAST(COALESCE((SELECT count FROM rate_limits WHERE key = :key AND window = :previous), 0)
+               * :weight AS INTEGER)
+          + COALESCE((SELECT count FROM rate_limits WHERE key = :key AND window = :window), 0)
+          + :amount <= :limit
+    ON CONFLICT (key, window) DO UPDATE SET count = count + excluded.count
+    RETURNING count
+'''
+
+_INCR_SQL = '''
+    INSERT INTO rate_limits (key, window, count, expires_at) VALUES (:key, :window, :amount, :expires_at)
+    ON CONFLICT (key, window) DO UPDATE SET
+        count = CASE WHEN expires_at <= :now THEN excluded.count ELSE count + excluded.count END,
+        expires_at = CASE WHEN expires_at <= :now THEN excluded.expires_at ELSE expires_at END
+    RETURNING count
+'''
+
+
+def database_path_from_uri(uri):
+    """sqlite:///db/ratelimit.db -> db/ratelimit.db; sqlite:////tmp/rl.db -> /tmp/rl.db"""
+    parsed = urllib.parse.urlparse(uri)
+    path = urllib.parse.unquote(parsed.netloc + parsed.path)
+    if not parsed.netloc:
+        path = path[1:]
+    if not path:
+        raise ValueError(f"Falta la ruta del archivo en {uri}")
+    return path
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport):
+    """
+    Storage de `limits` registrado con el esquema sqlite://.
+    Una conexión por hilo y proceso (se reabre después de un fork).
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, cleanup_interval=CLEANUP_INTERVAL, **options):
+        self.path = database_path_from_uri(uri)
+        self.cleanup_interval = float(cleanup_interval)
+        self._local = threading.local()
+        self._cleanup_lock = threading.Lock()
+        self._cleanup_thread = None
+        self._cleanup_pid = None
+        self._stop = threading.Event()
+        self.removed = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(_SCHEMA)
+        conn.execute(_EXPIRES_INDEX)
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        # Modo autocommit: cada sentencia es su propia transacción
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Un contador perdido en un corte de luz no importa: sin fsync por escritura
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_cleanup(self):
+        if self._cleanup_pid == os.getpid() or self.cleanup_interval <= 0:
+            return
+        with self._cleanup_lock:
+            if self._cleanup_pid == os.getpid():
+                return
+            self._cleanup_thread = threading.Thread(target=self._cleanup_loop,
+                                                    name='rate-limit-cleanup', daemon=True)
+            self._cleanup_thread.start()
+            self._cleanup_pid = os.getpid()
+
+    def _cleanup_loop(self):
+        while not self._stop.wait(self.cleanup_interval):
+            try:
+                self.expire()
+            except sqlite3.Error as e:
+                logger.warning(f"Rate limit cleanup failed: {e}")
+
+    def expire(self, now=None):
+        """Borra las ventanas caducadas; retorna cuántas filas quitó"""
+        removed = self._connection().execute(
+            'DELETE FROM rate_limits WHERE expires_at <= ?', (now or time.time(),)
+        ).rowcount
+        self.removed += removed
+        return removed
+
+    def close(self):
+        self._stop.set()
+
+    # ---- Ventana deslizante ----
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        self._ensure_cleanup()
+        now = time.time()
+        window = int(now // expiry)
+        row = self._connection().execute(_ACQUIRE_SQL, {
+            'key': key,
+            'window': window,
+            'previous': window - 1,
+            'weight': 1 - (now % expiry) / expiry,
+            'amount': amount,
+            'limit': limit,
+            # La ventana actual sirve de "anterior" durante la siguiente
+            'expires_at': (window + 2) * expiry,
+        }).fetchone()
+        return row is not None
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        window = int(now // expiry)
+        counts = dict(self._connection().execute(
+            'SELECT window, count FROM rate_limits WHERE key = ? AND window IN (?, ?)',
+            (key, window - 1, window)
+        ).fetchall())
+        previous_count = counts.get(window - 1, 0)
+        previous_ttl = (1 - (now % expiry) / expiry) * expiry if previous_count else 0.0
+        current_ttl = (window + 1) * expiry - now + expiry
+        return previous_count, previous_ttl, counts.get(window, 0), current_ttl
+
+    def clear_sliding_window(self, key, expiry):
+        self.clear(key)
+
+    # ---- Ventana fija y operaciones generales ----
+
+    def incr(self, key, expiry, amount=1):
+        self._ensure_cleanup()
+        now = time.time()
+        return self._connection().execute(_INCR_SQL, {
+            'key': key, 'window': _FIXED_WINDOW, 'amount': amount,
+            'expires_at': now + expiry, 'now': now,
+        }).fetchone()[0]
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT count FROM rate_limits WHERE key = ? AND window = ? AND expires_at > ?',
+            (key, _FIXED_WINDOW, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._connection().execute(
+            'SELECT expires_at FROM rate_limits WHERE key = ? AND window = ?', (key, _FIXED_WINDOW)
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self._connection().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._connection().execute('DELETE FROM rate_limits').rowcount
+
+    def clear(self, key):
+        self._connection().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def size(self):
+        return self._connection().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
@@ -0,0 +1,344 @@
+import os
+import re
+import heapq
+import logging
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from background_index import BackgroundIndex
+from connection import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Campos indexados y su peso en el ranking
+FIELD_WEIGHTS = {
+    'title': 4.0,
+    'platform': 2.0,
+    'genre': 2.0,
+    'manufacturer': 1.0,
+    'description': 0.5,
+}
+INDEXED_COLUMNS = ', '.join(['id'] + list(FIELD_WEIGHTS))
+
+# Multiplicador según cómo coincide el término con el token indexado
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.6
+SUBSTRING_MATCH = 0.3
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Normaliza (minúsculas, sin acentos) y separa en palabras alfanuméricas"""
+    if text is None:
+        return []
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text)
+
+
+def _token_trigrams(token):
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _term_trigrams(term):
+    # Términos cortos sólo pueden buscarse como prefijo; los largos como subcadena
+    padded = f'  {term}' if len(term) < 3 else term
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchResults:
+    """Página de resultados ordenados por relevancia; el cursor es el número de página"""
+
+    sort = None
+
+    def __init__(self, ids, total, page, per_page):
+        self.ids = ids
+        self.total = total
+        self.page = page
+        self.per_page = per_page
+
+    @property
+    def has_next(self):
+        return self.page * self.per_page < self.total
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def next_cursor(self):
+        return str(self.page + 1) if self.has_next else None
+
+    @property
+    def prev_cursor(self):
+        return str(self.page - 1) if self.has_prev else None
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class MemorySearchIndex:
+    """
+    Índice invertido en memoria: token -> {game_id: peso}, más un índice de
+    trigramas token -> para resolver prefijos y subcadenas sin recorrer todo.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)
+        self._trigrams = defaultdict(set)
+        self._docs = {}
+        # Versión de tabla (versions.ALL) que refleja el índice
+        self.version = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, game):
+        """Indexa (o reindexa) un juego; `game` es un dict/fila con id y los campos indexados"""
+        weights = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(game.get(field) if hasattr(game, 'get') else game[field]):
+                weights[token] += weight
+
+        doc_id = game['id']
+        with self._lock:
+            self._remove(doc_id)
+            for token, weight in weights.items():
+                if token not in self._postings:
+                    for gram in _token_trigrams(token):
+                        self._trigrams[gram].add(token)
+                self._postings[token][doc_id] = weight
+            self._docs[doc_id] = tuple(weights)
+
+    update = add
+
+    def remove(self, game_id):
+        with self._lock:
+            self._remove(game_id)
+
+    def _remove(self, doc_id):
+        for token in self._docs.pop(doc_id, ()):
+            docs = self._postings[token]
+            docs.pop(doc_id, None)
+            if not docs:
+                del self._postings[token]
+                for gram in _token_trigrams(token):
+                    tokens = self._trigrams[gram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigrams[gram]
+
+    def _matching_tokens(self, term):
+        """Tokens indexados que contienen `term`, con su multiplicador de relevancia"""
+        grams = sorted(_term_trigrams(term), key=lambda g: len(self._trigrams.get(g, ())))
+        if not grams:
+            return {}
+        candidates = set(self._trigrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._trigrams.get(gram, set())
+
+        matches = {}
+        for token in candidates:
+            if token == term:
+                matches[token] = EXACT_MATCH
+            elif token.startswith(term):
+                matches[token] = PREFIX_MATCH
+            elif term in token:
+                matches[token] = SUBSTRING_MATCH
+        return matches
+
+    def search(self, query, page=1, per_page=20):
+        """Todos los términos deben aparecer; ordena por relevancia y luego por id"""
+        terms = tokenize(query)
+        page = max(1, page)
+        if not terms:
+            return SearchResults([], 0, page, per_page)
+
+        scores = None
+        with self._lock:
+            for term in dict.fromkeys(terms):
+                term_scores = defaultdict(float)
+                for token, factor in self._matching_tokens(term).items():
+                    for doc_id, weight in self._postings[token].items():
+                        term_scores[doc_id] += weight * factor
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc_id: score + term_scores[doc_id]
+                              for doc_id, score in scores.items() if doc_id in term_scores}
+                if not scores:
+                    break
+
+        top = heapq.nsmallest(page * per_page, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        ids = [doc_id for doc_id, _ in top[(page - 1) * per_page:]]
+        return SearchResults(ids, len(scores), page, per_page)
+
+    def build(self, conn, version=None):
+        """Indexa todos los juegos de la conexión dada; `version` es la versión ALL leída antes que las filas"""
+        rows = conn.execute(f'SELECT {INDEXED_COLUMNS} FROM games').fetchall()
+        for row in rows:
+            self.add(row)
+        self.version = version
+        logger.info(f"Índice de búsqueda en memoria construido: {len(self)} juegos")
+        return self
+
+
+class Fts5SearchIndex:
+    """
+    Búsqueda con SQLite FTS5 sobre la base local de get_db_connection().
+
+    La tabla games_fts usa games como contenido externo y se mantiene al día
+    con triggers, así que add/update/remove no necesitan hacer nada.
+    """
+
+    SCHEMA = [
+        f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS games_fts USING fts5(
+            {', '.join(FIELD_WEIGHTS)},
+            content='games', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS games_fts_ai AFTER INSERT ON games BEGIN
+            INSERT INTO games_fts(rowid, title, platform, genre, manufacturer, description)
+            VALUES (new.id, new.title, new.platform, new.genre, new.manufacturer, new.description);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS games_fts_ad AFTER DELETE ON games BEGIN
+            INSERT INTO games_fts(games_fts, rowid, title, platform, genre, manufacturer, description)
+            VALUES ('delete', old.id, old.title, old.platform, old.genre, old.manufacturer, old.description);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS games_fts_au AFTER UPDATE ON games BEGIN
+            INSERT INTO games_fts(games_fts, rowid, title, platform, genre, manufacturer, description)
+            VALUES ('delete', old.id, old.title, old.platform, old.genre, old.manufacturer, old.description);
+            INSERT INTO games_fts(rowid, title, platform, genre, manufacturer, description)
+            VALUES (new.id, new.title, new.platform, new.genre, new.manufacturer, new.description);
+        END
+        ''',
+    ]
+
+    def __init__(self, connect=get_db_connection):
+        self.connect = connect
+        self.ensure_schema()
+
+    def ensure_schema(self):
+        conn = self.connect()
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'games_fts'"
+            ).fetchone()
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            if not exists:
+                self._rebuild(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def rebuild(self):
+        conn = self.connect()
+        try:
+            self._rebuild(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _rebuild(conn):
+        conn.execute("INSERT INTO games_fts(games_fts) VALUES ('rebuild')")
+
+    def add(self, game):
+        pass
+
+    update = add
+
+    def remove(self, game_id):
+        pass
+
+    def search(self, query, page=1, per_page=20):
+        terms = tokenize(query)
+        page = max(1, page)
+        if not terms:
+            return SearchResults([], 0, page, per_page)
+
+        # Los tokens son alfanuméricos, así que se pueden citar sin escapar
+        match = ' AND '.join(f'"{term}"*' for term in dict.fromkeys(terms))
+        weights = ', '.join(str(w) for w in FIELD_WEIGHTS.values())
+        conn = self.connect()
+        try:
+            total = conn.execute(
+                'SELECT COUNT(*) FROM games_fts WHERE games_fts MATCH ?', (match,)
+            ).fetchone()[0]
+            rows = conn.execute(
+                f'''
+                SELECT rowid FROM games_fts
+                WHERE games_fts MATCH ?
+                ORDER BY bm25(games_fts, {weights}), rowid
+                LIMIT ? OFFSET ?
+                ''',
+                (match, per_page, (page - 1) * per_page)
+            ).fetchall()
+        finally:
+            conn.close()
+        return SearchResults([row[0] for row in rows], total, page, per_page)
+
+
+_memory = BackgroundIndex('games', lambda conn, version: MemorySearchIndex().build(conn, version),
+                          'índice de búsqueda')
+_fts5 = None
+_fts5_lock = threading.Lock()
+
+
+def get_search_index(version=None):
+    """
+    Índice de búsqueda global. SEARCH_BACKEND=fts5 usa SQLite FTS5 (al día por
+    triggers); por defecto se usa el índice en memoria de cada worker, que se
+    construye en segundo plano: None mientras se construye por primera vez. Con
+    `version` (la versión ALL de games en la base) se reconstruye en segundo
+    plano si es más viejo, p. ej. por escrituras de otro worker.
+    """
+    global _fts5
+    if os.getenv('SEARCH_BACKEND', 'memory').lower() != 'fts5':
+        return _memory.get(version)
+    if _fts5 is None:
+        with _fts5_lock:
+            if _fts5 is None:
+                _fts5 = Fts5SearchIndex()
+    return _fts5
+
+
+def reset_search_index():
+    """Descarta el índice FTS5 y reconstruye el de memoria en segundo plano"""
+    global _fts5
+    with _fts5_lock:
+        _fts5 = None
+    _memory.rebuild()
+
+
+def fetch_games(conn, ids):
+    """Filas completas de games para `ids`, en el mismo orden que `ids`"""
+    if not ids:
+        return []
+    placeholders = ', '.join('?' for _ in ids)
+    rows = conn.execute(f'SELECT * FROM games WHERE id IN ({placeholders})', tuple(ids)).fetchall()
+    by_id = {row['id']: row for row in rows}
+    return [by_id[game_id] for game_id in ids if game_id in by_id]
+
+
+# ---- Mantenimiento incremental desde las rutas de escritura ----
+
+# Sin índice en memoria no hace nada (FTS5 se mantiene con triggers)
+_memory.subscribe(
+    update=MemorySearchIndex.update,
+    remove=lambda index, ids: [index.remove(game_id) for game_id in ids],
+    columns=FIELD_WEIGHTS,
+)
@@ -48,4 +48,125 @@ document.addEventListener('DOMContentLoaded', () => {
         const el = document.getElementById(id);
         if (el) observer.observe(el, { attributes: true });
     });
+
+    // Batch selection: row checkboxes point to the toolbar form via form="batch-<kind>"
+    document.querySelectorAll('form[data-batch]').forEach(form => {
+        const boxes = [...document.querySelectorAll(`input[name="ids"][form="${form.id}"]`)];
+        const all = document.querySelector(`input[data-batch-all="${form.dataset.batch}"]`);
+        const refresh = () => {
+            const checked = boxes.filter(box => box.checked).length;
+            form.querySelector('[data-batch-count]').textContent = checked;
+            form.querySelectorAll('[data-batch-submit]').forEach(btn => { btn.disabled = checked === 0; });
+            if (all) {
+                all.checked = checked > 0 && checked === boxes.length;
+                all.indeterminate = checked > 0 && checked < boxes.length;
+            }
+        };
+        boxes.forEach(box => box.addEventListener('change', refresh));
+        if (all) {
+            all.addEventListener('change', () => {
+                boxes.forEach(box => { box.checked = all.checked; });
+                refresh();
+            });
+        }
+        form.addEventListener('submit', (e) => {
+            const confirmText = e.submitter && e.submitter.dataset.batchConfirm;
+            if (confirmText && !confirm(confirmText)) e.preventDefault();
+        });
+        refresh();
+    });
+
+    // Search autocomplete: one request per pause in typing, stale responses are ignored
+    const suggestList = document.getElementById('search-suggestions');
+    if (searchInput && suggestList && searchInput.dataset.suggestUrl) {
+        const DEBOUNCE_MS = 150;
+        let timer = null;
+        let controller = null;
+        let active = -1;
+
+        const close = () => {
+            suggestList.hidden = true;
+            suggestList.innerHTML = '';
+            searchInput.setAttribute('aria-expanded', 'false');
+            active = -1;
+        };
+        const choose = (text) => {
+            searchInput.value = text;
+            close();
+            searchInput.form.submit();
+        };
+        const highlight = (index) => {
+            const items = [...suggestList.children];
+            active = (index + items.length) % items.length;
+            items.forEach((item, i) => {
+                item.setAttribute('aria-selected', String(i === active));
+                item.classList.toggle('bg-[#073638]', i === active);
+            });
+        };
+        const render = (suggestions) => {
+            suggestList.innerHTML = '';
+            suggestions.forEach((s, i) => {
+                const item = document.createElement('li');
+                item.id = `search-suggestion-${i}`;
+                item.setAttribute('role', 'option');
+                item.className = 'flex justify-between gap-3 px-3 py-2 cursor-pointer hover:bg-[#073638]';
+                const text = document.createElement('span');
+                text.textContent = s.text;
+                const meta = document.createElement('span');
+                meta.className = 'text-xs text-[#6dfff0] opacity-80';
+                meta.textContent = `${s.field} · ${s.inventory} in stock`;
+                item.append(text, meta);
+                item.addEventListener('mousedown', (e) => { e.preventDefault(); choose(s.text); });
+                suggestList.appendChild(item);
+            });
+            suggestList.hidden = suggestions.length === 0;
+            searchInput.setAttribute('aria-expanded', String(suggestions.length > 0));
+            active = -1;
+        };
+        const fetchSuggestions = async (query) => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            try {
+                const url = `${searchInput.dataset.suggestUrl}?q=${encodeURIComponent(query)}`;
+                const response = await fetch(url, { signal: controller.signal, headers: { 'Accept': 'application/json' } });
+                if (!response.ok) return close();
+                const data = await response.json();
+                // Only the answer for what is typed now
+                if (data.query === searchInput.value) render(data.suggestions);
+            } catch (err) {
+                if (err.name !== 'AbortError') close();
+            }
+        };
+
+        searchInput.addEventListener('input', () => {
+            clearTimeout(timer);
+            const query = searchInput.value;
+            if (!query.trim()) {
+                if (controller) controller.abort();
+                return close();
+            }
+            timer = setTimeout(() => fetchSuggestions(query), DEBOUNCE_MS);
+        });
+        searchInput.addEventListener('keydown', (e) => {
+            if (suggestList.hidden) return;
+            if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+                e.preventDefault();
+                highlight(active + (e.key === 'ArrowDown' ? 1 : -1));
+                searchInput.setAttribute('aria-activedescendant', `search-suggestion-${active}`);
+            } else if (e.key === 'Enter' && active >= 0) {
+                e.preventDefault();
+                choose(suggestList.children[active].firstChild.textContent);
+            } else if (e.key === 'Escape') {
+                close();
+            }
+        });
+        searchInput.addEventListener('blur', close);
+    }
+
+    // Facet filters: ticking a value reloads the listing with the new counts
+    document.querySelectorAll('form[data-facets]').forEach(form => {
+        form.querySelectorAll('input[type="checkbox"]').forEach(box => {
+            box.addEventListener('change', () => form.requestSubmit());
+        });
+    });
 });
@@ -0,0 +1,319 @@
+"""
+Resumen de la colección para /stats: totales e inventario por plataforma/modelo,
+distribución de puntuaciones, proporción de sellados y CIB, lanzamientos por año
+y reparto por género y condición.
+
+Los agregados salen de una instantánea columnar en memoria por tipo: un array de
+NumPy por columna (posición = id) con una máscara de filas vivas. Los textos se
+guardan como enteros con un diccionario por columna y la plataforma/modelo es su
+id de lookups, así que cada group-by es un np.bincount sobre enteros en lugar de
+un GROUP BY contra la base en cada visita.
+
+La instantánea se mantiene por eventos desde las rutas de escritura y se
+reconstruye en segundo plano si otro worker ha escrito (ver background_index.py)
+o han pasado REFRESH_SECONDS.
+"""
+import os
+import time
+import logging
+import threading
+import functools
+import numpy as np
+import counters
+import lookups
+from background_index import BackgroundIndex
+
+logger = logging.getLogger(__name__)
+
+# Reconstrucción periódica: recoge cambios hechos fuera de la app (herramientas, SQL a mano)
+REFRESH_SECONDS = float(os.getenv('STATS_REFRESH_SECONDS', 600))
+# Filas por fetchmany al construir
+BUILD_BATCH_SIZE = 10000
+# Géneros/condiciones que se muestran (el resto se suma en "Other")
+TOP_VALUES = 12
+
+# Tipos de columna: (dtype, valor de relleno para huecos y filas sin dato)
+_TYPES = {
+    'id': (np.int32, 0),        # Entero que ya es una clave (platform_id / model_id)
+    'int': (np.int32, 0),
+    'code': (np.int32, 0),      # Texto codificado con el diccionario de la columna (0 = vacío)
+    'score': (np.int8, -1),     # 0-10; -1 sin puntuación
+    'bool': (np.bool_, False),
+    'year': (np.int16, 0),      # Año de release_date; 0 si no tiene
+}
+
+# kind -> [(nombre, columna de la tabla, tipo)]
+COLUMNS = {
+    'games': [
+        ('group', 'platform_id', 'id'),
+        ('genre', 'genre', 'code'),
+        ('condition', 'condition', 'code'),
+        ('score', 'score', 'score'),
+        ('inventory', 'inventory', 'int'),
+        ('cib', 'complete_in_box', 'bool'),
+        ('sealed', 'sealed', 'bool'),
+        ('year', 'release_date', 'year'),
+    ],
+    'consoles': [
+        ('group', 'model_id', 'id'),
+        ('condition', 'condition', 'code'),
+        ('inventory', 'inventory', 'int'),
+        ('cib', 'complete_in_box', 'bool'),
+        ('sealed', 'sealed', 'bool'),
+        ('year', 'release_date', 'year'),
+    ],
+}
+
+
+def _year(raw):
+    if raw is None:
+        return 0
+    if hasattr(raw, 'year'):
+        return raw.year
+    text = str(raw)
+    return int(text[:4]) if text[:4].isdigit() else 0
+
+
+class Dictionary:
+    """Codificación de una columna de texto: código entero por valor (sin distinguir mayúsculas)"""
+
+    def __init__(self):
+        self.labels = [None]    # código -> texto mostrado (el primero que aparece)
+        self._codes = {}        # clave normalizada -> código
+
+    def code(self, raw):
+        if raw is None:
+            return 0
+        label = str(raw).strip()
+        key = label.lower()
+        if not key:
+            return 0
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+
+class Snapshot:
+    """Columnas de un tipo como arrays de NumPy (posición = id) más la máscara de filas vivas"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.columns = COLUMNS[kind]
+        self._lock = threading.RLock()
+        self._live = np.zeros(0, dtype=np.bool_)
+        self._size = 0            # Última posición usada + 1 (el resto es capacidad libre)
+        self._arrays = {name: np.zeros(0, dtype=_TYPES[type][0]) for name, _, type in self.columns}
+        self._dictionaries = {name: Dictionary() for name, _, type in self.columns if type == 'code'}
+        self._names = {}          # id de plataforma/modelo -> nombre
+        self._summary = None      # Resumen calculado para el estado actual
+        # Versión de tabla (versions.ALL) que refleja y momento de la construcción
+        self.version = None
+        self.built_at = None
+
+    def __len__(self):
+        return int(np.count_nonzero(self._live))
+
+    def _reserve(self, size):
+        """Amplía todos los arrays (al doble como mínimo) para que quepan posiciones < size"""
+        if size <= len(self._live):
+            return
+        size = max(size, 2 * len(self._live))
+        grow = size - len(self._live)
+        self._live = np.concatenate([self._live, np.zeros(grow, dtype=np.bool_)])
+        for name, _, type in self.columns:
+            dtype, fill = _TYPES[type]
+            self._arrays[name] = np.concatenate([self._arrays[name], np.full(grow, fill, dtype=dtype)])
+
+    def _value(self, name, type, raw):
+        if type == 'code':
+            return self._dictionaries[name].code(raw)
+        if type == 'score':
+            return -1 if raw is None else int(raw)
+        if type == 'bool':
+            return bool(int(raw)) if raw is not None else False
+        if type == 'year':
+            return _year(raw)
+        return int(raw or 0)
+
+    def _load(self, rows):
+        """Escribe `rows` (filas con id y las columnas) en sus posiciones, vectorizado por columna"""
+        if not rows:
+            return
+        ids = np.fromiter((row['id'] for row in rows), dtype=np.int64, count=len(rows))
+        self._reserve(int(ids.max()) + 1)
+        self._size = max(self._size, int(ids.max()) + 1)
+        for name, column, type in self.columns:
+            dtype = _TYPES[type][0]
+            values = [self._value(name, type, row[column]) for row in rows]
+            self._arrays[name][ids] = np.array(values, dtype=dtype)
+        self._live[ids] = True
+
+    def add(self, row, name=None):
+        """Añade o reemplaza una fila; `name` es el nombre de su plataforma/modelo si se conoce"""
+        with self._lock:
+            self._load([row])
+            if name is not None:
+                self._names[int(self._arrays['group'][row['id']])] = name
+            self._summary = None
+
+    update = add
+
+    def remove(self, ids):
+        with self._lock:
+            ids = np.asarray([row_id for row_id in ids if row_id is not None and row_id < len(self._live)],
+                             dtype=np.int64)
+            if len(ids):
+                self._live[ids] = False
+                self._summary = None
+
+    def update_columns(self, ids, changes, name=None):
+        """Mismo valor nuevo en `changes` ({columna: valor}) para todas las filas `ids` (cambio por lotes)"""
+        with self._lock:
+            ids = np.asarray([row_id for row_id in ids if row_id is not None and row_id < len(self._live)],
+                             dtype=np.int64)
+            if not len(ids):
+                return
+            ids = ids[self._live[ids]]
+            for column_name, column, type in self.columns:
+                if column in changes:
+                    self._arrays[column_name][ids] = self._value(column_name, type, changes[column])
+            group_column = self.columns[0][1]
+            if name is not None and changes.get(group_column) is not None:
+                self._names[int(changes[group_column])] = name
+            self._summary = None
+
+    def build(self, conn, version=None):
+        """Carga todas las filas de la conexión dada"""
+        started = time.perf_counter()
+        table, _ = counters.KINDS[self.kind]
+        lookup_table = lookups.KINDS[self.kind][0]
+        columns = ', '.join(['id'] + [column for _, column, _ in self.columns])
+        with self._lock:
+            cursor = conn.execute(f'SELECT {columns} FROM {table}')
+            while True:
+                rows = cursor.fetchmany(BUILD_BATCH_SIZE)
+                if not rows:
+                    break
+                self._load(rows)
+            self._names = {row[0]: row[1] for row in conn.execute(f'SELECT id, name FROM {lookup_table}').fetchall()}
+            self._summary = None
+            self.version = version
+            self.built_at = time.time()
+        logger.info(f"Instantánea de estadísticas de {table} construida: {len(self)} filas "
+                    f"en {time.perf_counter() - started:.1f}s")
+        return self
+
+    def summary(self):
+        """Agregados del estado actual (se recalculan sólo si algo ha cambiado)"""
+        with self._lock:
+            if self._summary is None:
+                self._summary = self._compute()
+            return self._summary
+
+    def _compute(self):
+        live = self._live[:self._size]
+        # Sin bajas no hace falta filtrar (la máscara copia cada columna)
+        keep = None if live.all() else live
+        columns = {name: array[:self._size] if keep is None else array[:self._size][keep]
+                   for name, array in self._arrays.items()}
+        items = len(columns['group'])
+        group = columns['group'].astype(np.int64)
+        groups = int(group.max()) + 1 if items else 1
+        has_score = 'score' in columns
+
+        # Un solo bincount para grupo x puntuación x sellado x CIB: cubo [grupo, puntuación + 1, sellado, cib]
+        score_slots = 12 if has_score else 1
+        key = group * (score_slots * 4) + columns['sealed'] * 2 + columns['cib']
+        if has_score:
+            key += (columns['score'].astype(np.int64) + 1) * 4
+        cube = np.bincount(key, minlength=groups * score_slots * 4).reshape(groups, score_slots, 2, 2)
+        group_items = cube.sum(axis=(1, 2, 3))
+        group_sealed = cube[:, :, 1, :].sum(axis=(1, 2))
+        group_cib = cube[:, :, :, 1].sum(axis=(1, 2))
+        group_inventory = np.bincount(group, weights=columns['inventory'], minlength=groups)
+        if has_score:
+            group_scores = cube.sum(axis=(2, 3))  # [grupo, puntuación + 1]; columna 0 = sin puntuación
+            group_scored = group_scores[:, 1:].sum(axis=1)
+            group_score_total = group_scores[:, 1:] @ np.arange(11)
+
+        result_groups = []
+        for group_id in np.flatnonzero(group_items):
+            entry = {
+                'id': int(group_id) or None,
+                'name': self._names.get(int(group_id), 'Sin asignar' if not group_id else f'#{group_id}'),
+                'items': int(group_items[group_id]),
+                'inventory': int(group_inventory[group_id]),
+                'sealed_ratio': round(float(group_sealed[group_id] / group_items[group_id]), 4),
+                'cib_ratio': round(float(group_cib[group_id] / group_items[group_id]), 4),
+            }
+            if has_score:
+                entry['avg_score'] = (round(float(group_score_total[group_id] / group_scored[group_id]), 2)
+                                      if group_scored[group_id] else None)
+            result_groups.append(entry)
+        result_groups.sort(key=lambda entry: (-entry['items'], entry['name'].casefold()))
+
+        years = np.bincount(columns['year'], minlength=1)  # Posición 0: sin fecha
+
+        result = {
+            'items': items,
+            'inventory': int(group_inventory.sum()),
+            'sealed_ratio': round(float(group_sealed.sum() / items), 4) if items else 0.0,
+            'cib_ratio': round(float(group_cib.sum() / items), 4) if items else 0.0,
+            'groups': result_groups,
+            'years': [{'year': int(year), 'items': int(years[year])} for year in np.flatnonzero(years[1:]) + 1],
+            'undated': int(years[0]),
+        }
+        if has_score:
+            scores = group_scores.sum(axis=0)
+            scored = int(scores[1:].sum())
+            result['scores'] = scores[1:].tolist()
+            result['unscored'] = int(scores[0])
+            result['avg_score'] = round(float(scores[1:] @ np.arange(11) / scored), 2) if scored else None
+        for name, dictionary in self._dictionaries.items():
+            counts = np.bincount(columns[name], minlength=len(dictionary.labels))
+            order = [code for code in np.argsort(-counts[1:], kind='stable') + 1 if counts[code]]
+            values = [{'value': dictionary.labels[code], 'items': int(counts[code])} for code in order[:TOP_VALUES]]
+            other = int(counts[order[TOP_VALUES:]].sum()) if len(order) > TOP_VALUES else 0
+            if other:
+                values.append({'value': 'Other', 'items': other})
+            result[f'{name}s'] = values
+        return result
+
+
+# ---- Instantáneas globales (una por tipo) ----
+
+_snapshots = {
+    kind: BackgroundIndex(kind, lambda conn, version, kind=kind: Snapshot(kind).build(conn, version),
+                          f'instantánea de estadísticas de {kind}', max_age=REFRESH_SECONDS)
+    for kind in COLUMNS
+}
+
+
+def summary(kind, version=None):
+    """
+    Resumen de `kind`; None mientras se construye por primera vez. Con `version`
+    (la versión ALL actual de la base) se reconstruye en segundo plano si la
+    instantánea es más vieja o tiene más de REFRESH_SECONDS.
+    """
+    snapshot = _snapshots[kind].get(version)
+    if snapshot is None:
+        return None
+    return dict(snapshot.summary(), built_at=snapshot.built_at)
+
+
+def _group_name(kind, row):
+    """Nombre de la plataforma/modelo de una fila escrita (para grupos creados después de construir)"""
+    slug_column = lookups.KINDS[kind][4]
+    entry = lookups.find(kind, row.get(slug_column)) if row.get(slug_column) else None
+    return entry[2] if entry else None
+
+
+# ---- Mantenimiento incremental desde las rutas de escritura ----
+
+for _kind in COLUMNS:
+    # El nombre de la plataforma/modelo se busca fuera del lock del índice
+    _snapshots[_kind].subscribe(update=Snapshot.update, remove=Snapshot.remove,
+                                update_columns=Snapshot.update_columns,
+                                prepare=functools.partial(_group_name, _kind))
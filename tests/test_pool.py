@@ -0,0 +1,195 @@
+"""
+ConnectionPool con SQLite como sustituto del driver (connection.sqlite_creator):
+la contabilidad de huecos (size / in_use) tras cada camino que abre, descarta o
+espera conexiones.
+"""
+import threading
+import time
+
+import pytest
+
+from connection import sqlite_creator
+from pool import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture
+def creator(tmp_path):
+    return sqlite_creator(str(tmp_path / 'pool.db'))
+
+
+def occupancy(pool):
+    stats = pool.stats()
+    return stats['size'], stats['in_use'], stats['idle']
+
+
+def test_checkout_and_release(creator):
+    pool = ConnectionPool(creator, min_size=1, max_size=2)
+    assert occupancy(pool) == (1, 0, 1)
+
+    raw = pool.acquire()
+    assert raw.execute('SELECT 1').fetchone() == (1,)
+    assert occupancy(pool) == (1, 1, 0)
+
+    pool.release(raw)
+    assert occupancy(pool) == (1, 0, 1)
+    assert pool.acquire() is raw
+
+
+def test_creator_failure_frees_the_slot(creator):
+    failing = {'on': False}
+
+    def flaky():
+        if failing['on']:
+            raise OSError('sin red')
+        return creator()
+
+    pool = ConnectionPool(flaky, min_size=0, max_size=1)
+    failing['on'] = True
+    with pytest.raises(OSError):
+        pool.acquire()
+    assert occupancy(pool) == (0, 0, 0)
+
+    failing['on'] = False
+    raw = pool.acquire()
+    assert occupancy(pool) == (1, 1, 0)
+    pool.release(raw)
+
+
+def test_failed_ping_discards_and_reconnects(creator):
+    pool = ConnectionPool(creator, min_size=1, max_size=1, ping_after=0)
+    broken = pool._idle[-1].raw
+    broken.close()
+
+    raw = pool.acquire()
+    assert raw is not broken
+    stats = pool.stats()
+    assert stats['ping_failures'] == 1
+    assert occupancy(pool) == (1, 1, 0)
+    pool.release(raw)
+
+
+def test_recent_connections_are_not_pinged(creator):
+    pool = ConnectionPool(creator, min_size=1, max_size=1, ping_after=30)
+    for _ in range(3):
+        pool.release(pool.acquire())
+    assert pool.stats()['pings'] == 0
+
+    pool._idle[-1].last_used -= 31
+    pool.release(pool.acquire())
+    assert pool.stats()['pings'] == 1
+
+
+def test_expired_connection_is_recycled(creator):
+    pool = ConnectionPool(creator, min_size=1, max_size=1, max_lifetime=60)
+    pool._idle[-1].created_at -= 61
+
+    raw = pool.acquire()
+    assert pool.stats()['recycled'] == 1
+    assert occupancy(pool) == (1, 1, 0)
+    pool.release(raw)
+    assert occupancy(pool) == (1, 0, 1)
+
+
+def test_release_with_discard(creator):
+    pool = ConnectionPool(creator, min_size=0, max_size=2)
+    first, second = pool.acquire(), pool.acquire()
+    assert occupancy(pool) == (2, 2, 0)
+
+    pool.release(first, discard=True)
+    assert occupancy(pool) == (1, 1, 0)
+    assert pool.stats()['discarded'] == 1
+    pool.release(second)
+    assert occupancy(pool) == (1, 0, 1)
+
+
+def test_release_of_foreign_connection_is_ignored(creator):
+    pool = ConnectionPool(creator, min_size=1, max_size=1)
+    pool.release(creator())
+    assert occupancy(pool) == (1, 0, 1)
+
+
+def test_dispose_with_connections_checked_out(creator):
+    pool = ConnectionPool(creator, min_size=0, max_size=3)
+    held = pool.acquire()
+    pool.release(pool.acquire())
+    assert occupancy(pool) == (2, 1, 1)
+
+    pool.dispose()
+    assert occupancy(pool) == (1, 1, 0)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+    # La que estaba en uso se cierra al devolverla
+    pool.release(held)
+    assert occupancy(pool) == (0, 0, 0)
+
+
+def test_wait_until_timeout(creator):
+    pool = ConnectionPool(creator, min_size=0, max_size=1, timeout=0.05)
+    held = pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    stats = pool.stats()
+    assert (stats['waits'], stats['timeouts']) == (1, 1)
+    assert occupancy(pool) == (1, 1, 0)
+
+    pool.release(held)
+    assert occupancy(pool) == (1, 0, 1)
+
+
+def test_waiter_gets_released_connection(creator):
+    pool = ConnectionPool(creator, min_size=0, max_size=1, timeout=5)
+    held = pool.acquire()
+    threading.Timer(0.05, pool.release, (held,)).start()
+
+    assert pool.acquire() is held
+    assert pool.stats()['waits'] == 1
+    assert occupancy(pool) == (1, 1, 0)
+
+
+class _TrackedConnection:
+    """Conexión SQLite que anota si el lock del pool estaba libre al cerrarla"""
+
+    def __init__(self, raw, pool_ref, closes):
+        self._raw = raw
+        self._pool_ref = pool_ref
+        self._closes = closes
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        # Desde otro hilo: el lock del pool es reentrante para el que lo tiene
+        free = []
+
+        def probe():
+            lock = self._pool_ref[0]._lock
+            free.append(lock.acquire(timeout=0.5))
+            if free[0]:
+                lock.release()
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        self._closes.append(free[0])
+        self._raw.close()
+
+
+def test_idle_eviction_closes_outside_the_lock(creator):
+    pool_ref, closes = [], []
+    pool = ConnectionPool(lambda: _TrackedConnection(creator(), pool_ref, closes),
+                          min_size=0, max_size=2, idle_timeout=60)
+    pool_ref.append(pool)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    pool._idle[0].last_used = time.monotonic() - 61
+
+    raw = pool.acquire()
+    assert raw is second
+    assert closes == [True]
+    stats = pool.stats()
+    assert stats['closed_idle'] == 1
+    assert occupancy(pool) == (1, 1, 0)
+    pool.release(raw)
@@ -1,4 +1,5 @@
 from connection import get_sqlserver_connection
+from user_cache import invalidate_user
 
 def add_role_column():
     conn = get_sqlserver_connection()
@@ -38,6 +39,7 @@ def add_role_column():
             WHERE username = 'admin'
         """)
         conn.commit()
+        invalidate_user()
         print("   ✅ Usuario admin actualizado")
         
         # 4. Verificar
@@ -0,0 +1,169 @@
+"""
+Benchmark de concurrencia: worker WSGI síncrono (una petición a la vez) frente a
+la entrada ASGI (asgi.py) con latencia de base de datos simulada.
+
+Cada sentencia SQL espera --latency ms antes de ejecutarse, como el round trip
+a Azure SQL. Las peticiones se hacen en el mismo proceso, sin servidor HTTP.
+
+Uso:
+    python tools/bench_async.py
+    python tools/bench_async.py --latency 50 --requests 400 --threads 8 32 64
+"""
+import os
+import sys
+import time
+import sqlite3
+import asyncio
+import logging
+import tempfile
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+import seed_collection
+from bench_routes import build_app, logged_in_client, percentile
+
+
+def slow_creator(database_path, latency):
+    """Creator del pool cuyas conexiones tardan `latency` segundos por sentencia"""
+
+    class SlowCursor(sqlite3.Cursor):
+        def execute(self, sql, parameters=()):
+            time.sleep(latency)
+            return super().execute(sql, parameters)
+
+        def executemany(self, sql, seq_of_parameters):
+            time.sleep(latency)
+            return super().executemany(sql, seq_of_parameters)
+
+    class SlowConnection(sqlite3.Connection):
+        def cursor(self, factory=SlowCursor):
+            return super().cursor(factory)
+
+        def execute(self, sql, parameters=()):
+            return self.cursor().execute(sql, parameters)
+
+    def connect():
+        return sqlite3.connect(database_path, check_same_thread=False, factory=SlowConnection)
+    return connect
+
+
+def request_paths(count):
+    platforms = [p[0].replace(' ', '').lower() for p in seed_collection.PLATFORMS]
+    paths = []
+    for i in range(count):
+        if i % 2:
+            paths.append(f'/games/{platforms[i % len(platforms)]}')
+        else:
+            paths.append('/?sort=title&per_page=20')
+    return paths
+
+
+def run_sync(client, paths):
+    """Un worker síncrono: cada petición espera a que termine la anterior"""
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for path in paths:
+        t0 = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - t0)
+        errors += response.status_code >= 400
+    return time.perf_counter() - start, sorted(latencies), errors
+
+
+async def _asgi_get(application, path, cookie):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'root_path': '', 'query_string': query.encode('latin1'),
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode('latin1'))],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+    }
+    status = {}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status['code'] = message['status']
+
+    await application(scope, receive, send)
+    return status.get('code', 500)
+
+
+async def _run_async(application, paths, cookie, concurrency):
+    queue = list(reversed(paths))
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        while queue:
+            path = queue.pop()
+            t0 = time.perf_counter()
+            code = await _asgi_get(application, path, cookie)
+            latencies.append(time.perf_counter() - t0)
+            errors += code >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=5000)
+    parser.add_argument('--consoles', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=20, help='Milisegundos por sentencia SQL')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=64, help='Clientes simultáneos en modo ASGI')
+    parser.add_argument('--threads', type=int, nargs='+', default=[8, 32], help='ASGI_THREADS a medir')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK SYNC vs ASGI ({args.latency:g} ms por sentencia)")
+    print("=" * 80)
+
+    database_path = os.path.join(tempfile.mkdtemp(prefix='videogames-async-'), 'async.db')
+    seed_collection.seed(database_path, args.games, args.consoles, args.seed)
+    # Sin caché de listados: cada petición llega a la base
+    os.environ['PAGE_CACHE_BACKEND'] = 'none'
+    # Importar asgi crea su aplicación y comprueba el esquema contra DATABASE_PATH
+    os.environ.update(DB_BACKEND='sqlite', DATABASE_PATH=database_path)
+    from asgi import AsgiAdapter
+
+    import connection
+    creator = slow_creator(database_path, args.latency / 1000)
+    app = build_app(database_path, creator)
+    client = logged_in_client(app)
+    cookie = f"session={client.get_cookie('session').value}"
+    # Con latencia simulada todas las sentencias pasan de SLOW_QUERY_MS
+    logging.disable(logging.WARNING)
+    paths = request_paths(args.requests)
+
+    results = []
+    print("\n▶ sync (1 petición a la vez)...", flush=True)
+    results.append(('sync', 1) + run_sync(client, paths))
+    for threads in args.threads:
+        # Un hilo por conexión: el pool no debe ser el cuello de botella
+        connection.configure_pool(creator, max_size=threads)
+        application = AsgiAdapter(app, threads=threads, max_pending=args.concurrency)
+        print(f"▶ asgi ({threads} hilos, {args.concurrency} clientes)...", flush=True)
+        results.append(('asgi', threads) + asyncio.run(_run_async(application, paths, cookie, args.concurrency)))
+
+    print(f"\n   {'modo':6} {'hilos':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    baseline = None
+    for mode, threads, elapsed, latencies, errors in results:
+        throughput = len(latencies) / elapsed
+        baseline = baseline or throughput
+        print(f"   {mode:6} {threads:>6} {throughput:>9.1f} {percentile(latencies, 50) * 1000:>9.1f} "
+              f"{percentile(latencies, 95) * 1000:>9.1f} {percentile(latencies, 99) * 1000:>9.1f} {errors:>8}"
+              f"   x{throughput / baseline:.1f}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
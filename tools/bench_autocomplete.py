@@ -0,0 +1,135 @@
+"""
+Benchmark del autocompletado (autocomplete.SuggestionIndex) con títulos sintéticos:
+construcción, memoria, tiempo por pulsación escribiendo títulos letra a letra
+(dos pasadas) y altas/bajas incrementales.
+Como referencia, la consulta LIKE '%...%' ordenada que haría falta sin índice.
+
+Uso: python tools/bench_autocomplete.py [--titles 100000 1000000] [--typed 300]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import resource
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autocomplete import SuggestionIndex
+
+WORDS = (
+    'super mario zelda legend final fantasy dragon quest metal gear solid sonic hedgehog kingdom hearts '
+    'street fighter tekken resident evil silent hill crash bandicoot spyro halo gears war forza horizon '
+    'grand theft auto city night shadow dark souls knight star wars battle front racing world cup pro '
+    'soccer tennis golf party kart galaxy odyssey breath wild ocarina time twilight princess chrono trigger'
+).split()
+PLATFORMS = ['PlayStation 2', 'PlayStation 3', 'Xbox 360', 'Wii', 'GameCube', 'Nintendo 64', 'Switch', 'Dreamcast']
+GENRES = ['RPG', 'Action', 'Action RPG', 'Racing', 'Sports', 'Platformer', 'Fighting', 'Shooter', 'Puzzle']
+MANUFACTURERS = ['Nintendo', 'Sony', 'Microsoft', 'Sega', 'Capcom', 'Konami', 'Square Enix', 'Bandai Namco']
+
+
+def create_database(titles, seed=7):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE games (id INTEGER PRIMARY KEY, title, platform, genre, manufacturer, inventory, score)')
+    conn.executemany(
+        'INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ((i, ' '.join(rng.choices(WORDS, k=rng.randint(2, 5))).title(), rng.choice(PLATFORMS),
+          rng.choice(GENRES), rng.choice(MANUFACTURERS), rng.randint(0, 5), rng.choice([None, *range(11)]))
+         for i in range(1, titles + 1))
+    )
+    conn.commit()
+    return conn
+
+
+def rss_mb():
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def keystrokes(conn, typed, seed=11):
+    """Prefijos que se envían al escribir `typed` títulos al azar letra a letra"""
+    rng = random.Random(seed)
+    total = conn.execute('SELECT COUNT(*) FROM games').fetchone()[0]
+    queries = []
+    for _ in range(typed):
+        title = conn.execute('SELECT title FROM games WHERE id = ?', (rng.randint(1, total),)).fetchone()[0]
+        # Hasta la segunda palabra: lo habitual antes de elegir una sugerencia
+        words = title.split(' ')[:2]
+        text = ' '.join(words)
+        queries.extend(text[:end] for end in range(1, len(text) + 1))
+    return queries
+
+
+def time_queries(index, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        index.suggest(query)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], samples[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--typed', type=int, default=300, help='Títulos escritos letra a letra')
+    parser.add_argument('--like', type=int, default=20, help='Consultas LIKE de referencia')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("BENCHMARK DE AUTOCOMPLETADO")
+    print("=" * 80)
+
+    for titles in args.titles:
+        conn = create_database(titles)
+        print(f"\n📊 {titles:,} juegos")
+
+        print("\n1️⃣  Construcción")
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        index = SuggestionIndex().build(conn)
+        print(f"   {time.perf_counter() - start:.2f}s, {len(index):,} sugerencias, "
+              f"pico RSS +{rss_mb() - rss_before:,.0f} MB")
+
+        queries = keystrokes(conn, args.typed)
+        print(f"\n2️⃣  Por pulsación ({len(queries):,} prefijos, µs)")
+        print(f"   {'pasada':18} {'mediana':>10} {'p99':>10} {'máximo':>10}")
+        for name in ('1ª pasada', '2ª pasada'):
+            median, p99, worst = time_queries(index, queries)
+            print(f"   {name:18} {median:>10.1f} {p99:>10.1f} {worst:>10.1f}")
+
+        print("\n3️⃣  Cambios incrementales (µs por juego)")
+        rng = random.Random(3)
+        ids = rng.sample(range(1, titles + 1), 200)
+        rows = [dict(conn.execute('SELECT * FROM games WHERE id = ?', (game_id,)).fetchone()) for game_id in ids]
+        start = time.perf_counter()
+        for game_id in ids:
+            index.remove(game_id)
+        removed = (time.perf_counter() - start) / len(ids) * 1_000_000
+        start = time.perf_counter()
+        for row in rows:
+            index.add(row)
+        added = (time.perf_counter() - start) / len(ids) * 1_000_000
+        print(f"   baja {removed:,.0f}   alta {added:,.0f}   (invalidan los top-N de sus prefijos)")
+
+        print(f"\n4️⃣  Referencia: LIKE '%prefijo%' ORDER BY inventory en SQLite ({args.like} consultas, µs)")
+        samples = []
+        for query in queries[:args.like]:
+            start = time.perf_counter()
+            conn.execute('SELECT title FROM games WHERE title LIKE ? ORDER BY inventory DESC LIMIT 8',
+                         (f'%{query}%',)).fetchall()
+            samples.append((time.perf_counter() - start) * 1_000_000)
+        print(f"   mediana {statistics.median(samples):,.1f}   máximo {max(samples):,.1f}")
+        conn.close()
+        del index
+
+    print("\n" + "=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark de /api/games y /api/consoles: la memoria del export en streaming debe
+mantenerse constante aunque la colección pase de 10k a 1M filas.
+
+Uso:
+    python tools/bench_export.py
+    python tools/bench_export.py --sizes 10000 100000 1000000 --format csv
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+import seed_collection
+from bench_routes import build_app, logged_in_client
+import connection
+
+
+def measure(client, url, trace=False):
+    """
+    Consume la respuesta sin guardarla; retorna (bytes, líneas, segundos, pico, estado).
+    Con trace=True mide el pico con tracemalloc (que distorsiona el tiempo).
+    """
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    size = lines = 0
+    for chunk in response.response:
+        size += len(chunk)
+        lines += chunk.count(b'\n')
+    response.close()
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return size, lines, elapsed, peak, response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BENCHMARK DE EXPORTACIÓN ({args.format})")
+    print("=" * 80)
+
+    workdir = tempfile.mkdtemp(prefix='videogames-export-')
+    app = client = None
+    results = []
+    for size in args.sizes:
+        database_path = os.path.join(workdir, f'export-{size}.db')
+        print(f"\n🌱 Sembrando {size} juegos...", flush=True)
+        seed_collection.seed(database_path, games=size, consoles=0, seed_value=args.seed)
+
+        if app is None:
+            app = build_app(database_path)
+            client = logged_in_client(app)
+        else:
+            os.environ['DATABASE_PATH'] = database_path
+            connection.configure_pool(connection.sqlite_creator(database_path))
+
+        url = f'/api/games?format={args.format}'
+        size_bytes, lines, elapsed, _, status = measure(client, url)
+        peak = measure(client, url, trace=True)[3]
+        results.append((size, size_bytes, lines, elapsed, peak, status))
+        print(f"   {lines} líneas, {size_bytes / 2**20:.1f} MB en {elapsed:.2f}s | pico {peak / 1024:.0f} KB")
+
+    print(f"\n   {'filas':>9} {'MB':>9} {'segundos':>9} {'filas/s':>10} {'pico KB':>9} {'estado':>7}")
+    for size, size_bytes, lines, elapsed, peak, status in results:
+        print(f"   {size:>9} {size_bytes / 2**20:>9.1f} {elapsed:>9.2f} {size / elapsed:>10.0f} "
+              f"{peak / 1024:>9.0f} {status:>7}")
+
+    peaks = [r[4] for r in results]
+    print(f"\n   Pico máximo / mínimo: {max(peaks) / min(peaks):.2f}x "
+          f"(constante si se mantiene cerca de 1 al crecer la colección)")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark de los filtros por facetas (facets.FacetIndex) con juegos sintéticos:
+construcción, memoria y tiempo de los recuentos de todas las facetas para
+varias combinaciones de filtros, frente a un GROUP BY por faceta en SQLite
+(lo que haría falta sin índice).
+
+Uso: python tools/bench_facets.py [--rows 100000 1000000] [--repeat 20]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import resource
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import facets
+
+PLATFORMS = ['PlayStation 2', 'PlayStation 3', 'Xbox 360', 'Wii', 'GameCube', 'Nintendo 64', 'Switch', 'Dreamcast']
+GENRES = ['RPG', 'Action', 'Action RPG', 'Racing', 'Sports', 'Platformer', 'Fighting', 'Shooter', 'Puzzle']
+MANUFACTURERS = ['Nintendo', 'Sony', 'Microsoft', 'Sega', 'Capcom', 'Konami', 'Square Enix', 'Bandai Namco']
+CONDITIONS = ['Nuevo', 'Usado', 'Dañado']
+
+# (nombre, request.args, grupo)
+SCENARIOS = [
+    ('sin filtros', {}, None),
+    ('plataforma', {}, 'playstation2'),
+    ('género', {'genre': ['RPG']}, 'playstation2'),
+    ('2 géneros + CIB', {'genre': ['RPG', 'Action'], 'cib': ['1']}, 'playstation2'),
+    ('puntuación ≥ 7 + año', {'score_min': ['7'], 'year': ['2004', '2005']}, None),
+    ('5 facetas', {'genre': ['Racing'], 'condition': ['usado'], 'sealed': ['0'], 'score_min': ['5'],
+                   'manufacturer': ['Sony', 'Sega']}, 'wii'),
+]
+
+
+class Args(dict):
+    """Lo mínimo de request.args que usa parse_filters"""
+
+    def get(self, name, default=None, type=None):
+        values = dict.get(self, name)
+        return type(values[0]) if values else default
+
+    def getlist(self, name):
+        return dict.get(self, name, [])
+
+
+def create_database(rows, seed=7):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE games (id INTEGER PRIMARY KEY, platform_normalized, genre, manufacturer, condition, '
+                 'complete_in_box, sealed, score, release_date)')
+    conn.executemany(
+        'INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        ((i, rng.choice(PLATFORMS).replace(' ', '').lower(), rng.choice(GENRES), rng.choice(MANUFACTURERS),
+          rng.choice(CONDITIONS), rng.randint(0, 1), int(rng.random() < 0.1), rng.choice([None, *range(11)]),
+          f'{rng.randint(1985, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}')
+         for i in range(1, rows + 1))
+    )
+    conn.execute('CREATE INDEX ix_games_platform ON games (platform_normalized)')
+    conn.commit()
+    return conn
+
+
+def rss_mb():
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def sql_counts(conn, filters, group):
+    """Recuentos con un GROUP BY por faceta, cada uno con los filtros de las demás"""
+    for facet in facets.FACETS['games']:
+        others = {name: keys for name, keys in filters.items() if name != facet.name}
+        where, params = facets.where_clause('games', others)
+        if group:
+            where = ' AND '.join(filter(None, ['platform_normalized = ?', where]))
+            params = (group,) + params
+        conn.execute(f"SELECT {facet.column}, COUNT(*) FROM games {'WHERE ' + where if where else ''} "
+                     f"GROUP BY {facet.column}", params).fetchall()
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("BENCHMARK DE FACETAS")
+    print("=" * 80)
+
+    for rows in args.rows:
+        conn = create_database(rows)
+        print(f"\n📊 {rows:,} juegos")
+
+        print("\n1️⃣  Construcción")
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        index = facets.FacetIndex('games').build(conn)
+        print(f"   {time.perf_counter() - start:.2f}s, {len(index):,} filas, pico RSS +{rss_mb() - rss_before:,.0f} MB")
+
+        print(f"\n2️⃣  Recuentos de las {len(facets.FACETS['games'])} facetas (ms, mediana de {args.repeat})")
+        print(f"   {'filtros':26} {'resultado':>10} {'bits':>10} {'SQL':>10}")
+        for name, raw, group in SCENARIOS:
+            filters = facets.parse_filters('games', Args(raw))
+            total = index.search(filters, group).total
+            bitmaps = timed(lambda: index.search(filters, group), args.repeat)
+            sql = timed(lambda: sql_counts(conn, filters, group), max(1, args.repeat // 5))
+            print(f"   {name:26} {total:>10,} {bitmaps:>10.2f} {sql:>10.2f}")
+
+        print("\n3️⃣  Cambios incrementales (µs por fila)")
+        rng = random.Random(3)
+        ids = rng.sample(range(1, rows + 1), 200)
+        changed = [dict(conn.execute('SELECT * FROM games WHERE id = ?', (row_id,)).fetchone(), genre='Puzzle')
+                   for row_id in ids]
+        start = time.perf_counter()
+        for row in changed:
+            index.update(row)
+        updated = (time.perf_counter() - start) / len(ids) * 1_000_000
+        start = time.perf_counter()
+        index.remove(ids)
+        removed = (time.perf_counter() - start) * 1_000_000
+        print(f"   edición {updated:,.0f}   baja por lotes de {len(ids)} {removed:,.0f} en total")
+        conn.close()
+        del index
+
+    print("\n" + "=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark del rate limiting: coste por comprobación de cada storage, límite
+respetado entre procesos y sobrecoste por petición en la app.
+
+Uso:
+    python tools/bench_limiter.py
+    python tools/bench_limiter.py --checks 20000 --processes 8
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import STRATEGIES
+import rate_limit_storage  # Registra sqlite://
+from bench_routes import percentile
+
+# (nombre, storage_uri, estrategia)
+BACKENDS = [
+    ('memory fixed-window', 'memory://', 'fixed-window'),
+    ('memory sliding', 'memory://', 'sliding-window-counter'),
+    ('sqlite sliding', 'sqlite:///{workdir}/ratelimit.db', 'sliding-window-counter'),
+]
+
+
+def bench_checks(uri, strategy, checks, keys):
+    """Latencias de hit() repartidas entre `keys` claves (ninguna llega al límite)"""
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = parse('1000000 per hour')
+    latencies = []
+    for i in range(checks):
+        key = f'10.0.{i % keys // 256}.{i % keys % 256}'
+        start = time.perf_counter()
+        limiter.hit(item, key)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies
+
+
+def _hammer(uri, strategy, limit, attempts, results):
+    limiter = STRATEGIES[strategy](storage_from_string(uri))
+    item = parse(f'{limit} per hour')
+    results.put(sum(limiter.hit(item, 'shared-key') for _ in range(attempts)))
+
+
+def bench_processes(uri, strategy, processes, limit, attempts):
+    """Procesos que compiten por la misma clave; retorna (aceptadas, segundos)"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    workers = [context.Process(target=_hammer, args=(uri, strategy, limit, attempts, results))
+               for _ in range(processes)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    accepted = sum(results.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    return accepted, time.perf_counter() - start
+
+
+def bench_requests(workdir, requests):
+    """Latencia media de GET /login con el limiter (sqlite) activado y desactivado"""
+    os.environ['RATELIMIT_STORAGE_URI'] = f'sqlite:///{workdir}/app-ratelimit.db'
+    os.environ['DATABASE_PATH'] = os.path.join(workdir, 'app.db')
+    from app import create_app, limiter
+    client = create_app().test_client()
+
+    timings = {}
+    for enabled in (False, True, False, True):
+        limiter.enabled = enabled
+        start = time.perf_counter()
+        for i in range(requests):
+            # Una IP distinta por petición: ninguna llega al límite y la tabla crece como en producción
+            client.get('/login', environ_base={'REMOTE_ADDR': f'10.1.{i // 256 % 256}.{i % 256}'})
+        timings.setdefault(enabled, []).append((time.perf_counter() - start) / requests)
+    return min(timings[False]), min(timings[True])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=20000, help='Comprobaciones por storage')
+    parser.add_argument('--keys', type=int, default=5000, help='Claves distintas')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--limit', type=int, default=1000, help='Límite compartido en la prueba entre procesos')
+    parser.add_argument('--requests', type=int, default=2000, help='Peticiones a /login por medición')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("BENCHMARK DEL RATE LIMITING")
+    print("=" * 80)
+    workdir = tempfile.mkdtemp(prefix='videogames-limiter-')
+
+    print(f"\n1️⃣  Coste por comprobación ({args.checks} hits, {args.keys} claves)")
+    print(f"   {'storage':22} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'hits/s':>10}")
+    for name, uri, strategy in BACKENDS:
+        latencies = bench_checks(uri.format(workdir=workdir), strategy, args.checks, args.keys)
+        print(f"   {name:22} {percentile(latencies, 50) * 1e6:>9.1f} {percentile(latencies, 95) * 1e6:>9.1f} "
+              f"{percentile(latencies, 99) * 1e6:>9.1f} {len(latencies) / sum(latencies):>10.0f}")
+
+    attempts = args.limit
+    print(f"\n2️⃣  {args.processes} procesos x {attempts} intentos contra un límite de {args.limit}/hora")
+    for name, uri, strategy in BACKENDS[1:]:
+        accepted, elapsed = bench_processes(uri.format(workdir=workdir), strategy,
+                                            args.processes, args.limit, attempts)
+        mark = '✅' if accepted <= args.limit else '❌'
+        print(f"   {mark} {name:22} aceptadas {accepted:>6} (límite {args.limit}) en {elapsed:.2f}s")
+
+    print(f"\n3️⃣  Sobrecoste por petición (GET /login, {args.requests} IPs distintas)")
+    disabled, enabled = bench_requests(workdir, args.requests)
+    print(f"   sin limiter:  {disabled * 1000:.3f} ms/petición")
+    print(f"   con limiter:  {enabled * 1000:.3f} ms/petición "
+          f"(+{(enabled - disabled) * 1e6:.0f} µs, 2 límites por defecto)")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+Benchmark de todas las rutas de app.py con el test client de Flask, sin conexión:
+get_sqlserver_connection() se sustituye por un pool sobre una base SQLite sintética.
+
+Uso:
+    python tools/bench_routes.py --games 10000 --consoles 1000
+    python tools/bench_routes.py --games 100000 --compare bench_results/routes-anterior.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+import argparse
+import resource
+import tracemalloc
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+import seed_collection
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def build_app(database_path, creator=None):
+    os.environ['DATABASE_PATH'] = database_path
+    import connection
+    connection.configure_pool(creator or connection.sqlite_creator(database_path))
+
+    from app import create_app
+    # Los límites por defecto (50/hora) cortarían el benchmark a las pocas peticiones
+    return create_app({'TESTING': True, 'WTF_CSRF_ENABLED': False, 'RATELIMIT_ENABLED': False})
+
+
+def logged_in_client(app, username='bench_admin'):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': seed_collection.USER_PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError(f"No se pudo iniciar sesión como {username} ({response.status_code})")
+    return client
+
+
+class Scenario:
+    """Una ruta a medir: `request(ctx)` hace una petición y devuelve la respuesta"""
+
+    def __init__(self, name, request, iterations=None):
+        self.name = name
+        self.request = request
+        self.iterations = iterations
+
+
+def _game_form(rng, platform_name=None):
+    platform_name = platform_name or rng.choice(seed_collection.PLATFORMS)[0]
+    return {
+        'title': f'Bench {rng.randint(0, 10**9)}', 'release_date': '2005-06-01',
+        'manufacturer': 'Bench', 'description': 'Juego creado por el benchmark',
+        'genre': rng.choice(seed_collection.GENRES), 'platform': platform_name,
+        'score': str(rng.randint(0, 10)), 'complete_in_box': 'on',
+        'condition': 'Usado', 'inventory': '1',
+    }
+
+
+def _console_form(rng):
+    platform_name = rng.choice(seed_collection.PLATFORMS)[0]
+    return {
+        'name': f'{platform_name} Bench', 'model': platform_name, 'release_date': '2005-06-01',
+        'manufacturer': 'Bench', 'serial_number_box': f'BB{rng.randint(0, 10**12)}',
+        'serial_number_console': f'BS{rng.randint(0, 10**12)}', 'complete_in_box': 'on',
+        'condition': 'Usado', 'inventory': '1',
+    }
+
+
+def build_scenarios(ctx, login_iterations):
+    rng = ctx['rng']
+    platforms = [p[0].replace(' ', '').lower() for p in seed_collection.PLATFORMS]
+    words = [w.lower() for w in seed_collection.TITLE_NOUNS + seed_collection.GENRES]
+
+    def created(kind):
+        # Ids creados por add_*; delete_* los consume para no vaciar la colección sembrada
+        return ctx['created'][kind].pop() if ctx['created'][kind] else rng.randint(1, ctx[kind])
+
+    def add_game(c):
+        response = c.post('/add', data=_game_form(rng))
+        ctx['created']['games'].append(ctx['next_id']('games'))
+        return response
+
+    def add_console(c):
+        response = c.post('/add_console', data=_console_form(rng))
+        ctx['created']['consoles'].append(ctx['next_id']('consoles'))
+        return response
+
+    def login(c):
+        client = ctx['app'].test_client()
+        return client.post('/login', data={'username': 'bench_admin', 'password': seed_collection.USER_PASSWORD})
+
+    return [
+        Scenario('index', lambda c: c.get('/')),
+        Scenario('index_sorted', lambda c: c.get(f"/?sort={rng.choice(['title', 'release_date', 'score'])}&order=desc")),
+        Scenario('search', lambda c: c.get(f'/?q={rng.choice(words)}')),
+        Scenario('api_search', lambda c: c.get(f'/api/search?q={rng.choice(words)}&page=2')),
+        Scenario('games_by_platform', lambda c: c.get(f'/games/{rng.choice(platforms)}')),
+        Scenario('console_by_model', lambda c: c.get(f'/consoles/{rng.choice(platforms)}')),
+        Scenario('edit_game_form', lambda c: c.get(f"/edit/{rng.randint(1, ctx['games'])}")),
+        Scenario('edit_console_form', lambda c: c.get(f"/edit_console/{rng.randint(1, ctx['consoles'])}")),
+        Scenario('add_game', add_game),
+        Scenario('edit_game', lambda c: c.post(f"/edit/{rng.randint(1, ctx['games'])}", data=_game_form(rng))),
+        Scenario('delete_game', lambda c: c.post(f"/delete/{created('games')}")),
+        Scenario('add_console', add_console),
+        Scenario('edit_console', lambda c: c.post(f"/edit_console/{rng.randint(1, ctx['consoles'])}",
+                                                  data=_console_form(rng))),
+        Scenario('delete_console', lambda c: c.post(f"/delete_console/{created('consoles')}")),
+        Scenario('login', login, iterations=login_iterations),
+    ]
+
+
+def run_scenario(scenario, client, iterations, warmup, memory_samples):
+    for _ in range(warmup):
+        scenario.request(client)
+
+    latencies, errors = [], 0
+    statements = _statement_count()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        response = scenario.request(client)
+        latencies.append(time.perf_counter() - t0)
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - start
+    statements = _statement_count() - statements
+
+    # Pico de memoria asignada por petición (aparte, tracemalloc distorsiona los tiempos)
+    peak = 0
+    for _ in range(memory_samples):
+        tracemalloc.start()
+        scenario.request(client)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'requests': iterations,
+        'errors': errors,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        'throughput_rps': iterations / elapsed if elapsed else 0.0,
+        'peak_alloc_kb': peak / 1024,
+        # Round trips a la base por petición: con Azure SQL cada uno cuesta la latencia de red
+        'sql_per_request': statements / iterations if iterations else 0.0,
+    }
+
+
+def _statement_count():
+    from query_stats import query_stats
+    return sum(entry['count'] for entry in query_stats.stats()['queries'].values())
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def print_report(results, previous=None):
+    print(f"\n   {'ruta':20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'pico KB':>9} {'SQL/req':>8} {'errores':>8}")
+    for name, r in results['routes'].items():
+        line = (f"   {name:20} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                f"{r['throughput_rps']:>9.1f} {r['peak_alloc_kb']:>9.0f} "
+                f"{r.get('sql_per_request', 0):>8.1f} {r['errors']:>8}")
+        old = (previous or {}).get('routes', {}).get(name)
+        if old and old['p95_ms']:
+            change = (r['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+            line += f"   p95 {change:+.0f}%"
+        print(line)
+    print(f"\n   RSS máximo del proceso: {results['meta']['max_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=10000, help='Juegos sintéticos (1k a 1M)')
+    parser.add_argument('--consoles', type=int, default=1000)
+    parser.add_argument('--db', help='Base SQLite ya sembrada (por defecto se genera una temporal)')
+    parser.add_argument('--iterations', type=int, default=200, help='Peticiones por ruta')
+    parser.add_argument('--login-iterations', type=int, default=20, help='Peticiones de login (bcrypt es lento)')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--memory-samples', type=int, default=3)
+    parser.add_argument('--routes', nargs='+', help='Medir sólo estas rutas')
+    parser.add_argument('--output', help='Archivo JSON de resultados (default: bench_results/routes-<fecha>.json)')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior para comparar')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 90)
+    print("BENCHMARK DE RUTAS")
+    print("=" * 90)
+
+    database_path = args.db
+    if not database_path:
+        database_path = os.path.join(tempfile.mkdtemp(prefix='videogames-bench-'), 'bench.db')
+        print(f"\n🌱 Sembrando {args.games} juegos y {args.consoles} consolas en {database_path}...")
+        start = time.perf_counter()
+        seed_collection.seed(database_path, args.games, args.consoles, args.seed)
+        print(f"   listo en {time.perf_counter() - start:.1f}s")
+
+    app = build_app(database_path)
+    client = logged_in_client(app)
+
+    import sqlite3
+    with sqlite3.connect(database_path) as conn:
+        games = conn.execute('SELECT MAX(id) FROM games').fetchone()[0] or 1
+        consoles = conn.execute('SELECT MAX(id) FROM consoles').fetchone()[0] or 1
+
+    def next_id(table):
+        with sqlite3.connect(database_path) as conn:
+            return conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0]
+
+    ctx = {'app': app, 'rng': random.Random(args.seed), 'games': games, 'consoles': consoles,
+           'created': {'games': [], 'consoles': []}, 'next_id': next_id}
+
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'games': games,
+            'consoles': consoles,
+            'iterations': args.iterations,
+        },
+        'routes': {},
+    }
+
+    for scenario in build_scenarios(ctx, args.login_iterations):
+        if args.routes and scenario.name not in args.routes:
+            continue
+        print(f"   ▶ {scenario.name}...", flush=True)
+        results['routes'][scenario.name] = run_scenario(
+            scenario, client, scenario.iterations or args.iterations, args.warmup, args.memory_samples
+        )
+
+    results['meta']['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(results, previous)
+
+    output = args.output or os.path.join(ROOT, 'bench_results',
+                                         f"routes-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Resultados guardados en {output}")
+    print("=" * 90)
+
+
+if __name__ == '__main__':
+    main()
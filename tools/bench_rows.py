@@ -0,0 +1,106 @@
+"""
+Benchmark de memoria y throughput: filas dict (DictCursor antiguo) vs Row compactas.
+
+Uso: python tools/bench_rows.py [--rows 10000 1000000] [--batch 500]
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection import DictCursor
+
+COLUMNS = (
+    'id', 'title', 'release_date', 'manufacturer', 'description', 'genre', 'platform',
+    'platform_normalized', 'score', 'complete_in_box', 'condition', 'inventory', 'sealed'
+)
+
+
+def create_database(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute(f"CREATE TABLE games ({', '.join(COLUMNS)})")
+    conn.executemany(
+        f"INSERT INTO games VALUES ({', '.join('?' for _ in COLUMNS)})",
+        ((i, f'Game {i}', 2000 + i % 25, 'Sony', 'Descripción de prueba', 'RPG',
+          'PlayStation 2', 'playstation2', i % 11, i % 2, 'Usado', 1, 0)
+         for i in range(rows))
+    )
+    conn.commit()
+    return conn
+
+
+def legacy_fetchall(cursor):
+    """Implementación anterior de DictCursor.fetchall: un dict nuevo por fila"""
+    rows = cursor.fetchall()
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def run_dict(conn, batch):
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM games')
+    return legacy_fetchall(cursor)
+
+
+def run_rows(conn, batch):
+    return DictCursor(conn.cursor()).execute('SELECT * FROM games').fetchall()
+
+
+def run_stream(conn, batch):
+    # Sólo retiene un lote a la vez; devuelve la suma para que el trabajo no se optimice
+    total = 0
+    cursor = DictCursor(conn.cursor()).execute('SELECT * FROM games')
+    for rows in cursor.iter_batches(batch):
+        for row in rows:
+            total += row.score
+    return total
+
+
+def measure(func, conn, batch):
+    start = time.perf_counter()
+    result = func(conn, batch)
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = func(conn, batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--batch', type=int, default=500, help='Tamaño de lote para streaming')
+    args = parser.parse_args()
+
+    variants = [
+        ('dict (antes)', run_dict),
+        ('Row fetchall', run_rows),
+        (f'Row stream x{args.batch}', run_stream),
+    ]
+
+    print("=" * 72)
+    print("BENCHMARK DE FILAS: dict vs Row")
+    print("=" * 72)
+
+    for rows in args.rows:
+        conn = create_database(rows)
+        print(f"\n📊 {rows:,} filas")
+        print(f"   {'variante':22} {'tiempo':>10} {'filas/s':>14} {'pico memoria':>14}")
+        for name, func in variants:
+            elapsed, peak = measure(func, conn, args.batch)
+            print(f"   {name:22} {elapsed:>9.3f}s {rows / elapsed:>14,.0f} {peak / 1024 / 1024:>11.1f} MB")
+        conn.close()
+
+    print("\n" + "=" * 72)
+
+
+if __name__ == '__main__':
+    main()
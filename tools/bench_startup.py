@@ -0,0 +1,189 @@
+"""
+Benchmark de arranque: tiempo de import de app, de create_app() y hasta la
+primera respuesta (GET /login, sin base de datos), cada medición en un
+intérprete nuevo. Compara tres arranques de worker:
+
+    sin caché        plantillas compiladas desde el código fuente
+    caché bytecode   plantillas cargadas de JINJA_CACHE_DIR ya poblado
+    preload (fork)   wsgi.py (create_app + warm_up) en el maestro; se mide el worker tras el fork
+
+Cada ejecución se añade a bench_results/startup.jsonl (con el commit) y se
+compara con la anterior para seguir la evolución.
+
+Uso:
+    python tools/bench_startup.py
+    python tools/bench_startup.py --runs 10 --importtime
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import platform
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HISTORY = os.path.join(ROOT, 'bench_results', 'startup.jsonl')
+
+# Se ejecuta en un intérprete nuevo; imprime los tiempos como JSON
+_CHILD = '''
+import os, sys, json, time
+t0 = time.perf_counter()
+import app as module
+t1 = time.perf_counter()
+application = module.create_app()
+t2 = time.perf_counter()
+status = application.test_client().get('/login').status_code
+t3 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create': t2 - t1, 'first_response': t3 - t2,
+                  'status': status, 'pyodbc': 'pyodbc' in sys.modules}))
+'''
+
+# Maestro con wsgi.py cargado (como gunicorn con preload_app); el hijo mide su primera respuesta
+_CHILD_PRELOAD = '''
+import os, sys, json, time
+t0 = time.perf_counter()
+import wsgi
+t1 = time.perf_counter()
+read_fd, write_fd = os.pipe()
+pid = os.fork()
+if pid == 0:
+    start = time.perf_counter()
+    status = wsgi.application.test_client().get('/login').status_code
+    os.write(write_fd, json.dumps([time.perf_counter() - start, status]).encode())
+    os._exit(0)
+os.waitpid(pid, 0)
+first_response, status = json.loads(os.read(read_fd, 1024))
+print(json.dumps({'import': t1 - t0, 'create': 0.0, 'first_response': first_response,
+                  'status': status, 'pyodbc': 'pyodbc' in sys.modules}))
+'''
+
+
+def run_child(code, env):
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    # Desde que arranca el intérprete hasta la primera respuesta
+    result['process'] = time.perf_counter() - start
+    return result
+
+
+def measure(name, code, env, runs, fresh_cache=False):
+    samples = []
+    for _ in range(runs):
+        if fresh_cache:
+            env = dict(env, JINJA_CACHE_DIR=tempfile.mkdtemp(prefix='videogames-jinja-'))
+        samples.append(run_child(code, env))
+    if any(sample['status'] != 200 for sample in samples):
+        raise RuntimeError(f"{name}: GET /login no respondió 200")
+    return {
+        key: statistics.median(sample[key] for sample in samples) * 1000
+        for key in ('import', 'create', 'first_response', 'process')
+    } | {'pyodbc': any(sample['pyodbc'] for sample in samples)}
+
+
+def slowest_imports(env, count):
+    """Módulos con más tiempo de import acumulado (python -X importtime)"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT, env=env,
+                            check=True, capture_output=True, text=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Un espacio por nivel de anidamiento (más el separador): nivel 1 = imports directos de app
+        if len(name) - len(name.lstrip()) == 3:
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:count]
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def _previous_entry():
+    try:
+        with open(HISTORY) as f:
+            lines = [line for line in f if line.strip()]
+        return json.loads(lines[-1]) if lines else None
+    except FileNotFoundError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Procesos por escenario (se toma la mediana)')
+    parser.add_argument('--importtime', action='store_true', help='Mostrar los imports más lentos')
+    parser.add_argument('--no-save', action='store_true', help=f'No añadir el resultado a {HISTORY}')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("BENCHMARK DE ARRANQUE")
+    print("=" * 80)
+
+    workdir = tempfile.mkdtemp(prefix='videogames-startup-')
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])),
+        # SQLite sin driver ODBC: así se comprueba que pyodbc no se importa
+        DB_BACKEND='sqlite',
+        DATABASE_PATH=os.path.join(workdir, 'startup.db'),
+        RATELIMIT_STORAGE_URI='memory://',
+        PAGE_CACHE_BACKEND='none',
+        JINJA_CACHE_DIR=os.path.join(workdir, 'jinja'),
+    )
+
+    # wsgi.py comprueba al importarse que la base está migrada
+    subprocess.run([sys.executable, '-c', 'import os, sqlite3, migrations; '
+                    'migrations.migrate(sqlite3.connect(os.environ["DATABASE_PATH"]))'], env=env, check=True)
+
+    print(f"\n1️⃣  Arranques ({args.runs} procesos por escenario, mediana)")
+    # Una ejecución previa llena la caché de bytecode compartida
+    run_child(_CHILD, env)
+    scenarios = {
+        'sin caché': measure('sin caché', _CHILD, env, args.runs, fresh_cache=True),
+        'caché bytecode': measure('caché bytecode', _CHILD, env, args.runs),
+    }
+    if hasattr(os, 'fork'):
+        scenarios['preload (fork)'] = measure('preload (fork)', _CHILD_PRELOAD, env, args.runs)
+
+    print(f"   {'escenario':16} {'import ms':>10} {'create ms':>10} {'1ª resp ms':>11} {'proceso ms':>11} {'pyodbc':>7}")
+    previous = (_previous_entry() or {}).get('scenarios', {})
+    for name, r in scenarios.items():
+        line = (f"   {name:16} {r['import']:>10.1f} {r['create']:>10.1f} {r['first_response']:>11.1f} "
+                f"{r['process']:>11.1f} {'sí' if r['pyodbc'] else 'no':>7}")
+        old = previous.get(name)
+        if old and old['process']:
+            line += f"   proceso {(r['process'] - old['process']) / old['process'] * 100:+.0f}%"
+        print(line)
+    print("   (preload: '1ª resp' es la del worker recién creado por fork)")
+
+    if args.importtime:
+        print("\n2️⃣  Imports más lentos de app (acumulado)")
+        for milliseconds, name in slowest_imports(env, 10):
+            print(f"   {milliseconds:>8.1f} ms  {name}")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(HISTORY), exist_ok=True)
+        with open(HISTORY, 'a') as f:
+            f.write(json.dumps({
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'commit': _git_commit(),
+                'python': platform.python_version(),
+                'runs': args.runs,
+                'scenarios': scenarios,
+            }) + '\n')
+        print(f"\n💾 Resultado añadido a {HISTORY}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark del resumen de /stats (stats.Snapshot) con juegos sintéticos:
+construcción, memoria y tiempo de calcular todos los agregados sobre los arrays
+de NumPy, frente a las consultas GROUP BY equivalentes en SQLite.
+
+Uso: python tools/bench_stats.py [--rows 100000 1000000] [--repeat 20]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import resource
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stats
+
+PLATFORMS = ['PlayStation 2', 'PlayStation 3', 'Xbox 360', 'Wii', 'GameCube', 'Nintendo 64', 'Switch', 'Dreamcast']
+GENRES = ['RPG', 'Action', 'Action RPG', 'Racing', 'Sports', 'Platformer', 'Fighting', 'Shooter', 'Puzzle']
+CONDITIONS = ['Nuevo', 'Usado', 'Dañado']
+
+# Las consultas que haría falta lanzar en cada visita sin instantánea
+SQL_QUERIES = [
+    'SELECT COUNT(*), SUM(inventory), AVG(sealed), AVG(complete_in_box) FROM games',
+    'SELECT platform_id, COUNT(*), SUM(inventory), AVG(score), AVG(sealed), AVG(complete_in_box) '
+    'FROM games GROUP BY platform_id',
+    'SELECT score, COUNT(*) FROM games GROUP BY score',
+    'SELECT SUBSTR(release_date, 1, 4), COUNT(*) FROM games GROUP BY SUBSTR(release_date, 1, 4)',
+    'SELECT LOWER(genre), COUNT(*) FROM games GROUP BY LOWER(genre)',
+    'SELECT LOWER(condition), COUNT(*) FROM games GROUP BY LOWER(condition)',
+]
+
+
+def create_database(rows, seed=7):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE platforms (id INTEGER PRIMARY KEY, name)')
+    conn.executemany('INSERT INTO platforms VALUES (?, ?)', enumerate(PLATFORMS, start=1))
+    conn.execute('CREATE TABLE games (id INTEGER PRIMARY KEY, platform_id, genre, condition, score, inventory, '
+                 'complete_in_box, sealed, release_date)')
+    conn.executemany(
+        'INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        ((i, rng.randint(1, len(PLATFORMS)), rng.choice(GENRES), rng.choice(CONDITIONS),
+          rng.choice([None, *range(11)]), rng.randint(0, 5), rng.randint(0, 1), int(rng.random() < 0.1),
+          f'{rng.randint(1985, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}')
+         for i in range(1, rows + 1))
+    )
+    conn.execute('CREATE INDEX ix_games_platform_id ON games (platform_id)')
+    conn.commit()
+    return conn
+
+
+def rss_mb():
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def sql_summary(conn):
+    for query in SQL_QUERIES:
+        conn.execute(query).fetchall()
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("BENCHMARK DE ESTADÍSTICAS")
+    print("=" * 80)
+
+    for rows in args.rows:
+        conn = create_database(rows)
+        print(f"\n📊 {rows:,} juegos")
+
+        print("\n1️⃣  Construcción")
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        snapshot = stats.Snapshot('games').build(conn)
+        print(f"   {time.perf_counter() - start:.2f}s, {len(snapshot):,} filas, pico RSS +{rss_mb() - rss_before:,.0f} MB")
+
+        print(f"\n2️⃣  Resumen completo (ms, mediana de {args.repeat})")
+
+        def compute():
+            snapshot._summary = None  # Sin caché: se mide el cálculo
+            return snapshot.summary()
+
+        numpy_ms = timed(compute, args.repeat)
+        sql_ms = timed(lambda: sql_summary(conn), max(1, args.repeat // 5))
+        print(f"   NumPy {numpy_ms:>10.2f}")
+        print(f"   SQL   {sql_ms:>10.2f}   ({len(SQL_QUERIES)} consultas GROUP BY)")
+        print(f"   cacheado {timed(snapshot.summary, args.repeat) * 1000:,.1f} µs")
+
+        print("\n3️⃣  Cambios incrementales (µs por fila)")
+        rng = random.Random(3)
+        ids = rng.sample(range(1, rows + 1), 200)
+        changed = [dict(conn.execute('SELECT * FROM games WHERE id = ?', (row_id,)).fetchone(), genre='Puzzle')
+                   for row_id in ids]
+        start = time.perf_counter()
+        for row in changed:
+            snapshot.update(row)
+        updated = (time.perf_counter() - start) / len(ids) * 1_000_000
+        start = time.perf_counter()
+        snapshot.update_columns(ids, {'inventory': 3, 'sealed': True})
+        batch = (time.perf_counter() - start) * 1_000_000
+        start = time.perf_counter()
+        snapshot.remove(ids)
+        removed = (time.perf_counter() - start) * 1_000_000
+        print(f"   edición {updated:,.0f}   lote de {len(ids)} {batch:,.0f} en total   baja por lotes {removed:,.0f} en total")
+        conn.close()
+        del snapshot
+
+    print("\n" + "=" * 80)
+
+
+if __name__ == '__main__':
+    main()
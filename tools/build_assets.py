@@ -0,0 +1,42 @@
+"""
+Genera los estáticos con huella de contenido y sus copias gzip (assets.py).
+Ejecutar en cada despliegue antes de arrancar los workers.
+
+Uso:
+    python tools/build_assets.py
+    python tools/build_assets.py --static path/a/static
+"""
+import os
+import sys
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--static', default=os.path.join(ROOT, 'static'), help='Carpeta de estáticos')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("ESTÁTICOS CON HUELLA")
+    print("=" * 60)
+
+    built = assets.build(args.static)
+    print(f"\n   {'archivo':38} {'bytes':>8} {'gzip':>8}")
+    for filename, hashed, size, compressed_size in built:
+        gz = f"{compressed_size:>8}" if compressed_size is not None else f"{'—':>8}"
+        print(f"   {hashed:38} {size:>8} {gz}")
+
+    total = sum(size for _, _, size, _ in built)
+    total_gz = sum(compressed if compressed is not None else size for _, _, size, compressed in built)
+    print(f"\n✅ {len(built)} archivos en {os.path.join(args.static, assets.DIST_DIR)} "
+          f"({total} bytes, {total_gz} con gzip)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Importa juegos o consolas desde un archivo CSV (con cabecera) o NDJSON.
+Las columnas son las de la tabla: title, release_date, manufacturer, ... (ver importer.py).
+
+Uso:
+    python tools/import_collection.py games juegos.csv
+    python tools/import_collection.py consoles consolas.ndjson --sqlite --dry-run
+    python tools/import_collection.py games juegos.csv --strict --report errores.json
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection import get_db_connection, get_sqlserver_connection
+from importer import import_records, read_records, detect_format, IMPORT_CHUNK_SIZE
+
+def import_collection(kind, path, fmt=None, use_sqlite=False, chunk_size=IMPORT_CHUNK_SIZE,
+                      strict=False, dry_run=False, report_path=None):
+    print("=" * 60)
+    print(f"IMPORTACIÓN MASIVA: {path} → {kind}")
+    print("=" * 60)
+
+    conn = get_db_connection() if use_sqlite else get_sqlserver_connection()
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            report = import_records(conn, kind, read_records(f, detect_format(path, fmt)),
+                                    chunk_size=chunk_size, strict=strict, dry_run=dry_run,
+                                    max_errors=sys.maxsize if report_path else 50)
+    finally:
+        conn.close()
+
+    result = report.to_dict()
+    print(f"\n📄 Filas leídas: {result['total']}")
+    print(f"✅ Válidas: {result['valid']}")
+    print(f"📥 Importadas: {result['imported']} en {result['seconds']:.1f}s")
+    print(f"❌ Rechazadas: {result['rejected']}")
+    for error in result['errors'][:50]:
+        print(f"   - línea {error['line']}: {'; '.join(error['errors'])}")
+    if result['rejected'] > 50:
+        print(f"   ... y {result['rejected'] - 50} más")
+
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte completo en {report_path}")
+
+    print("\n" + "=" * 60)
+    if dry_run:
+        print("🔍 VALIDACIÓN TERMINADA (no se importó nada)")
+    elif result['aborted']:
+        print("⚠️  IMPORTACIÓN CANCELADA: hay filas inválidas y se usó --strict")
+    else:
+        print("✅ IMPORTACIÓN COMPLETADA!")
+    print("=" * 60)
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=['games', 'consoles'])
+    parser.add_argument('path', help="Archivo CSV o NDJSON")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="Por defecto según la extensión")
+    parser.add_argument('--sqlite', action='store_true', help="Usar la base SQLite local en lugar de Azure SQL")
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help="Filas por transacción")
+    parser.add_argument('--strict', action='store_true', help="No importar nada si alguna fila es inválida")
+    parser.add_argument('--dry-run', action='store_true', help="Sólo validar")
+    parser.add_argument('--report', help="Guardar el reporte completo (JSON) en este archivo")
+    args = parser.parse_args()
+
+    result = import_collection(args.kind, args.path, args.format, args.sqlite, args.chunk_size,
+                               args.strict, args.dry_run, args.report)
+    sys.exit(1 if result['rejected'] else 0)
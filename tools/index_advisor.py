@@ -0,0 +1,191 @@
+"""
+Asesor de índices: ejecuta las rutas más usadas de app.py contra una base SQLite
+sintética, captura las sentencias que llegan a la base y revisa su EXPLAIN QUERY PLAN.
+
+Falla (código 1) si una sentencia con WHERE recorre la tabla completa o si una
+sentencia ordena con un B-tree temporal en lugar de leer un índice en orden.
+Los planes son los de SQLite; migrations.py crea los mismos índices en SQL Server.
+
+Uso:
+    python tools/index_advisor.py
+    python tools/index_advisor.py --games 50000 --verbose
+    python tools/index_advisor.py --target 4   # esquema sin las migraciones posteriores a la 4
+"""
+import os
+import re
+import sys
+import random
+import logging
+import sqlite3
+import tempfile
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+import seed_collection
+from bench_routes import build_app, logged_in_client, build_scenarios, Scenario
+
+_STATEMENT_RE = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+_WHERE_RE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+# "SCAN games" sin "USING INDEX": recorrido completo de la tabla
+_FULL_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+_TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+class TracingCreator:
+    """Creator del pool que guarda cada sentencia ejecutada (con los parámetros ya sustituidos)"""
+
+    def __init__(self, database_path):
+        self.database_path = database_path
+        self.statements = []
+
+    def __call__(self):
+        conn = sqlite3.connect(self.database_path, check_same_thread=False)
+        conn.set_trace_callback(self.statements.append)
+        return conn
+
+
+def extra_scenarios(ctx):
+    """Variantes de los listados que build_scenarios no cubre: orden y segunda página por grupo"""
+    from pagination import encode_cursor
+    rng = ctx['rng']
+    platforms = [p[0].replace(' ', '').lower() for p in seed_collection.PLATFORMS]
+
+    # Valores de cursor posibles por columna (title y name son NOT NULL)
+    cursor_values = {'id': [None], 'title': ['M'], 'name': ['M'],
+                     'release_date': ['2005-06-01', None], 'score': [5, None]}
+
+    def listing(prefix, path, sort, order):
+        def request(c):
+            cursor = encode_cursor(sort, rng.choice(cursor_values[sort]), rng.randint(1, 1000),
+                                   backward=rng.random() < 0.5)
+            return c.get(f'{path}?{prefix}sort={sort}&{prefix}order={order}&{prefix}cursor={cursor}')
+        return request
+
+    scenarios = []
+    for order in ('asc', 'desc'):
+        for sort in ('id', 'title', 'release_date', 'score'):
+            scenarios.append(Scenario(f'index_{sort}_{order}_page2', listing('', '/', sort, order)))
+            scenarios.append(Scenario(f'games_{sort}_{order}',
+                                      listing('', f'/games/{rng.choice(platforms)}', sort, order)))
+        for sort in ('id', 'name', 'release_date'):
+            scenarios.append(Scenario(f'consoles_{sort}_{order}',
+                                      listing('console_', f'/consoles/{rng.choice(platforms)}', sort, order)))
+    return scenarios
+
+
+def query_plan(conn, statement):
+    try:
+        return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {statement}').fetchall()]
+    except sqlite3.Error:
+        return None
+
+
+def plan_problems(statement, plan):
+    problems = []
+    for detail in plan:
+        match = _FULL_SCAN_RE.match(detail)
+        if match and not match.group(1).startswith('sqlite_') and _WHERE_RE.search(statement):
+            problems.append(f'recorrido completo de {match.group(1)}')
+        if detail.startswith(_TEMP_SORT):
+            problems.append('ordena con un B-tree temporal')
+    return problems
+
+
+def capture(app, client, ctx, creator, iterations):
+    """{sentencia: rutas que la ejecutaron}"""
+    captured = {}
+    for scenario in build_scenarios(ctx, login_iterations=1) + extra_scenarios(ctx):
+        for _ in range(scenario.iterations or iterations):
+            del creator.statements[:]
+            scenario.request(client)
+            for statement in creator.statements:
+                if _STATEMENT_RE.match(statement):
+                    captured.setdefault(statement, set()).add(scenario.name)
+    return captured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=5000)
+    parser.add_argument('--consoles', type=int, default=500)
+    parser.add_argument('--target', type=int, help='Aplicar las migraciones sólo hasta esta versión')
+    parser.add_argument('--iterations', type=int, default=3, help='Peticiones por ruta')
+    parser.add_argument('--verbose', action='store_true', help='Mostrar el plan de todas las sentencias')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("ASESOR DE ÍNDICES")
+    print("=" * 60)
+
+    database_path = os.path.join(tempfile.mkdtemp(prefix='videogames-advisor-'), 'advisor.db')
+    seed_collection.seed(database_path, args.games, args.consoles, args.seed, target=args.target)
+    print(f"\n🌱 {args.games} juegos y {args.consoles} consolas en {database_path}")
+
+    # Sin caché de listados: cada petición tiene que llegar a la base
+    os.environ['PAGE_CACHE_BACKEND'] = 'none'
+
+    creator = TracingCreator(database_path)
+    app = build_app(database_path, creator)
+    client = logged_in_client(app)
+    # Los logs de cada alta/edición taparían el informe
+    logging.disable(logging.INFO)
+
+    with sqlite3.connect(database_path) as conn:
+        games = conn.execute('SELECT MAX(id) FROM games').fetchone()[0] or 1
+        consoles = conn.execute('SELECT MAX(id) FROM consoles').fetchone()[0] or 1
+
+    def next_id(table):
+        with sqlite3.connect(database_path) as conn:
+            return conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0]
+
+    ctx = {'app': app, 'rng': random.Random(args.seed), 'games': games, 'consoles': consoles,
+           'created': {'games': [], 'consoles': []}, 'next_id': next_id}
+
+    print("\n1️⃣  Ejecutando rutas...")
+    captured = capture(app, client, ctx, creator, args.iterations)
+
+    from query_stats import fingerprint
+    print(f"\n2️⃣  Revisando {len(captured)} sentencias...")
+    failures = {}
+    conn = sqlite3.connect(database_path)
+    try:
+        for statement, routes in captured.items():
+            plan = query_plan(conn, statement)
+            if plan is None:
+                continue
+            problems = plan_problems(statement, plan)
+            key = fingerprint(statement)
+            if problems:
+                entry = failures.setdefault(key, {'routes': set(), 'problems': set(), 'plan': plan})
+                entry['routes'].update(routes)
+                entry['problems'].update(problems)
+            elif args.verbose:
+                print(f"\n   ✅ {key}")
+                for detail in plan:
+                    print(f"      {detail}")
+    finally:
+        conn.close()
+
+    for key, entry in failures.items():
+        print(f"\n   ❌ {key}")
+        print(f"      rutas: {', '.join(sorted(entry['routes']))}")
+        print(f"      problema: {'; '.join(sorted(entry['problems']))}")
+        for detail in entry['plan']:
+            print(f"      {detail}")
+
+    print("\n" + "=" * 60)
+    if failures:
+        print(f"❌ {len(failures)} SENTENCIAS SIN ÍNDICE ADECUADO")
+        print("=" * 60)
+        return 1
+    print("✅ TODAS LAS SENTENCIAS DE LAS RUTAS USAN ÍNDICES")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
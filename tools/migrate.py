@@ -1,7 +1,76 @@
-import sqlite3
+"""
+Aplica las migraciones versionadas del esquema (migrations.py).
 
-conn = sqlite3.connect('videogames.db')
-with open('backup_sqlite3.sql', 'w') as f:
-    for line in conn.iterdump():
-        f.write(f'{line}\n')
-conn.close()
\ No newline at end of file
+Uso:
+    python tools/migrate.py                      # Azure SQL
+    python tools/migrate.py --sqlite             # base SQLite local (DATABASE_PATH)
+    python tools/migrate.py --sqlite --status    # versión actual y migraciones pendientes
+    python tools/migrate.py --target 3           # sólo hasta la versión 3
+    python tools/migrate.py --sqlite --dump backup_sqlite3.sql   # copia SQL antes de migrar
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations
+from connection import get_db_connection, get_sqlserver_connection
+
+def dump_sqlite(conn, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in conn.iterdump():
+            f.write(f'{line}\n')
+
+def print_status(conn):
+    applied = migrations.applied_versions(conn)
+    print(f"\n📋 Versión actual: {migrations.current_version(conn)}")
+    for migration in migrations.MIGRATIONS:
+        mark = '✅' if migration.version in applied else '⏳'
+        print(f"   {mark} {migration.version:04d} {migration.name}")
+
+def migrate(use_sqlite=False, target=None, status_only=False, dump_path=None):
+    conn = get_db_connection() if use_sqlite else get_sqlserver_connection()
+
+    print("=" * 60)
+    print("MIGRACIONES DEL ESQUEMA")
+    print("=" * 60)
+
+    try:
+        if status_only:
+            print_status(conn)
+            return 0
+
+        if dump_path:
+            if not use_sqlite:
+                print("\n⚠️  --dump sólo está disponible con --sqlite")
+                return 1
+            dump_sqlite(conn, dump_path)
+            print(f"\n💾 Copia de seguridad en {dump_path}")
+
+        pending = migrations.pending(conn, target)
+        if not pending:
+            print(f"\n✅ El esquema ya está en la versión {migrations.current_version(conn)}")
+            return 0
+
+        print(f"\n📝 {len(pending)} migraciones pendientes")
+        migrations.migrate(conn, target, log=lambda message: print(f"   - {message}"))
+
+        print("\n" + "=" * 60)
+        print(f"✅ ESQUEMA EN LA VERSIÓN {migrations.current_version(conn)}!")
+        print("=" * 60)
+        return 0
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sqlite', action='store_true', help="Usar la base SQLite local en lugar de Azure SQL")
+    parser.add_argument('--status', action='store_true', help="Mostrar la versión y las migraciones pendientes")
+    parser.add_argument('--target', type=int, help="Versión máxima a aplicar")
+    parser.add_argument('--dump', metavar='PATH', help="Volcar la base SQLite a un archivo .sql antes de migrar")
+    args = parser.parse_args()
+    sys.exit(migrate(args.sqlite, args.target, args.status, args.dump))
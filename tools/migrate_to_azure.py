@@ -1,19 +1,24 @@
-import sqlite3
-import os
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from connection import get_db_connection, get_sqlserver_connection
 
 load_dotenv()
 
+DEFAULT_CHUNK_SIZE = 5000
+CHECKPOINT_TABLE = 'migration_checkpoints'
+
 def extract_year(date_value):
     """Extrae el año de una fecha en formato string o retorna el valor si ya es int"""
     if date_value is None:
         return None
-    
+
     # Si ya es un entero, retornarlo
     if isinstance(date_value, int):
         return date_value
-    
+
     # Si es string, extraer el año
     if isinstance(date_value, str):
         # Formatos posibles: '2004-10-04', '2004', etc.
@@ -22,171 +27,285 @@ def extract_year(date_value):
             return int(year_str)
         except:
             return None
-    
+
     return None
 
-def migrate_data():
-    print("=" * 60)
-    print("MIGRACIÓN DE DATOS: SQLite → Azure SQL Server")
-    print("=" * 60)
-    
-    # Conectar a SQLite
-    print("\n📂 Conectando a SQLite...")
+def to_date(date_value):
+    """release_date es DATE en Azure: '2004-10-04' se copia tal cual y un año suelto pasa a 1 de enero"""
+    if isinstance(date_value, str) and len(date_value.strip()) >= 10 and date_value.strip()[4] == '-':
+        return date_value.strip()[:10]
+    year = extract_year(date_value)
+    return f'{year:04d}-01-01' if year else None
+
+class MigrationTable:
+    """
+    Describe cómo copiar una tabla de SQLite a Azure.
+
+    Args:
+        name: Nombre de la tabla (igual en ambos lados)
+        columns: Columnas a copiar; la primera debe ser 'id'
+        unique_keys: Grupos de columnas únicas en destino; una fila se omite si
+            ya existe otra con los mismos valores en cualquiera de ellos (en
+            destino o antes en el mismo bloque). Las omitidas por un grupo que
+            no es el id se listan en el log
+        transforms: {columna: función} aplicadas a cada valor antes de insertar
+    """
+
+    def __init__(self, name, columns, unique_keys=(('id',),), transforms=None):
+        self.name = name
+        self.columns = columns
+        self.unique_keys = unique_keys
+        self.transforms = transforms or {}
+
+TABLES = [
+    MigrationTable('users', ('id', 'username', 'password_hash'),
+                   unique_keys=(('id',), ('username',))),
+    MigrationTable('platforms', ('id', 'name', 'slug', 'family', 'position'),
+                   unique_keys=(('id',), ('slug',))),
+    MigrationTable('platform_aliases', ('id', 'alias', 'platform_id'),
+                   unique_keys=(('id',), ('alias',))),
+    MigrationTable('console_models', ('id', 'name', 'slug', 'family', 'position'),
+                   unique_keys=(('id',), ('slug',))),
+    MigrationTable('console_model_aliases', ('id', 'alias', 'model_id'),
+                   unique_keys=(('id',), ('alias',))),
+    MigrationTable('consoles', ('id', 'name', 'model', 'model_id', 'model_normalized', 'release_date', 'manufacturer',
+                                'serial_number_box', 'serial_number_console', 'complete_in_box',
+                                'condition', 'inventory', 'sealed'),
+                   # Índice único filtrado (serial_number_console IS NOT NULL); NULL = NULL no coincide
+                   unique_keys=(('id',), ('serial_number_console',)),
+                   transforms={'release_date': to_date}),
+    MigrationTable('games', ('id', 'title', 'release_date', 'manufacturer', 'description', 'genre',
+                             'platform', 'platform_id', 'platform_normalized', 'score', 'complete_in_box',
+                             'condition', 'inventory', 'sealed'),
+                   transforms={'release_date': to_date}),
+]
+
+# platform_id y model_id las referencian
+REFERENCED_TABLES = {'platforms', 'console_models'}
+
+_print_lock = threading.Lock()
+
+def _log(message):
+    with _print_lock:
+        print(message, flush=True)
+
+def ensure_checkpoint_table(cursor):
+    cursor.execute(f"""
+        IF OBJECT_ID('{CHECKPOINT_TABLE}', 'U') IS NULL
+        CREATE TABLE {CHECKPOINT_TABLE} (
+            table_name NVARCHAR(128) NOT NULL PRIMARY KEY,
+            last_id INT NOT NULL,
+            rows_copied BIGINT NOT NULL,
+            rows_skipped BIGINT NOT NULL,
+            updated_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+        )
+    """)
+
+def read_checkpoint(cursor, table_name):
+    """Retorna (last_id, rows_copied, rows_skipped) de la última ejecución, o (0, 0, 0)"""
+    cursor.execute(
+        f"SELECT last_id, rows_copied, rows_skipped FROM {CHECKPOINT_TABLE} WHERE table_name = ?",
+        (table_name,)
+    )
+    row = cursor.fetchone()
+    return (row[0], row[1], row[2]) if row else (0, 0, 0)
+
+def save_checkpoint(cursor, table_name, last_id, rows_copied, rows_skipped):
+    cursor.execute(f"""
+        UPDATE {CHECKPOINT_TABLE}
+        SET last_id = ?, rows_copied = ?, rows_skipped = ?, updated_at = SYSUTCDATETIME()
+        WHERE table_name = ?
+    """, (last_id, rows_copied, rows_skipped, table_name))
+    if cursor.rowcount == 0:
+        cursor.execute(
+            f"INSERT INTO {CHECKPOINT_TABLE} (table_name, last_id, rows_copied, rows_skipped) VALUES (?, ?, ?, ?)",
+            (table_name, last_id, rows_copied, rows_skipped)
+        )
+
+def reset_checkpoints(table_names):
+    azure_conn = get_sqlserver_connection()
+    cursor = azure_conn.connection.cursor()
+    try:
+        ensure_checkpoint_table(cursor)
+        for name in table_names:
+            cursor.execute(f"DELETE FROM {CHECKPOINT_TABLE} WHERE table_name = ?", (name,))
+        azure_conn.commit()
+    finally:
+        cursor.close()
+        azure_conn.close()
+
+def read_chunks(sqlite_conn, table, start_after, chunk_size):
+    """Lee la tabla de SQLite en bloques ordenados por id, sin cargarla entera"""
+    column_list = ', '.join(table.columns)
+    transforms = [table.transforms.get(column) for column in table.columns]
+    last_id = start_after
+    while True:
+        rows = sqlite_conn.execute(
+            f"SELECT {column_list} FROM {table.name} WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield last_id, [
+            tuple(transform(value) if transform else value for transform, value in zip(transforms, row))
+            for row in rows
+        ]
+
+def migrate_table(table, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Copia una tabla en bloques: cada bloque va a una tabla temporal con
+    fast_executemany y se inserta con un único INSERT ... SELECT que omite las
+    claves que ya existen. Cada bloque se confirma junto con su checkpoint,
+    así que una ejecución interrumpida continúa donde se quedó.
+    """
     sqlite_conn = get_db_connection()
-    sqlite_cursor = sqlite_conn.cursor()
-    
-    # Conectar a Azure SQL
-    print("🔵 Conectando a Azure SQL...")
     azure_conn = get_sqlserver_connection()
-    azure_cursor = azure_conn.cursor()
-    
+    cursor = azure_conn.connection.cursor()  # Cursor real de pyodbc para fast_executemany
+    cursor.fast_executemany = True
+
+    column_list = ', '.join(table.columns)
+    placeholders = ', '.join('?' for _ in table.columns)
+    staging = f'#staging_{table.name}'
+    duplicate_checks = ' AND '.join(
+        f"NOT EXISTS (SELECT 1 FROM {table.name} t WHERE "
+        + ' AND '.join(f't.{column} = s.{column}' for column in key) + ')'
+        for key in table.unique_keys
+    )
+    # Claves únicas distintas del id: el origen puede repetirlas (en destino o dentro del bloque)
+    conflict_checks = {}
+    for key in table.unique_keys:
+        if key == ('id',):
+            continue
+        match = ' AND '.join(f'{{alias}}.{column} = s.{column}' for column in key)
+        conflict_checks[key] = (
+            f"(EXISTS (SELECT 1 FROM {table.name} t WHERE {match.format(alias='t')} AND t.id <> s.id)"
+            f" OR EXISTS (SELECT 1 FROM {staging} d WHERE {match.format(alias='d')} AND d.id < s.id))"
+        )
+    duplicate_checks += ''.join(f' AND NOT {check}' for check in conflict_checks.values())
+    # CAST(id AS INT) evita que la tabla temporal herede la propiedad IDENTITY
+    staging_columns = ', '.join('CAST(id AS INT) AS id' if c == 'id' else c for c in table.columns)
+
     try:
-        # MIGRAR USUARIOS
-        print("\n" + "=" * 60)
-        print("👥 MIGRANDO USUARIOS...")
-        print("=" * 60)
-        
-        users = sqlite_cursor.execute("SELECT id, username, password_hash FROM users").fetchall()
-        print(f"   Encontrados: {len(users)} usuarios")
-        
-        migrated_users = 0
-        
-        # Habilitar IDENTITY_INSERT para usuarios
-        azure_cursor.execute("SET IDENTITY_INSERT users ON")
-        
-        for user in users:
-            try:
-                azure_cursor.execute(
-                    "INSERT INTO users (id, username, password_hash) VALUES (?, ?, ?)",
-                    (user[0], user[1], user[2])
-                )
-                migrated_users += 1
-                print(f"   ✅ Usuario migrado: {user[1]}")
-            except Exception as e:
-                if "duplicate key" in str(e).lower() or "unique constraint" in str(e).lower():
-                    print(f"   ⚠️  Usuario ya existe: {user[1]} (omitido)")
-                else:
-                    print(f"   ❌ Error migrando usuario {user[1]}: {e}")
-        
-        # Deshabilitar IDENTITY_INSERT
-        azure_cursor.execute("SET IDENTITY_INSERT users OFF")
+        ensure_checkpoint_table(cursor)
+        last_id, copied, skipped = read_checkpoint(cursor, table.name)
+        if last_id:
+            _log(f"   ↻ {table.name}: reanudando después de id {last_id} ({copied} copiadas)")
+
+        cursor.execute(f"IF OBJECT_ID('tempdb..{staging}') IS NOT NULL DROP TABLE {staging}")
+        cursor.execute(f"SELECT TOP 0 {staging_columns} INTO {staging} FROM {table.name}")
+        cursor.execute(f"SET IDENTITY_INSERT {table.name} ON")
         azure_conn.commit()
-        print(f"\n✅ Usuarios migrados: {migrated_users}/{len(users)}")
-        
-        # MIGRAR CONSOLAS
-        print("\n" + "=" * 60)
-        print("🎮 MIGRANDO CONSOLAS...")
-        print("=" * 60)
-        
-        consoles = sqlite_cursor.execute("""
-            SELECT id, name, model, model_normalized, release_date, manufacturer,
-                   serial_number_box, serial_number_console, complete_in_box,
-                   condition, inventory, sealed
-            FROM consoles
-        """).fetchall()
-        print(f"   Encontradas: {len(consoles)} consolas")
-        
-        migrated_consoles = 0
-        
-        if len(consoles) > 0:
-            # Habilitar IDENTITY_INSERT para consolas
-            azure_cursor.execute("SET IDENTITY_INSERT consoles ON")
-            
-            for console in consoles:
-                try:
-                    # Convertir release_date a año (int)
-                    release_year = extract_year(console[4])
-                    
-                    azure_cursor.execute("""
-                        INSERT INTO consoles (
-                            id, name, model, model_normalized, release_date, manufacturer,
-                            serial_number_box, serial_number_console, complete_in_box,
-                            condition, inventory, sealed
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (console[0], console[1], console[2], console[3], release_year, console[5],
-                          console[6], console[7], console[8], console[9], console[10], console[11]))
-                    migrated_consoles += 1
-                    print(f"   ✅ Consola migrada: {console[1]} - {console[2]}")
-                except Exception as e:
-                    if "duplicate key" in str(e).lower() or "unique constraint" in str(e).lower():
-                        print(f"   ⚠️  Consola ya existe: {console[1]} (omitida)")
-                    else:
-                        print(f"   ❌ Error migrando consola {console[1]}: {e}")
-            
-            # Deshabilitar IDENTITY_INSERT
-            azure_cursor.execute("SET IDENTITY_INSERT consoles OFF")
-            azure_conn.commit()
-        
-        print(f"\n✅ Consolas migradas: {migrated_consoles}/{len(consoles)}")
-        
-        # MIGRAR JUEGOS
-        print("\n" + "=" * 60)
-        print("🕹️  MIGRANDO JUEGOS...")
-        print("=" * 60)
-        
-        games = sqlite_cursor.execute("""
-            SELECT id, title, release_date, manufacturer, description, genre,
-                   platform, platform_normalized, score, complete_in_box,
-                   condition, inventory, sealed
-            FROM games
-        """).fetchall()
-        print(f"   Encontrados: {len(games)} juegos")
-        
-        migrated_games = 0
-        
-        if len(games) > 0:
-            # Habilitar IDENTITY_INSERT para juegos
-            azure_cursor.execute("SET IDENTITY_INSERT games ON")
-            
-            for game in games:
-                try:
-                    # Convertir release_date a año (int)
-                    release_year = extract_year(game[2])
-                    
-                    azure_cursor.execute("""
-                        INSERT INTO games (
-                            id, title, release_date, manufacturer, description, genre,
-                            platform, platform_normalized, score, complete_in_box,
-                            condition, inventory, sealed
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (game[0], game[1], release_year, game[3], game[4], game[5], 
-                          game[6], game[7], game[8], game[9], game[10], game[11], game[12]))
-                    migrated_games += 1
-                    print(f"   ✅ Juego migrado: {game[1]} (año: {release_year})")
-                except Exception as e:
-                    if "duplicate key" in str(e).lower() or "unique constraint" in str(e).lower():
-                        print(f"   ⚠️  Juego ya existe: {game[1]} (omitido)")
-                    else:
-                        print(f"   ❌ Error migrando juego {game[1]}: {e}")
-            
-            # Deshabilitar IDENTITY_INSERT
-            azure_cursor.execute("SET IDENTITY_INSERT games OFF")
+
+        start = time.perf_counter()
+        processed = 0
+        for chunk_last_id, rows in read_chunks(sqlite_conn, table, last_id, chunk_size):
+            cursor.execute(f"TRUNCATE TABLE {staging}")
+            cursor.executemany(f"INSERT INTO {staging} ({column_list}) VALUES ({placeholders})", rows)
+            for key, check in conflict_checks.items():
+                key_columns = ', '.join(f's.{column}' for column in key)
+                cursor.execute(f"SELECT s.id, {key_columns} FROM {staging} s WHERE {check} ORDER BY s.id")
+                conflicts = cursor.fetchall()
+                if conflicts:
+                    listed = ', '.join(f"id {row[0]} ({', '.join(str(v) for v in row[1:])})" for row in conflicts[:10])
+                    more = f' y {len(conflicts) - 10} más' if len(conflicts) > 10 else ''
+                    _log(f"   ⚠️  {table.name}: {len(conflicts)} filas omitidas por {', '.join(key)} repetido: {listed}{more}")
+            cursor.execute(f"""
+                INSERT INTO {table.name} ({column_list})
+                SELECT {column_list} FROM {staging} s
+                WHERE {duplicate_checks}
+            """)
+            inserted = cursor.rowcount
+            copied += inserted
+            skipped += len(rows) - inserted
+            save_checkpoint(cursor, table.name, chunk_last_id, copied, skipped)
             azure_conn.commit()
-        
-        print(f"\n✅ Juegos migrados: {migrated_games}/{len(games)}")
-        
-        # RESUMEN FINAL
-        print("\n" + "=" * 60)
-        print("📊 RESUMEN DE MIGRACIÓN")
-        print("=" * 60)
-        print(f"   Usuarios: {migrated_users}/{len(users)}")
-        print(f"   Consolas: {migrated_consoles}/{len(consoles)}")
-        print(f"   Juegos:   {migrated_games}/{len(games)}")
-        print("\n✅ MIGRACIÓN COMPLETADA!")
-        print("=" * 60)
-        
-    except Exception as e:
-        print(f"\n❌ ERROR DURANTE LA MIGRACIÓN: {e}")
+
+            processed += len(rows)
+            elapsed = time.perf_counter() - start
+            _log(f"   {table.name:9} hasta id {chunk_last_id:>8} | {copied:>8} copiadas | "
+                 f"{skipped:>6} omitidas | {processed / elapsed:>8.0f} filas/s")
+
+        cursor.execute(f"DROP TABLE {staging}")
+        azure_conn.commit()
+        return {'table': table.name, 'copied': copied, 'skipped': skipped,
+                'processed': processed, 'seconds': time.perf_counter() - start}
+    except Exception:
         azure_conn.rollback()
+        raise
     finally:
-        sqlite_cursor.close()
-        sqlite_conn.close()
-        azure_cursor.close()
+        # La conexión vuelve al pool: no dejar IDENTITY_INSERT activo en la sesión
+        try:
+            cursor.execute(f"SET IDENTITY_INSERT {table.name} OFF")
+        except Exception:
+            pass
+        cursor.close()
         azure_conn.close()
+        sqlite_conn.close()
+
+def migrate_data(table_names=None, chunk_size=DEFAULT_CHUNK_SIZE, parallel=False, restart=False):
+    print("=" * 60)
+    print("MIGRACIÓN DE DATOS: SQLite → Azure SQL Server")
+    print("=" * 60)
+
+    tables = [table for table in TABLES if not table_names or table.name in table_names]
+    if restart:
+        print("\n🧹 Borrando checkpoints de ejecuciones anteriores...")
+        reset_checkpoints([table.name for table in tables])
+
+    print(f"\n📦 Tablas: {', '.join(t.name for t in tables)} | bloque: {chunk_size} | "
+          f"{'en paralelo' if parallel else 'secuencial'}\n")
+
+    start = time.perf_counter()
+    results, errors = [], []
+    if parallel:
+        # Las tablas referenciadas por claves foráneas van antes, una a una
+        for table in [table for table in tables if table.name in REFERENCED_TABLES]:
+            try:
+                results.append(migrate_table(table, chunk_size))
+            except Exception as e:
+                errors.append((table.name, e))
+        tables = [table for table in tables if table.name not in REFERENCED_TABLES]
+        with ThreadPoolExecutor(max_workers=max(1, len(tables))) as executor:
+            futures = {executor.submit(migrate_table, table, chunk_size): table for table in tables}
+            for future, table in futures.items():
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    errors.append((table.name, e))
+    else:
+        for table in tables:
+            try:
+                results.append(migrate_table(table, chunk_size))
+            except Exception as e:
+                errors.append((table.name, e))
+
+    # RESUMEN FINAL
+    print("\n" + "=" * 60)
+    print("📊 RESUMEN DE MIGRACIÓN")
+    print("=" * 60)
+    for result in results:
+        rate = result['processed'] / result['seconds'] if result['seconds'] else 0
+        print(f"   {result['table']:9} copiadas: {result['copied']:>8} | omitidas: {result['skipped']:>6} | "
+              f"{result['processed']} leídas en {result['seconds']:.1f}s ({rate:.0f} filas/s)")
+    for name, error in errors:
+        print(f"   ❌ {name}: {error} (vuelve a ejecutar para reanudar desde el último bloque)")
+    print(f"\n⏱️  Tiempo total: {time.perf_counter() - start:.1f}s")
+    print("\n✅ MIGRACIÓN COMPLETADA!" if not errors else "\n⚠️  MIGRACIÓN INCOMPLETA")
+    print("=" * 60)
+    return not errors
 
 if __name__ == "__main__":
-    confirm = input("\n⚠️  ¿Estás seguro de migrar los datos a Azure SQL? (si/no): ")
+    parser = argparse.ArgumentParser(description="Migra users, consoles y games de SQLite a Azure SQL")
+    parser.add_argument('--tables', nargs='+', choices=[t.name for t in TABLES], help="Tablas a migrar (default: todas)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Filas por bloque/commit")
+    parser.add_argument('--parallel', action='store_true', help="Cargar las tablas en paralelo")
+    parser.add_argument('--restart', action='store_true', help="Ignorar checkpoints y empezar desde cero")
+    parser.add_argument('--yes', action='store_true', help="No pedir confirmación")
+    args = parser.parse_args()
+
+    confirm = 'si' if args.yes else input("\n⚠️  ¿Estás seguro de migrar los datos a Azure SQL? (si/no): ")
     if confirm.lower() == 'si':
-        migrate_data()
+        migrate_data(args.tables, args.chunk_size, args.parallel, args.restart)
     else:
-        print("❌ Migración cancelada.")
\ No newline at end of file
+        print("❌ Migración cancelada.")
@@ -0,0 +1,80 @@
+"""
+Recalcula la tabla collection_counters (juegos por plataforma, consolas por
+modelo e inventario) a partir de games y consoles, para reparar desajustes.
+
+Uso:
+    python tools/rebuild_counters.py            # Azure SQL (pool de la app)
+    python tools/rebuild_counters.py --sqlite   # base SQLite local (DATABASE_PATH)
+    python tools/rebuild_counters.py --check    # sólo mostrar diferencias
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import counters
+from connection import get_db_connection, get_sqlserver_connection
+
+def print_drift(conn):
+    total = 0
+    for kind in counters.KINDS:
+        rows = counters.drift(conn, kind)
+        total += len(rows)
+        if not rows:
+            print(f"   ✅ {kind}: contadores correctos")
+            continue
+        print(f"   ⚠️  {kind}: {len(rows)} grupos desajustados")
+        for group, (stored_items, stored_inventory), (items, inventory) in rows:
+            print(f"      - {group}: guardado {stored_items} ({stored_inventory} inv.) | real {items} ({inventory} inv.)")
+    return total
+
+def rebuild_counters(use_sqlite=False, check_only=False):
+    conn = get_db_connection() if use_sqlite else get_sqlserver_connection()
+
+    print("=" * 60)
+    print("CONTADORES POR PLATAFORMA / MODELO")
+    print("=" * 60)
+
+    try:
+        if check_only and not counters.table_exists(conn):
+            print("\n⚠️  La tabla collection_counters no existe (se crea al primer uso o sin --check)")
+            return 1
+
+        if counters.ensure_table(conn):
+            conn.commit()
+            print("\n📝 Tabla collection_counters creada y rellenada")
+
+        print("\n1️⃣  Comparando contadores con las tablas...")
+        drifted = print_drift(conn)
+
+        if check_only or not drifted:
+            print("\n" + "=" * 60)
+            return drifted
+
+        print("\n2️⃣  Recalculando contadores...")
+        counters.rebuild(conn)
+        conn.commit()
+        print("   ✅ Contadores recalculados")
+
+        for kind in counters.KINDS:
+            items, inventory = counters.collection_totals(conn, kind)
+            print(f"   - {kind}: {items} registros, {inventory} en inventario")
+
+        print("\n" + "=" * 60)
+        print("✅ CONTADORES RECONSTRUIDOS!")
+        print("=" * 60)
+        return 0
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sqlite', action='store_true', help="Usar la base SQLite local en lugar de Azure SQL")
+    parser.add_argument('--check', action='store_true', help="Sólo comprobar, sin modificar")
+    args = parser.parse_args()
+    sys.exit(1 if rebuild_counters(args.sqlite, args.check) and args.check else 0)
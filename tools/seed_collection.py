@@ -0,0 +1,166 @@
+"""
+Genera una colección sintética (juegos, consolas y usuarios) en una base SQLite local.
+
+Uso: python tools/seed_collection.py --db /tmp/bench.db --games 100000 --consoles 10000
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import counters
+import lookups
+import migrations
+from models import init_db
+from passwords import hash_password
+
+# (plataforma, fabricante, primer año, último año)
+PLATFORMS = [
+    ('PlayStation 1', 'Sony', 1994, 2004),
+    ('PlayStation 2', 'Sony', 2000, 2013),
+    ('PlayStation 3', 'Sony', 2006, 2017),
+    ('PlayStation 4', 'Sony', 2013, 2023),
+    ('PlayStation 5', 'Sony', 2020, 2025),
+    ('Nintendo 64', 'Nintendo', 1996, 2002),
+    ('GameCube', 'Nintendo', 2001, 2007),
+    ('Wii', 'Nintendo', 2006, 2013),
+    ('Wii U', 'Nintendo', 2012, 2017),
+    ('Switch', 'Nintendo', 2017, 2025),
+    ('Xbox', 'Microsoft', 2001, 2008),
+    ('Xbox 360', 'Microsoft', 2005, 2016),
+    ('Xbox One', 'Microsoft', 2013, 2020),
+]
+# Peso relativo de cada plataforma en una colección típica
+PLATFORM_WEIGHTS = [6, 10, 8, 7, 3, 4, 4, 6, 2, 6, 2, 7, 4]
+
+PUBLISHERS = ['Nintendo', 'Sony', 'Microsoft', 'Capcom', 'Square Enix', 'Konami', 'Sega',
+              'Bandai Namco', 'Ubisoft', 'Electronic Arts', 'Activision', 'Rockstar', 'Atlus']
+GENRES = ['RPG', 'Acción', 'Aventura', 'Plataformas', 'Deportes', 'Carreras', 'Estrategia',
+          'Shooter', 'Lucha', 'Puzzle', 'Terror', 'Simulación']
+CONDITIONS = ['Nuevo', 'Usado', 'Dañado']
+CONDITION_WEIGHTS = [2, 7, 1]
+
+TITLE_PREFIXES = ['Super', 'Final', 'Legend of', 'Dark', 'Metal', 'Grand', 'Shadow', 'Crystal',
+                  'Dragon', 'Street', 'Mega', 'Ultra', 'Lost', 'Eternal', 'Silent', 'Royal']
+TITLE_NOUNS = ['Quest', 'Fantasy', 'Kingdom', 'Racer', 'Warriors', 'Souls', 'Hunter', 'Gear',
+               'Fighter', 'Odyssey', 'Chronicles', 'Tactics', 'Strike', 'Legends', 'Party', 'Hill']
+CONSOLE_VARIANTS = ['Standard', 'Slim', 'Limited Edition', 'Bundle', 'Pro', 'Lite']
+
+USERS = [('bench_admin', 'admin'), ('bench_editor', 'editor'), ('bench_viewer', 'viewer')]
+USER_PASSWORD = 'bench'
+
+
+def _release_date(rng, first, last):
+    return f'{rng.randint(first, last):04d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+
+
+def _updated_at(rng):
+    return f'{_release_date(rng, 2020, 2025)} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}'
+
+
+def generate_games(count, rng):
+    for i in range(count):
+        platform, _, first, last = rng.choices(PLATFORMS, PLATFORM_WEIGHTS)[0]
+        genre = rng.choice(GENRES)
+        title = f'{rng.choice(TITLE_PREFIXES)} {rng.choice(TITLE_NOUNS)} {rng.randint(1, 9)}'
+        yield (
+            title,
+            _release_date(rng, first, last),
+            rng.choice(PUBLISHERS),
+            f'{genre} para {platform} #{i}',
+            genre,
+            platform,
+            platform.replace(' ', '').lower(),
+            min(10, max(0, round(rng.gauss(7, 1.8)))),
+            rng.random() < 0.6,
+            rng.choices(CONDITIONS, CONDITION_WEIGHTS)[0],
+            rng.choice([1, 1, 1, 1, 2, 3]),
+            rng.random() < 0.1,
+            _updated_at(rng),
+        )
+
+
+def generate_consoles(count, rng):
+    for i in range(count):
+        platform, manufacturer, first, last = rng.choices(PLATFORMS, PLATFORM_WEIGHTS)[0]
+        yield (
+            f'{platform} {rng.choice(CONSOLE_VARIANTS)}',
+            platform,
+            platform.replace(' ', '').lower(),
+            _release_date(rng, first, last),
+            manufacturer,
+            f'BX{i:09d}',
+            f'SN{i:09d}',
+            rng.random() < 0.5,
+            rng.choices(CONDITIONS, CONDITION_WEIGHTS)[0],
+            1,
+            rng.random() < 0.05,
+            _updated_at(rng),
+        )
+
+
+def _insert_batches(conn, query, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.executemany(query, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(query, batch)
+
+
+def seed(database_path, games=1000, consoles=200, seed_value=42, batch_size=10000, target=None):
+    """Crea el esquema (si falta, hasta la migración `target`) y añade la colección sintética y los usuarios de benchmark"""
+    init_db(database_path, target)
+    rng = random.Random(seed_value)
+    conn = sqlite3.connect(database_path)
+    try:
+        _insert_batches(conn, '''
+            INSERT INTO games (
+                title, release_date, manufacturer, description, genre,
+                platform, platform_normalized, score, complete_in_box,
+                condition, inventory, sealed, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', generate_games(games, rng), batch_size)
+
+        _insert_batches(conn, '''
+            INSERT INTO consoles (
+                name, model, model_normalized, release_date, manufacturer,
+                serial_number_box, serial_number_console, complete_in_box,
+                condition, inventory, sealed, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', generate_consoles(consoles, rng), batch_size)
+
+        password_hash = hash_password(USER_PASSWORD).decode('utf-8')
+        conn.executemany(
+            'INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)',
+            [(username, password_hash, role) for username, role in USERS]
+        )
+        # platform_id/model_id de las filas generadas (si el esquema ya los tiene)
+        if migrations.column_exists(conn, 'games', 'platform_id'):
+            lookups.backfill(conn)
+        # Los contadores por plataforma/modelo deben incluir las filas recién generadas
+        if not counters.ensure_table(conn):
+            counters.rebuild(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True, help='Ruta de la base SQLite a crear/ampliar')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--consoles', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42, help='Semilla para datos reproducibles')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seed(args.db, args.games, args.consoles, args.seed)
+    print(f"✅ {args.games} juegos y {args.consoles} consolas generados en {args.db} "
+          f"({time.perf_counter() - start:.1f}s)")
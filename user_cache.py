@@ -0,0 +1,123 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+class UserCache:
+    """
+    Caché LRU con TTL de objetos auth.User indexados por id.
+
+    Args:
+        maxsize: Máximo de usuarios en caché; se descarta el menos usado
+        ttl: Segundos que un usuario es válido desde que se cargó (0 = sin caducidad)
+        stamp_path: Archivo cuya fecha de modificación marca una invalidación global.
+            Permite que scripts en otros procesos (create_user.py, tools/) invaliden
+            la caché de los workers de la app.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300.0, stamp_path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stamp_path = stamp_path
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # user_id -> (expires_at, user)
+        self._stamp = self._read_stamp()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, user_id):
+        key = str(user_id)
+        self._check_stamp()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def put(self, user):
+        if self.maxsize <= 0:
+            return
+        key = str(user.id)
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id=None):
+        """Descarta un usuario (o todos si user_id es None) en este proceso y en los demás"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(user_id), None)
+            self.invalidations += 1
+        self._touch_stamp()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    # ---- Invalidación entre procesos ----
+
+    def _read_stamp(self):
+        if not self.stamp_path:
+            return None
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_stamp(self):
+        stamp = self._read_stamp()
+        if stamp != self._stamp:
+            with self._lock:
+                self._stamp = stamp
+                self._entries.clear()
+
+    def _touch_stamp(self):
+        if not self.stamp_path:
+            return
+        try:
+            with open(self.stamp_path, 'a'):
+                os.utime(self.stamp_path)
+        except OSError:
+            return
+        # Este proceso ya limpió su caché: no volver a hacerlo al ver su propia marca
+        self._stamp = self._read_stamp()
+
+
+user_cache = UserCache(
+    maxsize=int(os.getenv('USER_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('USER_CACHE_TTL', 300)),
+    stamp_path=os.getenv('USER_CACHE_STAMP', 'db/.user_cache_stamp'),
+)
+
+
+def invalidate_user(user_id=None):
+    """Invalida la caché de usuarios tras cambiar rol o contraseña (None = todos)"""
+    user_cache.invalidate(user_id)
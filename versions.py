@@ -0,0 +1,93 @@
+"""
+Versiones de los listados para las peticiones condicionales (ETag / If-None-Match).
+
+Cada (tipo, grupo) tiene un número que sube con cualquier escritura sobre sus
+filas, en la misma transacción que la escritura; el grupo ALL ('*') sube con
+cualquier cambio del tipo y es la versión de la tabla entera. Están en la base
+de datos, no en memoria, para que todos los workers den la misma ETag.
+rebuild() de counters no las toca: una versión nunca vuelve a un valor anterior.
+"""
+import logging
+from dialect import dialect_of, SQLITE
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'collection_versions'
+
+# Grupo que representa la tabla entera
+ALL = '*'
+
+_CREATE_TABLE = f'''
+    CREATE TABLE {TABLE} (
+        kind NVARCHAR(16) NOT NULL,
+        grp NVARCHAR(255) NOT NULL,
+        version INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (kind, grp)
+    )
+'''
+
+# Grupos por sentencia de bump (2 parámetros por grupo, SQL Server admite 2100)
+_BUMP_BATCH = 1000
+
+
+def _bump_sql(dialect, groups):
+    if dialect == SQLITE:
+        values = ', '.join(['(?, ?, 1)'] * groups)
+        return f'''
+            INSERT INTO {TABLE} (kind, grp, version) VALUES {values}
+            ON CONFLICT(kind, grp) DO UPDATE SET version = version + 1
+        '''
+    values = ', '.join(['(?, ?)'] * groups)
+    return f'''
+        MERGE {TABLE} WITH (HOLDLOCK) AS t
+        USING (VALUES {values}) AS s (kind, grp)
+        ON t.kind = s.kind AND t.grp = s.grp
+        WHEN MATCHED THEN UPDATE SET version = t.version + 1
+        WHEN NOT MATCHED THEN INSERT (kind, grp, version) VALUES (s.kind, s.grp, 1);
+    '''
+
+
+def table_exists(conn):
+    if dialect_of(conn) == SQLITE:
+        query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?"
+    else:
+        query = "SELECT name FROM sys.tables WHERE name = ?"
+    return conn.execute(query, (TABLE,)).fetchone() is not None
+
+
+def ensure_table(conn):
+    """
+    Crea la tabla si todavía no existe (migración 7; las peticiones cuentan con que
+    ya existe). Retorna True si la acaba de crear; el llamador hace commit.
+    """
+    if table_exists(conn):
+        return False
+    logger.info(f"Creando {TABLE}")
+    conn.execute(_CREATE_TABLE)
+    return True
+
+
+def bump(conn, kind, groups):
+    """
+    Sube la versión de `groups` y la de la tabla (ALL) en la transacción actual.
+    Se llama desde counters en cada escritura, aunque los totales no cambien.
+    """
+    rows = [(kind, group) for group in sorted({g for g in groups if g is not None} | {ALL})]
+    dialect = dialect_of(conn)
+    for i in range(0, len(rows), _BUMP_BATCH):
+        batch = rows[i:i + _BUMP_BATCH]
+        conn.execute(_bump_sql(dialect, len(batch)), tuple(value for row in batch for value in row))
+
+
+def current(conn, keys):
+    """{(tipo, grupo): versión} para `keys` en una consulta; 0 si el grupo nunca se ha escrito"""
+    keys = list(keys)
+    where = ' OR '.join(['(kind = ? AND grp = ?)'] * len(keys))
+    found = {
+        (row[0], row[1]): row[2]
+        for row in conn.execute(
+            f'SELECT kind, grp, version FROM {TABLE} WHERE {where}',
+            tuple(value for key in keys for value in key)
+        ).fetchall()
+    }
+    return {key: found.get(key, 0) for key in keys}
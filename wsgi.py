@@ -0,0 +1,17 @@
+"""
+Entrada WSGI de producción:
+
+    gunicorn -c gunicorn.conf.py
+
+Con preload_app=True gunicorn importa este módulo una sola vez en el proceso
+maestro y luego hace fork de los workers: la app, sus módulos, las plantillas
+ya compiladas y lo inicializado por warm_up() se heredan (copy-on-write), así
+que cada worker arranca sin repetir ese trabajo. La única conexión a la base es
+la de check_schema(), que se cierra antes del fork; cada worker crea su pool con
+la primera petición real.
+"""
+from app import create_app, warm_up, check_schema
+
+check_schema()
+application = app = create_app()
+warm_up(application)